@@ -0,0 +1,52 @@
+"""
+Password verification latency for each bcrypt cost factor.
+
+For every cost in the range, one hash is made and then verified repeatedly
+with check_password, as authenticate does on login. The median verify time
+is what a user waits for after pressing "Iniciar Sesión"; use it to choose
+``bcrypt_rounds`` in the database settings (``YOGA_DB_BCRYPT_ROUNDS``).
+
+Usage: python -m benchmarks.bench_bcrypt [--min-rounds 10] [--max-rounds 14] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+
+import database.db as db
+
+
+def measure(rounds: int, repeat: int) -> tuple[float, list[float]]:
+    """(hash seconds, verify seconds per repetition) at `rounds`."""
+    started = time.perf_counter()
+    hashed = db.hash_password("bench-password", rounds)
+    hash_seconds = time.perf_counter() - started
+
+    verify_seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        assert db.check_password("bench-password", hashed)
+        verify_seconds.append(time.perf_counter() - started)
+    return hash_seconds, verify_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    configured = db.DB_SETTINGS.bcrypt_rounds
+    print(f"{'rounds':>6} {'hash ms':>9} {'verify p50':>11} {'verify max':>11}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        hash_seconds, verify_seconds = measure(rounds, args.repeat)
+        marker = "  <- configured" if rounds == configured else ""
+        print(
+            f"{rounds:>6} {hash_seconds * 1000:>9.1f} "
+            f"{statistics.median(verify_seconds) * 1000:>9.1f}ms "
+            f"{max(verify_seconds) * 1000:>9.1f}ms{marker}"
+        )
+
+
+if __name__ == "__main__":
+    main()
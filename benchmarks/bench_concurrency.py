@@ -0,0 +1,146 @@
+"""
+Read/write concurrency benchmark for the SQLite connection profile.
+
+Runs report-style readers and a payment writer against the same database file
+at the same time, once with the stock SQLite profile and once with the tuned
+profile from ``database.settings``.
+
+Usage: python -m benchmarks.bench_concurrency [--seconds 5] [--rows 50000]
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+
+from database.db import (
+    Center, Payment, Role, Session, SQLModel, User, YogaClass,
+    build_engine, func, select,
+)
+from database.settings import Settings, load_settings
+
+
+def seed(engine, rows: int) -> tuple[int, int]:
+    """Create one student/class and `rows` historical payments."""
+    with Session(engine) as session:
+        center = Center(name="Bench", address="-", phone="-")
+        teacher = User(name="T", email="t@bench", password_hash="x", role=Role.TEACHER)
+        student = User(name="S", email="s@bench", password_hash="x")
+        session.add_all([center, teacher, student])
+        session.flush()
+        yoga_class = YogaClass(
+            max_capacity=20, teacher_id=teacher.id, center_id=center.id, price=10.0
+        )
+        session.add(yoga_class)
+        session.flush()
+        session.bulk_insert_mappings(Payment, [
+            {
+                "student_id": student.id,
+                "yogaclass_id": yoga_class.id,
+                "amount": 10.0,
+                "payment_method": ("cash", "card", "transfer")[i % 3],
+            }
+            for i in range(rows)
+        ])
+        session.commit()
+        return student.id, yoga_class.id
+
+
+def run_profile(name: str, settings: Settings, seconds: float, rows: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", settings)
+        SQLModel.metadata.create_all(engine)
+        student_id, class_id = seed(engine, rows)
+
+        stop = threading.Event()
+        write_latencies: list[float] = []
+        read_latencies: list[float] = []
+        errors = {"read": 0, "write": 0}
+        lock = threading.Lock()
+
+        def reader():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    with Session(engine) as session:
+                        session.exec(
+                            select(Payment.payment_method, func.sum(Payment.amount))
+                            .group_by(Payment.payment_method)
+                        ).all()
+                except OperationalError:
+                    with lock:
+                        errors["read"] += 1
+                    continue
+                with lock:
+                    read_latencies.append(time.perf_counter() - start)
+
+        def writer():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    with Session(engine) as session:
+                        session.add(Payment(
+                            student_id=student_id, yogaclass_id=class_id, amount=10.0
+                        ))
+                        session.commit()
+                except OperationalError:
+                    with lock:
+                        errors["write"] += 1
+                    continue
+                with lock:
+                    write_latencies.append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    def p95(values):
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=20)[-1]
+
+    return {
+        "profile": name,
+        "reads_per_s": len(read_latencies) / seconds,
+        "writes_per_s": len(write_latencies) / seconds,
+        "read_p95_ms": p95(read_latencies) * 1000,
+        "write_p95_ms": p95(write_latencies) * 1000,
+        "write_max_ms": max(write_latencies, default=0.0) * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+
+    profiles = [
+        ("sqlite-defaults", Settings.sqlite_defaults()),
+        ("tuned", load_settings()),
+    ]
+    print(f"{'profile':<16}{'reads/s':>10}{'writes/s':>10}"
+          f"{'read p95':>11}{'write p95':>11}{'write max':>11}  errors")
+    for name, settings in profiles:
+        result = run_profile(name, settings, args.seconds, args.rows, args.readers)
+        print(
+            f"{result['profile']:<16}{result['reads_per_s']:>10.1f}"
+            f"{result['writes_per_s']:>10.1f}{result['read_p95_ms']:>9.1f}ms"
+            f"{result['write_p95_ms']:>9.1f}ms{result['write_max_ms']:>9.1f}ms"
+            f"  {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
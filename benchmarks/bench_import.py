@@ -0,0 +1,59 @@
+"""
+Throughput benchmark for the bulk user importer.
+
+Writes a CSV of synthetic users to a temporary directory and imports it into
+a fresh database. Most rows carry an existing bcrypt hash, as in a migration
+from another system; ``--plain`` rows carry a plaintext password and go
+through the hashing pool, which is where the time goes at bcrypt's default
+cost.
+
+Usage: python -m benchmarks.bench_import [--users 10000] [--plain 200] [--workers 4]
+"""
+import argparse
+import csv
+import tempfile
+from pathlib import Path
+
+import database.db as db
+from database.importer import IMPORT_CHUNK_SIZE, import_users
+
+
+def write_users(path: Path, users: int, plain: int):
+    password_hash = db.hash_password("bench-password")
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "email", "phone", "password", "password_hash", "role"])
+        for i in range(users):
+            role = "TEACHER" if i % 50 == 0 else "STUDENT"
+            if i < plain:
+                writer.writerow([f"User {i}", f"user{i}@bench", "600000000", f"secret-{i}", "", role])
+            else:
+                writer.writerow([f"User {i}", f"user{i}@bench", "600000000", "", password_hash, role])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--plain", type=int, default=200,
+                        help="rows whose password must be hashed")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "users.csv"
+        write_users(source, args.users, min(args.plain, args.users))
+        db.engine = db.build_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", db.DB_SETTINGS)
+        db.Create_Tables()
+
+        report = import_users(source, workers=args.workers, chunk_size=args.chunk_size)
+        insert_seconds = report.seconds - report.hash_seconds
+        print(report.summary())
+        print(f"hashing:  {report.hash_seconds:.2f}s for {min(args.plain, args.users)} passwords")
+        print(f"the rest: {insert_seconds:.2f}s "
+              f"({report.imported / max(report.seconds, 1e-9):.0f} rows/s overall)")
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Rendering time and memory of the paginated financial PDF.
+
+Bulk-inserts synthetic payments spread over a few centers into a fresh
+database and renders them with services.pdf_report, as the "Generar PDF"
+button does, reporting the time, the page count and the peak of Python
+allocations (which should not grow with the number of rows).
+
+Usage: python -m benchmarks.bench_pdf [--payments 10000] [--centers 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert
+
+import database.db as db
+
+
+def fill(payments: int, centers: int):
+    teacher = db.Add_User("Bench Teacher", "teacher@bench", None, "bench-password", db.Role.TEACHER)
+    student = db.Add_User("Bench Student", "student@bench", None, "bench-password", db.Role.STUDENT)
+    class_ids = []
+    for i in range(centers):
+        center = db.add_center(f"Centro {i + 1}", f"Calle {i + 1}", "600000000")
+        class_ids.append(db.Add_YogaClass(datetime(2025, 1, 1, 10), 20, teacher.id, center.id).id)
+
+    start = datetime(2025, 1, 1)
+    rows = [
+        {
+            "student_id": student.id,
+            "yogaclass_id": class_ids[i % centers],
+            "amount": 10.0 + i % 15,
+            "payment_method": ("cash", "card", "transfer")[i % 3],
+            "status": "pending" if i % 10 == 0 else "paid",
+            "paid_at": start + timedelta(minutes=5 * i),
+        }
+        for i in range(payments)
+    ]
+    with db.Session(db.engine) as session:
+        session.execute(insert(db.Payment), rows)
+        session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--payments", type=int, default=10000)
+    parser.add_argument("--centers", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication
+    app = QGuiApplication(sys.argv)  # noqa: F841 - fonts need an application
+
+    from services.pdf_report import render_financial_pdf
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.engine = db.build_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", db.DB_SETTINGS)
+        db.Create_Tables()
+        fill(args.payments, args.centers)
+
+        tracemalloc.start()
+        report = render_financial_pdf(Path(tmp) / "report.pdf")
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(report.summary())
+        print(f"{report.rows / max(report.seconds, 1e-9):.0f} rows/s, "
+              f"{report.path.stat().st_size / 1e6:.1f}MB file, "
+              f"peak Python allocations {peak / 1e6:.1f}MB")
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
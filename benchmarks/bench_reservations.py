@@ -0,0 +1,123 @@
+"""
+Multi-threaded stress benchmark for Add_Reservation.
+
+Many threads book random (student, class) pairs against a small set of
+classes, including repeated attempts for the same pair. Afterwards the
+database is checked for oversold classes, duplicate active reservations and
+capacity counters that disagree with the reservation rows.
+
+Usage: python -m benchmarks.bench_reservations [--threads 8] [--attempts 500]
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import database.db as db
+from database.db import Reserve, Role, Session, User, YogaClass, func, select
+
+
+def seed(classes: int, capacity: int, students: int) -> tuple[list[int], list[int]]:
+    center = db.add_center("Bench", "-", "-")
+    teacher = User(name="T", email="t@bench", password_hash="x", role=Role.TEACHER)
+    with Session(db.engine) as session:
+        session.add(teacher)
+        session.flush()
+        student_rows = [
+            User(name=f"S{i}", email=f"s{i}@bench", password_hash="x")
+            for i in range(students)
+        ]
+        class_rows = [
+            YogaClass(max_capacity=capacity, teacher_id=teacher.id, center_id=center.id)
+            for _ in range(classes)
+        ]
+        session.add_all(student_rows + class_rows)
+        session.commit()
+        return [s.id for s in student_rows], [c.id for c in class_rows]
+
+
+def verify(class_ids: list[int]) -> dict:
+    with Session(db.engine) as session:
+        active = dict(session.exec(
+            select(Reserve.yogaclass_id, func.count(Reserve.id))
+            .where(Reserve.status == "active")
+            .group_by(Reserve.yogaclass_id)
+        ).all())
+        duplicates = session.exec(
+            select(func.count()).select_from(
+                select(Reserve.student_id, Reserve.yogaclass_id)
+                .where(Reserve.status == "active")
+                .group_by(Reserve.student_id, Reserve.yogaclass_id)
+                .having(func.count(Reserve.id) > 1)
+                .subquery()
+            )
+        ).one()
+        oversold = mismatched = 0
+        for class_id in class_ids:
+            yoga_class = session.get(YogaClass, class_id)
+            booked = active.get(class_id, 0)
+            oversold += booked > yoga_class.max_capacity
+            mismatched += booked != yoga_class.current_capacity
+    return {"oversold": oversold, "duplicates": duplicates, "mismatched": mismatched}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=500, help="per thread")
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--capacity", type=int, default=20)
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.engine = db.build_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", db.DB_SETTINGS)
+        db.Create_Tables()
+        student_ids, class_ids = seed(args.classes, args.capacity, args.students)
+
+        counts = {"booked": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker(worker_seed: int):
+            rng = random.Random(worker_seed)
+            for _ in range(args.attempts):
+                student_id = rng.choice(student_ids)
+                class_id = rng.choice(class_ids)
+                try:
+                    outcome = "booked" if db.Add_Reservation(student_id, class_id) else "rejected"
+                except Exception:
+                    outcome = "errors"
+                with lock:
+                    counts[outcome] += 1
+
+        threads = [
+            threading.Thread(target=worker, args=(args.seed + i,))
+            for i in range(args.threads)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        result = verify(class_ids)
+        db.engine.dispose()
+
+    attempts = args.threads * args.attempts
+    print(f"attempts:        {attempts} in {elapsed:.2f}s ({attempts / elapsed:.0f}/s)")
+    print(f"booked:          {counts['booked']} ({counts['booked'] / elapsed:.0f} bookings/s)")
+    print(f"rejected:        {counts['rejected']}")
+    print(f"errors:          {counts['errors']}")
+    print(f"oversold:        {result['oversold']}")
+    print(f"duplicates:      {result['duplicates']}")
+    print(f"counter drift:   {result['mismatched']}")
+    if counts["errors"] or any(result.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Search latency of the FTS5 index against the previous LIKE scan.
+
+Bulk-inserts synthetic users into a fresh database (the triggers index them
+as they go) and times the user search for a few typical inputs, both through
+search_users_query and through the old ``name LIKE '%term%' OR email LIKE
+'%term%'`` filter, which has to read every row of the user table.
+
+Usage: python -m benchmarks.bench_search [--users 100000] [--repeat 20]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+
+import database.db as db
+
+FIRST_NAMES = ["Ana", "María", "José", "Lucía", "Carlos", "Elena", "Javier", "Sofía", "Pablo", "Marta"]
+LAST_NAMES = ["García", "López", "Martínez", "Sánchez", "Pérez", "Gómez", "Ruiz", "Díaz", "Moreno", "Álvarez"]
+TERMS = ["ana", "mar lop", "user123", "alvarez", "60012"]
+
+
+def fill(users: int):
+    password_hash = db.hash_password("bench-password", 4)
+    rows = [
+        {
+            "name": f"{FIRST_NAMES[i % 10]} {LAST_NAMES[i // 10 % 10]} {i}",
+            "email": f"user{i}@bench",
+            "phone": f"600{i:06d}",
+            "password_hash": password_hash,
+            "role": db.Role.STUDENT,
+        }
+        for i in range(users)
+    ]
+    with db.Session(db.engine) as session:
+        session.execute(insert(db.User), rows)
+        session.commit()
+
+
+def like_query(term: str):
+    return db.select(db.User).where(db.User.name.contains(term) | db.User.email.contains(term))
+
+
+def measure(build, term: str, repeat: int) -> tuple[float, int]:
+    """(median seconds, rows) of running build(term) `repeat` times."""
+    seconds = []
+    with db.Session(db.engine) as session:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = session.exec(build(term)).all()
+            seconds.append(time.perf_counter() - started)
+    return statistics.median(seconds), len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.engine = db.build_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", db.DB_SETTINGS)
+        db.Create_Tables()
+        started = time.perf_counter()
+        fill(args.users)
+        print(f"inserted and indexed {args.users} users in {time.perf_counter() - started:.2f}s")
+
+        print(f"{'term':>10} {'fts ms':>8} {'rows':>6} {'like ms':>8} {'rows':>6}")
+        for term in TERMS:
+            fts_seconds, fts_rows = measure(db.search_users_query, term, args.repeat)
+            # The LIKE filter matches the whole input as one substring
+            like_seconds, like_rows = measure(like_query, term, args.repeat)
+            print(f"{term:>10} {fts_seconds * 1000:>8.2f} {fts_rows:>6} "
+                  f"{like_seconds * 1000:>8.2f} {like_rows:>6}")
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Seeded generator of realistic datasets for the benchmarks.
+
+Builds centers, staff, students, a weekly timetable per center and its
+history: every past class gets bookings, attendance and payments, and the
+weeks ahead get open bookings, so availability, statistics and report paths
+all have data to chew on. The same spec and seed always produce the same
+rows relative to the anchor day (today unless given), which makes timings
+from different runs comparable.
+
+Rows are bulk-inserted in chunks with explicit ids, bypassing the write
+helpers; the summary tables are rebuilt at the end, and the search index
+fills itself through its triggers. The target database must be empty.
+
+Usage: python -m benchmarks.datagen FILE [--size small] [--students 500] [--years 1] [--seed 42]
+"""
+import argparse
+import random
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert
+
+import database.db as db
+
+PAYMENT_METHODS = ["cash", "card", "transfer"]
+CLASS_HOURS = [7, 9, 10, 12, 17, 18, 19, 20]
+FIRST_NAMES = ["Ana", "María", "José", "Lucía", "Carlos", "Elena", "Javier", "Sofía",
+               "Pablo", "Marta", "Diego", "Laura", "Andrés", "Paula", "Raúl", "Irene"]
+LAST_NAMES = ["García", "López", "Martínez", "Sánchez", "Pérez", "Gómez", "Ruiz",
+              "Díaz", "Moreno", "Álvarez", "Romero", "Navarro", "Torres", "Gil"]
+INSERT_CHUNK_SIZE = 5000
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Shape of a generated dataset."""
+    centers: int = 2
+    teachers: int = 8
+    students: int = 300
+    # Weekly timetable slots of each center
+    classes_per_week: int = 15
+    capacity: int = 20
+    # Average share of a class's seats that get booked
+    booking_rate: float = 0.6
+    # Share of past bookings that show up (present or late)
+    attendance_rate: float = 0.85
+    # History with attendance and payments, and open weeks ahead
+    years: float = 1.0
+    future_weeks: int = 4
+    price: float = 15.0
+    seed: int = 42
+
+
+SIZES = {
+    "small": DatasetSpec(),
+    "medium": DatasetSpec(centers=4, teachers=20, students=2000, classes_per_week=25, years=2.0),
+    "large": DatasetSpec(centers=8, teachers=40, students=10000, classes_per_week=35, years=3.0),
+}
+
+
+class _BulkWriter:
+    """Buffers rows per model and inserts them in chunks, parents first."""
+
+    ORDER = [db.Center, db.User, db.UserCenter, db.YogaClass, db.Reserve, db.Attendance, db.Payment]
+
+    def __init__(self, session):
+        self.session = session
+        self.buffers = {model: [] for model in self.ORDER}
+        self.counts = {model.__tablename__: 0 for model in self.ORDER}
+
+    def add(self, model, row):
+        self.buffers[model].append(row)
+        if len(self.buffers[model]) >= INSERT_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        for model in self.ORDER:
+            rows = self.buffers[model]
+            if rows:
+                self.session.execute(insert(model), rows)
+                self.counts[model.__tablename__] += len(rows)
+                rows.clear()
+
+
+def _name(rng) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def generate(spec: DatasetSpec, anchor: date = None) -> dict:
+    """Fill the (empty) current database; return rows inserted per table."""
+    rng = random.Random(spec.seed)
+    anchor = anchor or date.today()
+    now = datetime.combine(anchor, datetime.min.time()) + timedelta(hours=12)
+    first_week = anchor - timedelta(days=anchor.weekday()) - timedelta(weeks=round(spec.years * 52))
+    weeks = round(spec.years * 52) + spec.future_weeks
+    # Bcrypt at its minimum cost: the benchmarks never log these users in
+    password_hash = db.hash_password("bench-password", 4)
+
+    with db.Session(db.engine) as session:
+        if session.exec(db.select(db.func.count(db.User.id))).one():
+            raise ValueError("datagen needs an empty database")
+        writer = _BulkWriter(session)
+
+        for center_id in range(1, spec.centers + 1):
+            writer.add(db.Center, {
+                "id": center_id, "name": f"Centro {center_id}",
+                "address": f"Calle {rng.randint(1, 200)}", "phone": f"9{rng.randint(10**7, 10**8 - 1)}",
+            })
+
+        def add_user(user_id, role, center_id):
+            writer.add(db.User, {
+                "id": user_id, "name": _name(rng), "email": f"{role.value.lower()}{user_id}@bench",
+                "phone": f"6{rng.randint(10**7, 10**8 - 1)}", "password_hash": password_hash,
+                "role": role, "is_active": rng.random() > 0.05,
+                "created_at": now - timedelta(days=rng.randint(0, int(spec.years * 365) + 30)),
+            })
+            writer.add(db.UserCenter, {"user_id": user_id, "center_id": center_id})
+
+        user_id = 1
+        add_user(user_id, db.Role.ADMINISTRATOR, 1)
+        teachers = []
+        for i in range(spec.teachers):
+            user_id += 1
+            teachers.append((user_id, i % spec.centers + 1))
+            add_user(user_id, db.Role.TEACHER, i % spec.centers + 1)
+        students = []
+        for i in range(spec.students):
+            user_id += 1
+            students.append(user_id)
+            add_user(user_id, db.Role.STUDENT, rng.randint(1, spec.centers))
+
+        # Fixed weekly timetable per center: (weekday, hour, teacher)
+        timetable = {}
+        for center_id in range(1, spec.centers + 1):
+            staff = [t for t, c in teachers if c == center_id] or [t for t, _ in teachers]
+            slots = rng.sample(
+                [(day, hour) for day in range(7) for hour in CLASS_HOURS],
+                min(spec.classes_per_week, 7 * len(CLASS_HOURS)),
+            )
+            timetable[center_id] = [(day, hour, rng.choice(staff)) for day, hour in sorted(slots)]
+
+        class_id = reserve_id = attendance_id = payment_id = 0
+        for week in range(weeks):
+            monday = first_week + timedelta(weeks=week)
+            for center_id, slots in timetable.items():
+                for day, hour, teacher_id in slots:
+                    scheduled_at = datetime.combine(monday + timedelta(days=day), datetime.min.time()) \
+                        + timedelta(hours=hour)
+                    past = scheduled_at < now
+                    booked = min(spec.capacity, max(0, round(
+                        spec.capacity * spec.booking_rate * rng.uniform(0.5, 1.5)
+                    )))
+                    class_id += 1
+                    writer.add(db.YogaClass, {
+                        "id": class_id, "scheduled_at": scheduled_at,
+                        "max_capacity": spec.capacity, "current_capacity": booked,
+                        "price": spec.price, "teacher_share_percentage": 70.0,
+                        "teacher_id": teacher_id, "center_id": center_id,
+                    })
+                    for student_id in rng.sample(students, min(booked, len(students))):
+                        reserve_id += 1
+                        writer.add(db.Reserve, {
+                            "id": reserve_id, "student_id": student_id, "yogaclass_id": class_id,
+                            "reserved_at": scheduled_at - timedelta(hours=rng.randint(2, 240)),
+                            "status": "completed" if past else "active",
+                        })
+                        paid = rng.random()
+                        payment_id += 1
+                        writer.add(db.Payment, {
+                            "id": payment_id, "student_id": student_id, "yogaclass_id": class_id,
+                            "reserve_id": reserve_id, "amount": spec.price,
+                            "paid_at": scheduled_at - timedelta(hours=rng.randint(1, 240)),
+                            "payment_method": rng.choice(PAYMENT_METHODS),
+                            "status": "paid" if paid < 0.9 else "pending" if paid < 0.97 else "refunded",
+                        })
+                        if past:
+                            shows = rng.random() < spec.attendance_rate
+                            attendance_id += 1
+                            writer.add(db.Attendance, {
+                                "id": attendance_id, "student_id": student_id,
+                                "yogaclass_id": class_id, "attended_at": scheduled_at,
+                                "status": ("late" if rng.random() < 0.1 else "present") if shows else "absent",
+                            })
+        writer.flush()
+        session.commit()
+
+    db.rebuild_summaries()
+    db.reference_cache.invalidate()
+    return writer.counts
+
+
+def spec_from_args(args) -> DatasetSpec:
+    """SIZES[args.size] with any field given on the command line overridden."""
+    overrides = {
+        spec_field.name: getattr(args, spec_field.name)
+        for spec_field in fields(DatasetSpec)
+        if getattr(args, spec_field.name, None) is not None
+    }
+    return replace(SIZES[args.size], **overrides)
+
+
+def add_spec_arguments(parser):
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    for spec_field in fields(DatasetSpec):
+        parser.add_argument(f"--{spec_field.name.replace('_', '-')}", type=type(spec_field.default))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("file", type=Path, help="SQLite file to create")
+    parser.add_argument("--anchor", type=date.fromisoformat, help="'today' of the dataset (YYYY-MM-DD)")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    spec = spec_from_args(args)
+    db.engine = db.build_engine(f"sqlite:///{args.file}", db.DB_SETTINGS)
+    db.Create_Tables()
+    started = time.perf_counter()
+    counts = generate(spec, args.anchor)
+    print(asdict(spec))
+    for table, count in counts.items():
+        print(f"{table:>12}: {count}")
+    print(f"generated in {time.perf_counter() - started:.1f}s")
+    db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
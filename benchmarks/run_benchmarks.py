@@ -0,0 +1,239 @@
+"""
+Time the database helpers and report paths at several dataset sizes.
+
+For each size a fresh database is filled by benchmarks.datagen (same seed,
+so the same rows every run) and every case below runs once to warm up and
+then ``--repeat`` times. The timings go to a JSON file; with a baseline
+(``--baseline``, written by an earlier run with ``--save-baseline``) each
+case's median is compared with the stored one and cases slower by more than
+``--threshold`` are reported as regressions, with a non-zero exit status.
+The generated rows depend on ``--anchor``, the "today" of the data: it is
+stored with the results, defaults to the baseline's, and a baseline of
+another anchor is not compared.
+
+The report cases call the query_* functions the ReportsWidget.generate_*
+methods run on the task runner, i.e. everything but filling the tables.
+
+Usage: python -m benchmarks.run_benchmarks [--sizes small medium] [--repeat 5] [--output results.json] [--baseline benchmarks/baseline.json]
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import database.db as db
+from benchmarks.datagen import SIZES, generate
+from services.report_service import ReportService, executive_dashboard
+from ui import reports_widget as reports
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+# Differences below this many milliseconds are noise, whatever the ratio
+NOISE_FLOOR_MS = 1.0
+
+
+class Context:
+    """Ids and dates the cases run against, picked from the generated data."""
+
+    def __init__(self, anchor: date):
+        self.now = datetime.combine(anchor, datetime.min.time()) + timedelta(hours=12)
+        # Previous calendar month, the usual month-end report period
+        this_month = self.now.replace(day=1, hour=0)
+        self.month_start = (this_month - timedelta(days=1)).replace(day=1)
+        self.month_end = this_month - timedelta(microseconds=1)
+        self.year_start = self.now - timedelta(days=365)
+        with db.Session(db.engine) as session:
+            self.student_id = session.exec(
+                db.select(db.Payment.student_id)
+                .group_by(db.Payment.student_id)
+                .order_by(db.func.count().desc()).limit(1)
+            ).one()
+            self.teacher_id = session.exec(
+                db.select(db.YogaClass.teacher_id)
+                .group_by(db.YogaClass.teacher_id)
+                .order_by(db.func.count().desc()).limit(1)
+            ).one()
+            # Free (student, upcoming class) pairs for the booking case
+            open_classes = session.exec(
+                db.select(db.YogaClass.id).where(
+                    db.YogaClass.scheduled_at > self.now,
+                    db.YogaClass.current_capacity < db.YogaClass.max_capacity,
+                )
+            ).all()
+            booked = set(session.exec(
+                db.select(db.Reserve.student_id, db.Reserve.yogaclass_id)
+                .where(db.Reserve.status == "active")
+            ).all())
+            students = session.exec(
+                db.select(db.User.id).where(db.User.role == db.Role.STUDENT).limit(50)
+            ).all()
+        self.bookings = iter([
+            (student_id, class_id)
+            for class_id in open_classes for student_id in students
+            if (student_id, class_id) not in booked
+        ])
+
+    def book(self):
+        student_id, class_id = next(self.bookings)
+        return db.Add_Reservation(student_id, class_id)
+
+
+# Case name -> callable(context) run once per repetition
+CASES = {
+    "get_available_classes_for_date": lambda c: db.get_available_classes_for_date(c.now, c.student_id),
+    "Add_Reservation": lambda c: c.book(),
+    "get_student_statistics": lambda c: db.get_student_statistics(c.student_id),
+    "get_teacher_statistics": lambda c: db.get_teacher_statistics(c.teacher_id),
+    "search": lambda c: db.search("mar lop"),
+    "ReportService.generate_financial_report":
+        lambda c: ReportService.generate_financial_report(c.year_start, c.now),
+    "ReportService.generate_attendance_report":
+        lambda c: ReportService.generate_attendance_report(None, c.year_start, c.now),
+    "ReportService.generate_class_report": lambda c: ReportService.generate_class_report(),
+    "ReportService.aggregate(revenue by month)":
+        lambda c: ReportService.aggregate("revenue", ("revenue",), ("month",), c.year_start, c.now),
+    "executive_dashboard(12 months)": lambda c: executive_dashboard.get(12, force=True),
+    "reports.financial_summary":
+        lambda c: reports.query_financial_summary(c.month_start, c.month_end, None, None),
+    "reports.revenue_by_center":
+        lambda c: reports.query_revenue_by_center(c.year_start, c.now, "Todos"),
+    "reports.revenue_by_payment_method":
+        lambda c: reports.query_revenue_by_payment_method(c.year_start, c.now, None, "Todos"),
+    "reports.attendance_by_class":
+        lambda c: reports.query_attendance_by_class(c.month_start, c.month_end, None, None),
+    "reports.attendance_status_counts":
+        lambda c: reports.query_attendance_status_counts(c.year_start, c.now, None, None),
+    "reports.month_classes":
+        lambda c: reports.query_month_classes(c.now.month, None, None, db.YogaClass.scheduled_at),
+    "reports.teacher_performance":
+        lambda c: reports.query_teacher_performance(None, c.year_start, c.now),
+    "reports.teacher_earnings":
+        lambda c: reports.query_teacher_earnings(None, c.year_start, c.now),
+}
+
+
+def time_case(fn, context, repeat: int) -> dict:
+    """Warm up once, then time `repeat` runs; milliseconds."""
+    fn(context)
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(context)
+        seconds.append(time.perf_counter() - started)
+    return {
+        "median_ms": statistics.median(seconds) * 1000,
+        "min_ms": min(seconds) * 1000,
+        "max_ms": max(seconds) * 1000,
+    }
+
+
+def run_size(size: str, repeat: int, anchor: date, selected) -> dict:
+    spec = SIZES[size]
+    with tempfile.TemporaryDirectory() as tmp:
+        db.engine = db.build_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", db.DB_SETTINGS)
+        db.Create_Tables()
+        started = time.perf_counter()
+        rows = generate(spec, anchor)
+        print(f"[{size}] generated {sum(rows.values())} rows in {time.perf_counter() - started:.1f}s")
+
+        context = Context(anchor)
+        cases = {}
+        for name, fn in CASES.items():
+            if selected and not any(part in name for part in selected):
+                continue
+            cases[name] = time_case(fn, context, repeat)
+            print(f"[{size}] {name:<45} {cases[name]['median_ms']:>9.2f}ms")
+        db.engine.dispose()
+    return {"spec": asdict(spec), "rows": rows, "cases": cases}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Lines describing the cases slower than the baseline by more than `threshold`."""
+    regressions = []
+    if baseline.get("anchor") != results["anchor"]:
+        print(f"baseline anchor {baseline.get('anchor')} differs from "
+              f"{results['anchor']}; not compared")
+        return regressions
+    for size, result in results["sizes"].items():
+        stored = baseline.get("sizes", {}).get(size)
+        if not stored:
+            continue
+        if stored["spec"] != result["spec"]:
+            print(f"[{size}] dataset spec differs from the baseline; not compared")
+            continue
+        for name, timing in result["cases"].items():
+            previous = stored["cases"].get(name)
+            if not previous:
+                continue
+            ratio = timing["median_ms"] / max(previous["median_ms"], 1e-9)
+            timing["baseline_ms"] = previous["median_ms"]
+            timing["ratio"] = ratio
+            if ratio > 1 + threshold and timing["median_ms"] - previous["median_ms"] > NOISE_FLOOR_MS:
+                regressions.append(
+                    f"[{size}] {name}: {previous['median_ms']:.2f}ms -> "
+                    f"{timing['median_ms']:.2f}ms (x{ratio:.2f})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", choices=sorted(SIZES), default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cases", nargs="+", help="only cases whose name contains one of these")
+    parser.add_argument("--anchor", type=date.fromisoformat,
+                        help="'today' of the generated data (YYYY-MM-DD); "
+                             "defaults to the baseline's, else today")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown ratio reported as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text())
+    if args.anchor is None:
+        stored = baseline and baseline.get("anchor")
+        args.anchor = date.fromisoformat(stored) if stored else date.today()
+
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "anchor": args.anchor.isoformat(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "sizes": {
+            size: run_size(size, args.repeat, args.anchor, args.cases) for size in args.sizes
+        },
+    }
+
+    regressions = []
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"baseline written to {args.baseline}")
+    elif baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        print(f"{len(regressions)} regressions against {args.baseline}")
+        for line in regressions:
+            print(f"  {line}")
+    else:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"results written to {args.output}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
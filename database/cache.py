@@ -0,0 +1,59 @@
+"""
+Small in-process cache with a time-to-live and an LRU size bound.
+
+Used for reference data (centers, teachers, students) that every dialog
+needs to fill its combo boxes and that changes rarely. Keys are tuples whose
+first element names a group, so that a write can drop everything derived
+from one table with ``invalidate(group)``. Values should be immutable (tuples
+of named tuples), since the same object is handed to every caller and
+thread.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe mapping of key -> value that forgets entries after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 300.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a load that raced with one is not stored
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(self, key: tuple, loader):
+        """Cached value for `key`, calling loader() on a miss or after expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                return entry[1]
+            generation = self._generation
+
+        # Load outside the lock so a slow query does not block other keys
+        value = loader()
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (self.clock() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, group: str | None = None):
+        """Drop the entries of one key group, or everything."""
+        with self._lock:
+            self._generation += 1
+            if group is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == group]:
+                del self._entries[key]
@@ -0,0 +1,67 @@
+"""
+Cooperative cancellation of running SQLite statements.
+
+Every connection gets a progress handler (see ``install_progress_handler``)
+that SQLite calls every few hundred virtual-machine instructions. The handler
+looks at the cancel token bound to the calling thread with ``cancellable()``;
+once that token is cancelled it returns non-zero and SQLite aborts the
+statement with ``OperationalError: interrupted``. Threads without a token are
+never interrupted.
+"""
+import threading
+from contextlib import contextmanager
+
+# SQLite VM instructions between two progress-handler calls
+PROGRESS_INTERVAL = 1000
+
+_local = threading.local()
+
+
+class QueryCancelled(Exception):
+    """Raised by check_cancelled() when the current token was cancelled."""
+
+
+class CancelToken:
+    """Thread-safe flag shared by the thread that runs a query and its owner."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+@contextmanager
+def cancellable(token: CancelToken):
+    """Bind `token` to the current thread for the duration of the block."""
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def current_token() -> CancelToken | None:
+    return getattr(_local, "token", None)
+
+
+def check_cancelled():
+    """Raise QueryCancelled between statements if the current token was cancelled."""
+    token = current_token()
+    if token is not None and token.cancelled:
+        raise QueryCancelled()
+
+
+def _progress_handler() -> int:
+    token = getattr(_local, "token", None)
+    return 1 if token is not None and token.cancelled else 0
+
+
+def install_progress_handler(dbapi_connection):
+    """Let statements on this connection be interrupted through cancel tokens."""
+    dbapi_connection.set_progress_handler(_progress_handler, PROGRESS_INTERVAL)
@@ -1,10 +1,18 @@
 """
 Database module for yoga centers.
 """
-from datetime import datetime, timezone
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta, timezone
 from enum import Enum, unique
 from pathlib import Path
+from typing import NamedTuple
 import bcrypt
+from sqlalchemy import Index, case, column, event, false, literal_column, table
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import (
     Field,
     Relationship,
@@ -12,21 +20,74 @@ from sqlmodel import (
     SQLModel,
     create_engine,
     select,
+    insert,
     update,
     delete,
     and_,
+    text,
     func
 )
+from database.cache import TTLCache
+from database.cancellation import install_progress_handler
+from database.pagination import DEFAULT_PAGE_SIZE, Page, paginate
+from database.profiling import profiler
+from database.settings import Settings, load_settings
 
 # <------------------- Database configuration ------------------>
 DB_PATH = Path(__file__).parent.parent / "data" / "database.db"
-DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-# echo=False para no mostrar consultas SQL en consola
-engine = create_engine(
-    DATABASE_URL, echo=False, connect_args={"check_same_thread": False}
-)
+def build_engine(url: str, settings: Settings):
+    """Create an engine that applies the PRAGMA profile on every connect.
+
+    Connections also get the cancellation progress handler, so a query run
+    under a cancel token (database.cancellation) can be interrupted. With
+    YOGA_PROFILE_QUERIES set, statements are timed by database.profiling.
+    """
+    # echo=False para no mostrar consultas SQL en consola
+    new_engine = create_engine(
+        url, echo=False, connect_args={"check_same_thread": False}
+    )
+
+    @event.listens_for(new_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in settings.pragmas():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+        install_progress_handler(dbapi_connection)
+
+    if profiler.enabled:
+        profiler.install(new_engine)
+    return new_engine
+
+DB_SETTINGS = load_settings()
+# Serializes the first build so concurrent workers share one engine
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """The application engine, built on first use.
+
+    Importing this module stays cheap: the data directory and the engine are
+    only created when something talks to the database. Assigning
+    ``database.db.engine`` (as the benchmarks do) replaces it.
+    """
+    current = globals().get("engine")
+    if current is None:
+        with _engine_lock:
+            current = globals().get("engine")
+            if current is None:
+                DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+                current = globals()["engine"] = build_engine(DATABASE_URL, DB_SETTINGS)
+    return current
+
+def __getattr__(name):
+    # ``db.engine`` / ``from database.db import engine`` before the first use
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # <------------------- Enums ------------------>
 @unique
@@ -62,6 +123,10 @@ class Center(SQLModel, table=True):
 
 class User(SQLModel, table=True):
     """Represents a user of the system."""
+    __table_args__ = (
+        Index("ix_user_role_active", "role", "is_active"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     name: str = Field(max_length=100)
     email: str = Field(max_length=120, unique=True, index=True)
@@ -84,8 +149,34 @@ class User(SQLModel, table=True):
         back_populates="users", link_model=UserCenter
     )
 
+class ClassSeries(SQLModel, table=True):
+    """Represents a weekly recurring class; its occurrences are YogaClass rows."""
+    id: int | None = Field(default=None, primary_key=True)
+    # Comma-separated weekdays, Monday = 0 ("0,2,4" = Mon/Wed/Fri)
+    weekdays: str = Field(max_length=20)
+    start_time: time
+    start_date: date
+    end_date: date
+    max_capacity: int = Field(gt=0)
+    price: float = Field(default=0.0)
+    teacher_share_percentage: float = Field(default=70.0)
+    status: str = Field(default="active", max_length=20)  # active, cancelled
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
+
+    teacher_id: int = Field(foreign_key="user.id")
+    center_id: int = Field(foreign_key="center.id")
+
+    classes: list["YogaClass"] = Relationship(back_populates="series")
+
 class YogaClass(SQLModel, table=True):
     """Represents a class of the system."""
+    __table_args__ = (
+        Index("ix_yogaclass_center_scheduled", "center_id", "scheduled_at"),
+        Index("ix_yogaclass_teacher_scheduled", "teacher_id", "scheduled_at"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     scheduled_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc), index=True
@@ -95,14 +186,17 @@ class YogaClass(SQLModel, table=True):
     price: float = Field(default=0.0)
     teacher_share_percentage: float = Field(default=70.0)
 
-    teacher_id: int | None = Field(
-        default=None, foreign_key="user.id", index=True
-    )
+    # Indexed by ix_yogaclass_teacher_scheduled, which starts with it
+    teacher_id: int | None = Field(default=None, foreign_key="user.id")
     center_id: int = Field(foreign_key="center.id")
+    series_id: int | None = Field(
+        default=None, foreign_key="classseries.id", index=True
+    )
 
     # Relationships
     teacher: User = Relationship(back_populates="classes_taught")
     center: Center = Relationship(back_populates="classes")
+    series: ClassSeries | None = Relationship(back_populates="classes")
 
     reservations: list["Reserve"] = Relationship(back_populates="yogaclass")
     attendances: list["Attendance"] = Relationship(back_populates="yogaclass")
@@ -110,6 +204,16 @@ class YogaClass(SQLModel, table=True):
 
 class Reserve(SQLModel, table=True):
     """Represents a reservation of a class."""
+    __table_args__ = (
+        Index("ix_reserve_student_class_status", "student_id", "yogaclass_id", "status"),
+        Index("ix_reserve_class_status_student", "yogaclass_id", "status", "student_id"),
+        # A student can hold at most one active reservation per class
+        Index(
+            "ux_reserve_active_student_class", "student_id", "yogaclass_id",
+            unique=True, sqlite_where=text("status = 'active'"),
+        ),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     student_id: int = Field(foreign_key="user.id")
     yogaclass_id: int = Field(foreign_key="yogaclass.id")
@@ -126,6 +230,13 @@ class Reserve(SQLModel, table=True):
 
 class Attendance(SQLModel, table=True):
     """Represents an attendance of a class."""
+    __table_args__ = (
+        Index("ix_attendance_class_student", "yogaclass_id", "student_id", "status"),
+        Index("ix_attendance_student_status", "student_id", "status"),
+        # One attendance record per student and class (save_class_attendance upserts on it)
+        Index("ux_attendance_student_class", "student_id", "yogaclass_id", unique=True),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     student_id: int = Field(foreign_key="user.id")
     yogaclass_id: int = Field(foreign_key="yogaclass.id")
@@ -141,15 +252,23 @@ class Attendance(SQLModel, table=True):
 
 class Payment(SQLModel, table=True):
     """Represents a payment of a class."""
+    __table_args__ = (
+        # Covering indexes: student totals and period reports never touch the table
+        Index("ix_payment_student_status_amount", "student_id", "status", "amount"),
+        Index("ix_payment_class_status", "yogaclass_id", "status"),
+        Index(
+            "ix_payment_paid_at_cover", "paid_at", "status", "payment_method", "amount"
+        ),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     student_id: int = Field(foreign_key="user.id")
     yogaclass_id: int = Field(foreign_key="yogaclass.id")
     reserve_id: int | None = Field(default=None, foreign_key="reserve.id")
 
     amount: float = Field(default=0.0)
-    paid_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc), index=True
-    )
+    # Indexed by ix_payment_paid_at_cover, which starts with it
+    paid_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     payment_method: str = Field(default="cash", max_length=50)
     status: str = Field(default="paid", max_length=20)  # paid, pending, refunded
 
@@ -158,15 +277,272 @@ class Payment(SQLModel, table=True):
     yogaclass: YogaClass = Relationship(back_populates="payments")
     reserve: Reserve | None = Relationship(back_populates="payments")
 
+# <------------------- Summary tables ------------------>
+# Pre-aggregated counters kept in step with the raw rows by the write helpers
+# (see "Summary maintenance"); rebuild_summaries() recomputes them.
+class DailyRevenueSummary(SQLModel, table=True):
+    """Payments of a center on one day, by payment method and status."""
+    center_id: int = Field(foreign_key="center.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    payment_method: str = Field(max_length=50, primary_key=True)
+    status: str = Field(max_length=20, primary_key=True)
+    payments: int = Field(default=0)
+    amount: float = Field(default=0.0)
+
+class DailyActivitySummary(SQLModel, table=True):
+    """Bookings made on a day and attendance of the classes held that day."""
+    center_id: int = Field(foreign_key="center.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    bookings: int = Field(default=0)
+    present: int = Field(default=0)
+    late: int = Field(default=0)
+    absent: int = Field(default=0)
+
+class ClassSummary(SQLModel, table=True):
+    """Bookings, attendance and payments of one class."""
+    yogaclass_id: int = Field(foreign_key="yogaclass.id", primary_key=True)
+    bookings: int = Field(default=0)
+    present: int = Field(default=0)
+    late: int = Field(default=0)
+    absent: int = Field(default=0)
+    payments: int = Field(default=0)
+    revenue: float = Field(default=0.0)  # paid payments only
+
+# <------------------- Unit of work ------------------>
+_current_session: ContextVar[Session | None] = ContextVar(
+    "current_session", default=None
+)
+
+@contextmanager
+def unit_of_work():
+    """Run the enclosed helper calls on one session and one transaction.
+
+    Helpers called inside the block join the shared session instead of
+    opening their own, and their commits become flushes. The transaction is
+    committed once when the outermost block exits, or rolled back if it
+    raises. Nested blocks reuse the outer unit of work.
+    """
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+
+    session = Session(get_engine(), expire_on_commit=False)
+    token = _current_session.set(session)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        _current_session.reset(token)
+        session.close()
+
+@contextmanager
+def dry_run():
+    """Run the enclosed helper calls in a transaction that is always rolled back.
+
+    Like unit_of_work, but nothing the helpers write is ever committed; for
+    inspecting what write helpers do against a real database.
+    """
+    if _current_session.get() is not None:
+        raise RuntimeError("dry_run() cannot be nested in a unit of work")
+    session = Session(get_engine(), expire_on_commit=False)
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+        session.rollback()
+        session.close()
+
+@contextmanager
+def _session_scope():
+    """Session for a helper: the active unit of work or a private one."""
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+    with Session(get_engine()) as session:
+        yield session
+
+def _commit(session: Session):
+    """Commit a helper's changes, or only flush them inside a unit of work."""
+    if session is _current_session.get():
+        session.flush()
+    else:
+        session.commit()
+
+def _invalidate_on_commit(session: Session, group: str):
+    """Drop cached reference data of `group` once `session` really commits."""
+    session.info.setdefault("invalidate", set()).add(group)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_reference_data(session):
+    for group in session.info.pop("invalidate", ()):
+        reference_cache.invalidate(group)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("invalidate", None)
+
 # <------------------- Create tables ------------------>
+# Bump whenever the models, indexes, summaries or search index change, so
+# existing databases run Create_Tables once more on their next start
+SCHEMA_VERSION = 3
+
+class StartupState(NamedTuple):
+    """What the application needs to know about the database before login."""
+    schema_upgraded: bool
+    has_administrator: bool
+    has_centers: bool
+
 def Create_Tables():
     """Create all tables in the database."""
-    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.create_all(get_engine())
+    add_missing_columns()
+    drop_redundant_indexes()
+    created = create_missing_indexes()
+    if "ux_attendance_student_class" in created:
+        # Duplicate attendance was dropped; the summaries still count it
+        rebuild_summaries()
+    else:
+        ensure_summaries()
+    create_search_index()
+    with get_engine().begin() as connection:
+        connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def bootstrap() -> StartupState:
+    """Bring the schema up to date if needed and check the seed data.
+
+    A database stamped with the current SCHEMA_VERSION (PRAGMA user_version)
+    skips Create_Tables entirely; the version and the seed checks then cost
+    a single connection.
+    """
+    seed_check = select(
+        select(User.id).where(User.role == Role.ADMINISTRATOR).exists(),
+        select(Center.id).exists(),
+    )
+    with get_engine().connect() as connection:
+        upgraded = connection.exec_driver_sql("PRAGMA user_version").scalar() != SCHEMA_VERSION
+        if not upgraded:
+            administrator, centers = connection.execute(seed_check).one()
+    if upgraded:
+        Create_Tables()
+        with get_engine().connect() as connection:
+            administrator, centers = connection.execute(seed_check).one()
+    return StartupState(upgraded, bool(administrator), bool(centers))
+
+# Statements that make old data satisfy a unique index before it is added
+INDEX_PREPARATION = {
+    "ux_reserve_active_student_class": [
+        # Release the seats held by duplicate active reservations...
+        """
+        UPDATE yogaclass SET current_capacity = MAX(0, current_capacity - (
+            SELECT COUNT(*) - COUNT(DISTINCT student_id) FROM reserve
+            WHERE reserve.yogaclass_id = yogaclass.id AND reserve.status = 'active'
+        ))
+        """,
+        # ...and keep only the oldest one active
+        """
+        UPDATE reserve SET status = 'cancelled'
+        WHERE status = 'active' AND id NOT IN (
+            SELECT MIN(id) FROM reserve WHERE status = 'active'
+            GROUP BY student_id, yogaclass_id
+        )
+        """,
+    ],
+    "ux_attendance_student_class": [
+        # Keep the oldest record of each (student, class), the one that was being updated
+        """
+        DELETE FROM attendance WHERE id NOT IN (
+            SELECT MIN(id) FROM attendance GROUP BY student_id, yogaclass_id
+        )
+        """,
+    ],
+}
+
+def add_missing_columns() -> list[str]:
+    """Add nullable columns declared on the models that an existing table lacks."""
+    added = []
+    with get_engine().begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {
+                column["name"]
+                for column in connection.exec_driver_sql(
+                    f"PRAGMA table_info('{table.name}')"
+                ).mappings()
+            }
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=connection.dialect)
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    )
+                    added.append(f"{table.name}.{column.name}")
+    return added
+
+# Indexes older databases have whose columns now lead a composite index;
+# they only slow down writes
+REDUNDANT_INDEXES = {
+    "ix_payment_paid_at": "ix_payment_paid_at_cover",
+    "ix_yogaclass_teacher_id": "ix_yogaclass_teacher_scheduled",
+}
+
+def drop_redundant_indexes() -> list[str]:
+    """Drop the REDUNDANT_INDEXES an existing database still has."""
+    dropped = []
+    with get_engine().begin() as connection:
+        existing = {
+            row[0] for row in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        for name in REDUNDANT_INDEXES:
+            if name in existing:
+                connection.exec_driver_sql(f"DROP INDEX {name}")
+                dropped.append(name)
+    return dropped
+
+def create_missing_indexes() -> list[str]:
+    """Add indexes declared on the models that an existing database lacks."""
+    created = []
+    with get_engine().begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {
+                index["name"]
+                for index in connection.exec_driver_sql(
+                    f"PRAGMA index_list('{table.name}')"
+                ).mappings()
+            }
+            for index in table.indexes:
+                if index.name not in existing:
+                    for statement in INDEX_PREPARATION.get(index.name, []):
+                        connection.exec_driver_sql(statement)
+                    index.create(connection)
+                    created.append(index.name)
+        if created:
+            # Refresh planner statistics so the new indexes get picked up
+            connection.exec_driver_sql("PRAGMA optimize")
+    return created
 
 # <------------------- Utils ------------------>
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def hash_password(password: str, rounds: int | None = None) -> str:
+    """Hash a password using bcrypt at the configured (or given) cost."""
+    salt = bcrypt.gensalt(rounds or DB_SETTINGS.bcrypt_rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+def hash_rounds(hashed: str) -> int | None:
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), None if unreadable."""
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed: str) -> bool:
+    """Whether a stored hash was made with a cost other than the configured one."""
+    return hash_rounds(hashed) != DB_SETTINGS.bcrypt_rounds
 
 def check_password(password: str, hashed: str) -> bool:
     """Check if a password matches the hash."""
@@ -176,10 +552,20 @@ def check_password(password: str, hashed: str) -> bool:
         return False
 
 def authenticate(email: str, password: str) -> User | None:
-    """Authenticates a user with the database."""
-    with Session(engine) as session:
+    """Authenticates a user with the database.
+
+    A hash made with another bcrypt cost than the configured one is replaced
+    by a fresh hash of the same password, so changing the cost takes effect
+    as users log in.
+    """
+    with _session_scope() as session:
         user = session.exec(select(User).where(User.email == email)).first()
         if user and check_password(password, user.password_hash) and user.is_active:
+            if needs_rehash(user.password_hash):
+                user.password_hash = hash_password(password)
+                session.add(user)
+                _commit(session)
+                session.refresh(user)
             return user
     return None
 
@@ -187,42 +573,45 @@ def authenticate(email: str, password: str) -> User | None:
 def add_center(name: str, address: str, phone: str) -> Center:
     """Adds a center to the database."""
     center = Center(name=name, address=address, phone=phone)
-    with Session(engine) as session:
+    with _session_scope() as session:
         session.add(center)
-        session.commit()
+        _invalidate_on_commit(session, "centers")
+        _commit(session)
         session.refresh(center)
     return center
 
 def get_all_centers() -> list[Center]:
     """Get all centers."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.exec(select(Center)).all()
 
 def get_center_by_id(center_id: int) -> Center | None:
     """Get a center by ID."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.get(Center, center_id)
 
 def update_center(center_id: int, **kwargs) -> bool:
     """Update a center."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         center = session.get(Center, center_id)
         if center:
             for key, value in kwargs.items():
                 if hasattr(center, key) and value is not None:
                     setattr(center, key, value)
-            session.commit()
+            _invalidate_on_commit(session, "centers")
+            _commit(session)
             session.refresh(center)
             return True
     return False
 
 def delete_center(center_id: int) -> bool:
     """Delete a center."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         center = session.get(Center, center_id)
         if center:
             session.delete(center)
-            session.commit()
+            _invalidate_on_commit(session, "centers")
+            _commit(session)
             return True
     return False
 
@@ -230,7 +619,7 @@ def delete_center(center_id: int) -> bool:
 def assign_user_to_center(user_id: int, center_id: int) -> UserCenter:
     """Assign a user to a center."""
     link = UserCenter(user_id=user_id, center_id=center_id)
-    with Session(engine) as session:
+    with _session_scope() as session:
         existing = session.exec(
             select(UserCenter).where(
                 UserCenter.user_id == user_id,
@@ -240,13 +629,13 @@ def assign_user_to_center(user_id: int, center_id: int) -> UserCenter:
         if existing:
             return existing
         session.add(link)
-        session.commit()
+        _commit(session)
         session.refresh(link)
     return link
 
 def get_user_centers(user_id: int) -> list[Center]:
     """Get all centers for a user."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         user = session.get(User, user_id)
         if not user:
             return []
@@ -268,9 +657,10 @@ def Add_User(
         password_hash=hash_password(password),
         role=role,
     )
-    with Session(engine) as session:
+    with _session_scope() as session:
         session.add(user)
-        session.commit()
+        _invalidate_on_commit(session, "users")
+        _commit(session)
         session.refresh(user)
     return user
 
@@ -284,33 +674,33 @@ def create_teacher_user(name: str, email: str, phone: str | None, password: str)
 
 def user_exists(email: str) -> bool:
     """Check if a user exists by email."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         user = session.exec(select(User).where(User.email == email)).first()
         return user is not None
 
 def get_user_by_email(email: str) -> User | None:
     """Get a user by email."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.exec(select(User).where(User.email == email)).first()
 
 def get_user_by_id(user_id: int) -> User | None:
     """Get a user by ID."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.get(User, user_id)
 
 def get_all_users() -> list[User]:
     """Get all users."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.exec(select(User)).all()
 
 def get_users_by_role(role: Role) -> list[User]:
     """Get users by role."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.exec(select(User).where(User.role == role)).all()
 
 def update_user(user_id: int, **kwargs) -> bool:
     """Update a user."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         user = session.get(User, user_id)
         if user:
             for key, value in kwargs.items():
@@ -318,31 +708,70 @@ def update_user(user_id: int, **kwargs) -> bool:
                     user.password_hash = hash_password(value)
                 elif hasattr(user, key) and value is not None:
                     setattr(user, key, value)
-            session.commit()
+            _invalidate_on_commit(session, "users")
+            _commit(session)
             session.refresh(user)
             return True
     return False
 
 def delete_user(user_id: int) -> bool:
     """Delete a user from the database."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         user = session.get(User, user_id)
         if user:
             session.delete(user)
-            session.commit()
+            _invalidate_on_commit(session, "users")
+            _commit(session)
             return True
     return False
 
 def update_role(user_id: int, role: Role) -> bool:
     """Update user role."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         user = session.get(User, user_id)
         if user:
             user.role = role
-            session.commit()
+            _invalidate_on_commit(session, "users")
+            _commit(session)
             return True
     return False
 
+# <------------------- Reference data ------------------>
+# Centers and users for combo boxes, cached in-process. Writes through the
+# helpers above invalidate the affected group when their transaction commits.
+REFERENCE_CACHE_SECONDS = 300
+REFERENCE_CACHE_SIZE = 32
+reference_cache = TTLCache(REFERENCE_CACHE_SIZE, REFERENCE_CACHE_SECONDS)
+
+class CenterRef(NamedTuple):
+    id: int
+    name: str
+
+class UserRef(NamedTuple):
+    id: int
+    name: str
+    email: str
+    is_active: bool
+
+def get_center_refs() -> tuple[CenterRef, ...]:
+    """All centers as (id, name), from the reference cache."""
+    def load():
+        # A private session: never cache rows of an uncommitted unit of work
+        with Session(get_engine()) as session:
+            rows = session.exec(select(Center.id, Center.name).order_by(Center.id)).all()
+            return tuple(CenterRef(*row) for row in rows)
+    return reference_cache.get_or_load(("centers",), load)
+
+def get_user_refs(role: Role, active_only: bool = False) -> tuple[UserRef, ...]:
+    """Users of a role as (id, name, email, is_active), from the reference cache."""
+    def load():
+        with Session(get_engine()) as session:
+            query = select(User.id, User.name, User.email, User.is_active).where(User.role == role)
+            if active_only:
+                query = query.where(User.is_active == True)
+            return tuple(UserRef(*row) for row in session.exec(query.order_by(User.id)).all())
+    return reference_cache.get_or_load(("users", role, active_only), load)
+
 # <------------------- Class CRUD ------------------>
 def Add_YogaClass(
     scheduled_at: datetime,
@@ -361,15 +790,15 @@ def Add_YogaClass(
         price=price,
         teacher_share_percentage=teacher_share_percentage
     )
-    with Session(engine) as session:
+    with _session_scope() as session:
         session.add(yogaclass)
-        session.commit()
+        _commit(session)
         session.refresh(yogaclass)
     return yogaclass
 
 def get_classes_by_date(date: datetime) -> list[YogaClass]:
     """Get classes by date."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
         end_date = date.replace(hour=23, minute=59, second=59, microsecond=999999)
 
@@ -382,7 +811,7 @@ def get_classes_by_date(date: datetime) -> list[YogaClass]:
 
 def get_classes_by_teacher(teacher_id: int, date: datetime | None = None) -> list[YogaClass]:
     """Get classes by teacher."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         query = select(YogaClass).where(YogaClass.teacher_id == teacher_id)
 
         if date:
@@ -397,35 +826,36 @@ def get_classes_by_teacher(teacher_id: int, date: datetime | None = None) -> lis
 
 def get_class_by_id(class_id: int) -> YogaClass | None:
     """Get a class by ID."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.get(YogaClass, class_id)
 
 def update_class(class_id: int, **kwargs) -> bool:
     """Update a class."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         yogaclass = session.get(YogaClass, class_id)
         if yogaclass:
             for key, value in kwargs.items():
                 if hasattr(yogaclass, key) and value is not None:
                     setattr(yogaclass, key, value)
-            session.commit()
+            _commit(session)
             session.refresh(yogaclass)
             return True
     return False
 
 def delete_class(class_id: int) -> bool:
     """Delete a class."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         yogaclass = session.get(YogaClass, class_id)
         if yogaclass:
+            session.exec(delete(ClassSummary).where(ClassSummary.yogaclass_id == class_id))
             session.delete(yogaclass)
-            session.commit()
+            _commit(session)
             return True
     return False
 
 def get_available_classes_for_date(date: datetime, student_id: int = None) -> list[YogaClass]:
     """Get available classes for a specific date (not full and not already reserved by student)."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
         end_date = date.replace(hour=23, minute=59, second=59, microsecond=999999)
 
@@ -450,7 +880,7 @@ def get_available_classes_for_date(date: datetime, student_id: int = None) -> li
 
 def calculate_teacher_earnings(payment_id: int) -> tuple[float, float]:
     """Calculate teacher and center earnings from a payment."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         payment = session.get(Payment, payment_id)
         if not payment:
             return 0.0, 0.0
@@ -466,7 +896,7 @@ def calculate_teacher_earnings(payment_id: int) -> tuple[float, float]:
 
 def get_student_statistics(student_id: int) -> dict:
     """Get statistics for a student."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         # Total classes attended
         attended = session.exec(
             select(func.count(Attendance.id)).where(
@@ -500,7 +930,7 @@ def get_student_statistics(student_id: int) -> dict:
 
 def get_teacher_statistics(teacher_id: int) -> dict:
     """Get statistics for a teacher."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         # Total classes taught
         total_classes = session.exec(
             select(func.count(YogaClass.id)).where(
@@ -529,52 +959,277 @@ def get_teacher_statistics(teacher_id: int) -> dict:
             "total_earnings": float(earnings) if earnings else 0.0
         }
 
+# <------------------- Class series ------------------>
+# Classes have no end time: a teacher counts as busy for this long after a
+# class starts when checking a series for overlaps
+CLASS_DURATION = timedelta(hours=1)
+# Fields of a series that update_class_series copies to its classes
+SERIES_CLASS_FIELDS = (
+    "max_capacity", "price", "teacher_share_percentage", "teacher_id", "center_id"
+)
+
+def expand_weekly(
+    start_date: date, end_date: date, weekdays, start_time: time
+) -> list[datetime]:
+    """Start times of a weekly pattern between two dates, both included."""
+    weekdays = set(weekdays)
+    occurrences = []
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in weekdays:
+            occurrences.append(datetime.combine(day, start_time))
+        day += timedelta(days=1)
+    return occurrences
+
+def find_teacher_conflicts(
+    teacher_id: int, occurrences: list[datetime], exclude_series_id: int | None = None
+) -> list[datetime]:
+    """Occurrences that overlap a class the teacher already has.
+
+    The teacher's classes over the whole span are read with one range query
+    on (teacher_id, scheduled_at); the overlap test then runs in memory.
+    """
+    if not occurrences:
+        return []
+    occurrences = sorted(occurrences)
+    with _session_scope() as session:
+        query = select(YogaClass.scheduled_at).where(
+            YogaClass.teacher_id == teacher_id,
+            YogaClass.scheduled_at > occurrences[0] - CLASS_DURATION,
+            YogaClass.scheduled_at < occurrences[-1] + CLASS_DURATION,
+        )
+        if exclude_series_id is not None:
+            query = query.where(
+                (YogaClass.series_id == None) | (YogaClass.series_id != exclude_series_id)
+            )
+        busy = sorted(session.exec(query).all())
+
+    conflicts = []
+    for start in occurrences:
+        # First existing class starting after `start - CLASS_DURATION`
+        position = bisect_left(busy, start - CLASS_DURATION + timedelta(microseconds=1))
+        if position < len(busy) and busy[position] < start + CLASS_DURATION:
+            conflicts.append(start)
+    return conflicts
+
+def Add_ClassSeries(
+    weekdays,
+    start_time: time,
+    start_date: date,
+    end_date: date,
+    max_capacity: int,
+    teacher_id: int,
+    center_id: int,
+    price: float = 0.0,
+    teacher_share_percentage: float = 70.0
+) -> ClassSeries | None:
+    """Adds a weekly series and all its classes in one transaction.
+
+    Returns None when the pattern yields no class or when any occurrence
+    overlaps a class the teacher already has (see find_teacher_conflicts).
+    """
+    weekdays = sorted(set(weekdays))
+    occurrences = expand_weekly(start_date, end_date, weekdays, start_time)
+    if not occurrences:
+        return None
+
+    series = ClassSeries(
+        weekdays=",".join(str(day) for day in weekdays),
+        start_time=start_time,
+        start_date=start_date,
+        end_date=end_date,
+        max_capacity=max_capacity,
+        price=price,
+        teacher_share_percentage=teacher_share_percentage,
+        teacher_id=teacher_id,
+        center_id=center_id,
+    )
+    with unit_of_work() as session:
+        if find_teacher_conflicts(teacher_id, occurrences):
+            return None
+        session.add(series)
+        session.flush()
+        session.execute(insert(YogaClass), [
+            {
+                "scheduled_at": scheduled_at,
+                "max_capacity": max_capacity,
+                "current_capacity": 0,
+                "price": price,
+                "teacher_share_percentage": teacher_share_percentage,
+                "teacher_id": teacher_id,
+                "center_id": center_id,
+                "series_id": series.id,
+            }
+            for scheduled_at in occurrences
+        ])
+    return series
+
+def get_series_classes(series_id: int, from_date: datetime | None = None) -> list[YogaClass]:
+    """Classes of a series, in date order, optionally from a date on."""
+    with _session_scope() as session:
+        query = select(YogaClass).where(YogaClass.series_id == series_id)
+        if from_date:
+            query = query.where(YogaClass.scheduled_at >= from_date)
+        return session.exec(query.order_by(YogaClass.scheduled_at)).all()
+
+def update_class_series(
+    series_id: int, from_date: datetime | None = None,
+    start_time: time | None = None, **kwargs
+) -> bool:
+    """Apply changes to a series and its classes from `from_date` (default now).
+
+    Accepts start_time plus the fields in SERIES_CLASS_FIELDS. Returns False,
+    changing nothing, if the series does not exist, if a new capacity is
+    below the seats already booked in one of the classes, or if a new
+    teacher or time would overlap another of the teacher's classes.
+    """
+    changes = {
+        key: value for key, value in kwargs.items()
+        if key in SERIES_CLASS_FIELDS and value is not None
+    }
+    from_date = from_date or datetime.now()
+    with unit_of_work() as session:
+        series = session.get(ClassSeries, series_id)
+        if series is None:
+            return False
+        classes = session.exec(
+            select(YogaClass.id, YogaClass.scheduled_at, YogaClass.current_capacity)
+            .where(YogaClass.series_id == series_id, YogaClass.scheduled_at >= from_date)
+        ).all()
+
+        if "max_capacity" in changes and any(
+            row.current_capacity > changes["max_capacity"] for row in classes
+        ):
+            return False
+
+        times = {
+            row.id: datetime.combine(row.scheduled_at.date(), start_time or row.scheduled_at.time())
+            for row in classes
+        }
+        teacher_id = changes.get("teacher_id", series.teacher_id)
+        if (start_time or teacher_id != series.teacher_id) and find_teacher_conflicts(
+            teacher_id, list(times.values()), exclude_series_id=series_id
+        ):
+            return False
+
+        for key, value in changes.items():
+            setattr(series, key, value)
+        if start_time:
+            series.start_time = start_time
+        session.add(series)
+
+        if classes and changes:
+            session.exec(
+                update(YogaClass)
+                .where(YogaClass.series_id == series_id, YogaClass.scheduled_at >= from_date)
+                .values(**changes)
+            )
+        if classes and start_time:
+            # Bulk UPDATE by primary key: one executemany for the new times
+            session.execute(update(YogaClass), [
+                {"id": class_id, "scheduled_at": new_time}
+                for class_id, new_time in times.items()
+            ])
+    return True
+
+def cancel_class_series(series_id: int, from_date: datetime | None = None) -> tuple[int, int]:
+    """Cancel a series from `from_date` (default now) in one transaction.
+
+    Classes in that range without reservations or payments are deleted;
+    booked ones are kept so their students and payments can be dealt with.
+    Returns (deleted, kept). The series ends the day before `from_date`, or
+    is marked cancelled when none of its classes remain.
+    """
+    from_date = from_date or datetime.now()
+    with unit_of_work() as session:
+        series = session.get(ClassSeries, series_id)
+        if series is None:
+            return 0, 0
+        in_range = (YogaClass.series_id == series_id) & (YogaClass.scheduled_at >= from_date)
+        booked = (
+            select(Reserve.yogaclass_id).where(Reserve.status == "active")
+            .union(select(Payment.yogaclass_id))
+        )
+        kept = session.exec(
+            select(func.count(YogaClass.id)).where(in_range, YogaClass.id.in_(booked))
+        ).one()
+        unbooked = select(YogaClass.id).where(in_range, YogaClass.id.not_in(booked))
+        session.exec(delete(ClassSummary).where(ClassSummary.yogaclass_id.in_(unbooked)))
+        deleted = session.exec(
+            delete(YogaClass).where(in_range, YogaClass.id.not_in(booked))
+        ).rowcount
+
+        remaining = session.exec(
+            select(func.count(YogaClass.id)).where(YogaClass.series_id == series_id)
+        ).one()
+        if remaining == 0:
+            series.status = "cancelled"
+        elif not kept:
+            series.end_date = min(series.end_date, from_date.date() - timedelta(days=1))
+        session.add(series)
+    return deleted, kept
+
 # <------------------- Reservation CRUD ------------------>
 def Add_Reservation(
     student_id: int, yogaclass_id: int
 ) -> Reserve | None:
-    """Adds a reservation to the database."""
-    # Check if class exists and has capacity
-    with Session(engine) as session:
-        yogaclass = session.get(YogaClass, yogaclass_id)
-        if not yogaclass or yogaclass.current_capacity >= yogaclass.max_capacity:
-            return None
-
-        # Check if user already has reservation for this class
-        existing = session.exec(
-            select(Reserve).where(
-                Reserve.student_id == student_id,
-                Reserve.yogaclass_id == yogaclass_id,
-                Reserve.status == "active"
+    """Adds a reservation to the database.
+
+    The seat is claimed with a conditional UPDATE and the reservation is
+    guarded by the partial unique index on active (student, class) pairs, so
+    concurrent bookings can neither oversell a class nor double-book a
+    student. Both statements, and the summary counters, run in one short
+    write transaction, and the seat is handed back in that same transaction
+    when the insert is ignored.
+    """
+    with _session_scope() as session:
+        # Claim a seat; matches no row when the class is full or missing
+        claimed = session.exec(
+            update(YogaClass)
+            .where(
+                YogaClass.id == yogaclass_id,
+                YogaClass.current_capacity < YogaClass.max_capacity,
             )
-        ).first()
-
-        if existing:
+            .values(current_capacity=YogaClass.current_capacity + 1)
+        )
+        if claimed.rowcount == 0:
             return None
 
-        reserve = Reserve(
-            student_id=student_id,
-            yogaclass_id=yogaclass_id,
+        reserved_at = datetime.now(timezone.utc)
+        inserted = session.exec(
+            insert(Reserve)
+            .prefix_with("OR IGNORE")
+            .values(
+                student_id=student_id,
+                yogaclass_id=yogaclass_id,
+                reserved_at=reserved_at,
+                status="active",
+            )
         )
+        if inserted.rowcount == 0:
+            # Student already has an active reservation: give the seat back
+            session.exec(
+                update(YogaClass)
+                .where(YogaClass.id == yogaclass_id)
+                .values(current_capacity=YogaClass.current_capacity - 1)
+            )
+            _commit(session)
+            return None
 
-        # Update class capacity
-        yogaclass.current_capacity += 1
-
-        session.add(reserve)
-        session.commit()
-        session.refresh(reserve)
-        return reserve
+        track_booking(session, yogaclass_id, reserved_at)
+        _commit(session)
+        return session.get(Reserve, inserted.lastrowid)
 
 def get_reservations_by_student(student_id: int) -> list[Reserve]:
     """Get reservations by student."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.exec(
             select(Reserve).where(Reserve.student_id == student_id)
         ).all()
 
 def get_reservations_by_class(class_id: int) -> list[Reserve]:
     """Get reservations by class."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.exec(
             select(Reserve).where(Reserve.yogaclass_id == class_id)
         ).all()
@@ -589,22 +1244,64 @@ def Add_Attendance(
         yogaclass_id=yogaclass_id,
         check_in_time=check_in_time or datetime.now(timezone.utc)
     )
-    with Session(engine) as session:
+    with _session_scope() as session:
         session.add(attendance)
-        session.commit()
+        track_attendance_changes(session, yogaclass_id, [(None, attendance.status)])
+        _commit(session)
         session.refresh(attendance)
     return attendance
 
+def save_class_attendance(yogaclass_id: int, roster, attended_at: datetime | None = None) -> int:
+    """Write the attendance of a whole class with one INSERT ... ON CONFLICT DO UPDATE.
+
+    `roster` is (student_id, status) pairs. A student marked absent without a
+    record gets none; an absence keeps the time of the record it replaces.
+    Returns the number of records written.
+    """
+    attended_at = attended_at or datetime.now()
+    statuses = dict(roster)
+    with _session_scope() as session:
+        # Previous statuses, for the summaries: one query for the whole roster
+        previous = dict(session.exec(
+            select(Attendance.student_id, Attendance.status).where(
+                Attendance.yogaclass_id == yogaclass_id,
+                Attendance.student_id.in_(list(statuses)),
+            )
+        ).all())
+        rows = [
+            {"student_id": student_id, "yogaclass_id": yogaclass_id,
+             "attended_at": attended_at, "status": status}
+            for student_id, status in statuses.items()
+            if status != "absent" or student_id in previous
+        ]
+        if rows:
+            statement = sqlite_insert(Attendance).values(rows)
+            session.exec(statement.on_conflict_do_update(
+                index_elements=["student_id", "yogaclass_id"],
+                set_={
+                    "status": statement.excluded.status,
+                    "attended_at": case(
+                        (statement.excluded.status == "absent", Attendance.attended_at),
+                        else_=statement.excluded.attended_at,
+                    ),
+                },
+            ))
+        track_attendance_changes(session, yogaclass_id, [
+            (previous.get(row["student_id"]), row["status"]) for row in rows
+        ])
+        _commit(session)
+    return len(rows)
+
 def get_attendance_by_class(class_id: int) -> list[Attendance]:
     """Get attendance records for a class."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.exec(
             select(Attendance).where(Attendance.yogaclass_id == class_id)
         ).all()
 
 def get_attendance_by_student(student_id: int, class_id: int) -> Attendance | None:
     """Get attendance record for a student in a class."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         return session.exec(
             select(Attendance).where(
                 Attendance.student_id == student_id,
@@ -623,16 +1320,281 @@ def Add_Payment(
         amount=amount,
         payment_method=payment_method
     )
-    with Session(engine) as session:
+    with _session_scope() as session:
         session.add(payment)
-        session.commit()
+        track_payments(session, [payment.model_dump()])
+        _commit(session)
         session.refresh(payment)
     return payment
 
+# <------------------- Summary maintenance ------------------>
+ATTENDANCE_STATUSES = ("present", "late", "absent")
+
+def _bump(session: Session, model, keys: dict, **deltas):
+    """Add `deltas` to the summary row at `keys`, creating the row if missing."""
+    statement = sqlite_insert(model).values(**keys, **deltas)
+    session.exec(statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: getattr(model, name) + statement.excluded[name] for name in deltas},
+    ))
+
+def _class_places(session: Session, class_ids) -> dict[int, tuple[int, datetime]]:
+    """{class id: (center id, scheduled_at)} for the given classes."""
+    rows = session.exec(
+        select(YogaClass.id, YogaClass.center_id, YogaClass.scheduled_at)
+        .where(YogaClass.id.in_(set(class_ids)))
+    ).all()
+    return {row.id: (row.center_id, row.scheduled_at) for row in rows}
+
+def track_payments(session: Session, payments: list[dict], sign: int = 1):
+    """Count payments (dicts of Payment fields) into the summaries, or out with sign=-1."""
+    places = _class_places(session, (p["yogaclass_id"] for p in payments))
+    daily, per_class = {}, {}
+    for payment in payments:
+        if payment["yogaclass_id"] not in places:
+            continue
+        center_id, _ = places[payment["yogaclass_id"]]
+        key = (center_id, payment["paid_at"].date(), payment["payment_method"], payment["status"])
+        count, amount = daily.get(key, (0, 0.0))
+        daily[key] = (count + sign, amount + sign * payment["amount"])
+        paid = sign * payment["amount"] if payment["status"] == "paid" else 0.0
+        count, revenue = per_class.get(payment["yogaclass_id"], (0, 0.0))
+        per_class[payment["yogaclass_id"]] = (count + sign, revenue + paid)
+
+    for (center_id, day, method, status), (count, amount) in daily.items():
+        _bump(session, DailyRevenueSummary, {
+            "center_id": center_id, "day": day, "payment_method": method, "status": status,
+        }, payments=count, amount=amount)
+    for class_id, (count, revenue) in per_class.items():
+        _bump(session, ClassSummary, {"yogaclass_id": class_id}, payments=count, revenue=revenue)
+
+def track_booking(session: Session, yogaclass_id: int, reserved_at: datetime, sign: int = 1):
+    """Count an active reservation into the summaries, or out with sign=-1."""
+    places = _class_places(session, [yogaclass_id])
+    if yogaclass_id not in places:
+        return
+    center_id, _ = places[yogaclass_id]
+    _bump(session, DailyActivitySummary,
+          {"center_id": center_id, "day": reserved_at.date()}, bookings=sign)
+    _bump(session, ClassSummary, {"yogaclass_id": yogaclass_id}, bookings=sign)
+
+def track_attendance_changes(session: Session, yogaclass_id: int, changes):
+    """Apply (old status, new status) attendance changes of one class to the summaries.
+
+    Use None as the old status of a new record. Attendance counts under the
+    day the class is held.
+    """
+    deltas = dict.fromkeys(ATTENDANCE_STATUSES, 0)
+    for old_status, new_status in changes:
+        if old_status in deltas:
+            deltas[old_status] -= 1
+        if new_status in deltas:
+            deltas[new_status] += 1
+    deltas = {status: delta for status, delta in deltas.items() if delta}
+    places = _class_places(session, [yogaclass_id])
+    if not deltas or yogaclass_id not in places:
+        return
+    center_id, scheduled_at = places[yogaclass_id]
+    _bump(session, DailyActivitySummary,
+          {"center_id": center_id, "day": scheduled_at.date()}, **deltas)
+    _bump(session, ClassSummary, {"yogaclass_id": yogaclass_id}, **deltas)
+
+# Recompute every summary table from the raw rows (see rebuild_summaries)
+SUMMARY_REBUILD = [
+    "DELETE FROM dailyrevenuesummary",
+    "DELETE FROM dailyactivitysummary",
+    "DELETE FROM classsummary",
+    """
+    INSERT INTO dailyrevenuesummary (center_id, day, payment_method, status, payments, amount)
+    SELECT y.center_id, date(p.paid_at), p.payment_method, p.status, COUNT(*), SUM(p.amount)
+    FROM payment p JOIN yogaclass y ON y.id = p.yogaclass_id
+    GROUP BY y.center_id, date(p.paid_at), p.payment_method, p.status
+    """,
+    """
+    INSERT INTO dailyactivitysummary (center_id, day, bookings, present, late, absent)
+    SELECT center_id, day, SUM(bookings), SUM(present), SUM(late), SUM(absent) FROM (
+        SELECT y.center_id, date(r.reserved_at) AS day,
+               1 AS bookings, 0 AS present, 0 AS late, 0 AS absent
+        FROM reserve r JOIN yogaclass y ON y.id = r.yogaclass_id
+        WHERE r.status = 'active'
+        UNION ALL
+        SELECT y.center_id, date(y.scheduled_at), 0,
+               a.status = 'present', a.status = 'late', a.status = 'absent'
+        FROM attendance a JOIN yogaclass y ON y.id = a.yogaclass_id
+    )
+    GROUP BY center_id, day
+    """,
+    """
+    INSERT INTO classsummary (yogaclass_id, bookings, present, late, absent, payments, revenue)
+    SELECT yogaclass_id, SUM(bookings), SUM(present), SUM(late), SUM(absent),
+           SUM(payments), SUM(revenue) FROM (
+        SELECT yogaclass_id, 1 AS bookings, 0 AS present, 0 AS late, 0 AS absent,
+               0 AS payments, 0.0 AS revenue
+        FROM reserve WHERE status = 'active'
+        UNION ALL
+        SELECT yogaclass_id, 0, status = 'present', status = 'late', status = 'absent', 0, 0.0
+        FROM attendance
+        UNION ALL
+        SELECT yogaclass_id, 0, 0, 0, 0, 1, CASE WHEN status = 'paid' THEN amount ELSE 0.0 END
+        FROM payment
+    )
+    WHERE yogaclass_id IN (SELECT id FROM yogaclass)
+    GROUP BY yogaclass_id
+    """,
+]
+
+def rebuild_summaries():
+    """Recompute the summary tables from scratch in one transaction.
+
+    The write helpers keep them current; a rebuild is needed after bulk
+    imports or edits that bypass them, such as moving a class to another
+    center or day.
+    """
+    with get_engine().begin() as connection:
+        for statement in SUMMARY_REBUILD:
+            connection.exec_driver_sql(statement)
+
+def ensure_summaries() -> bool:
+    """Fill the summary tables of a database that has data but no summaries yet."""
+    with get_engine().connect() as connection:
+        empty = connection.exec_driver_sql(
+            "SELECT NOT EXISTS (SELECT 1 FROM classsummary) AND ("
+            "EXISTS (SELECT 1 FROM payment) OR EXISTS (SELECT 1 FROM reserve)"
+            " OR EXISTS (SELECT 1 FROM attendance))"
+        ).scalar()
+    if empty:
+        rebuild_summaries()
+    return bool(empty)
+
+# <------------------- Full-text search ------------------>
+# One FTS5 table indexes users, centers and classes. Its rowid encodes the
+# entity: id * 4 + kind code, so triggers can update and delete by rowid.
+SEARCH_KINDS = {"user": 1, "center": 2, "class": 3}
+SEARCH_KIND_NAMES = {code: kind for kind, code in SEARCH_KINDS.items()}
+# bm25 weight of the name column relative to the detail column
+SEARCH_NAME_WEIGHT = 5.0
+
+search_index = table("search_index", column("rowid"), column("name"), column("detail"))
+
+_USER_DOC = """new.name, new.email || ' ' || coalesce(new.phone, '')"""
+_CENTER_DOC = """new.name, new.address || ' ' || new.phone"""
+_CLASS_DOC = """'Clase ' || new.id, strftime('%Y-%m-%d %H:%M', new.scheduled_at)"""
+
+def _search_triggers(table_name: str, kind: str, document: str, columns: str) -> list[str]:
+    code = SEARCH_KINDS[kind]
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS search_{kind}_insert AFTER INSERT ON "{table_name}" BEGIN
+            INSERT INTO search_index (rowid, name, detail) VALUES (new.id * 4 + {code}, {document});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS search_{kind}_update AFTER UPDATE OF {columns} ON "{table_name}" BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 4 + {code};
+            INSERT INTO search_index (rowid, name, detail) VALUES (new.id * 4 + {code}, {document});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS search_{kind}_delete AFTER DELETE ON "{table_name}" BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 4 + {code};
+        END
+        """,
+    ]
+
+SEARCH_INDEX_DDL = [
+    # Prefix indexes make 2- and 3-character prefix queries cheap
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        name, detail, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    *_search_triggers("user", "user", _USER_DOC, "id, name, email, phone"),
+    *_search_triggers("center", "center", _CENTER_DOC, "id, name, address, phone"),
+    *_search_triggers("yogaclass", "class", _CLASS_DOC, "id, scheduled_at"),
+]
+
+# Index the rows of a database created before the search index existed
+SEARCH_INDEX_FILL = [
+    f"INSERT INTO search_index (rowid, name, detail) SELECT id * 4 + {SEARCH_KINDS[kind]}, "
+    + document.replace("new.", "") + f' FROM "{table_name}"'
+    for table_name, kind, document in (
+        ("user", "user", _USER_DOC),
+        ("center", "center", _CENTER_DOC),
+        ("yogaclass", "class", _CLASS_DOC),
+    )
+]
+
+class SearchHit(NamedTuple):
+    kind: str  # user, center or class
+    id: int
+    name: str
+    detail: str
+    rank: float  # bm25: lower is better
+
+def create_search_index() -> bool:
+    """Create the FTS5 index and its triggers; fill it if it is new."""
+    with get_engine().begin() as connection:
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'search_index'"
+        ).first()
+        for statement in SEARCH_INDEX_DDL:
+            connection.exec_driver_sql(statement)
+        if not exists:
+            for statement in SEARCH_INDEX_FILL:
+                connection.exec_driver_sql(statement)
+    return not exists
+
+def fts_query(text: str) -> str | None:
+    """FTS5 query matching every word of `text` as a prefix, None if it has none.
+
+    Words are quoted, so user input can never inject FTS5 syntax.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return " AND ".join(f'"{word}"*' for word in words)
+
+def search_ids_query(text: str, kind: str):
+    """Select of the ids of `kind` entities whose index entry matches `text`."""
+    query = fts_query(text)
+    entity_id = search_index.c.rowid.op(">>")(2)
+    statement = select(entity_id).select_from(search_index).where(
+        search_index.c.rowid.op("&")(3) == SEARCH_KINDS[kind]
+    )
+    if query is None:
+        return statement.where(false())
+    return statement.where(literal_column("search_index").op("MATCH")(query))
+
+def search(text: str, kinds=None, limit: int = 20) -> list[SearchHit]:
+    """Best matches for `text` among users, centers and classes, best first.
+
+    Every word is matched as a prefix ("ana ma" finds "Ana María"). `kinds`
+    restricts the result to some of SEARCH_KINDS.
+    """
+    query = fts_query(text)
+    if query is None:
+        return []
+    rank = func.bm25(literal_column("search_index"), SEARCH_NAME_WEIGHT, 1.0)
+    statement = (
+        select(search_index.c.rowid, search_index.c.name, search_index.c.detail, rank)
+        .select_from(search_index)
+        .where(literal_column("search_index").op("MATCH")(query))
+    )
+    if kinds:
+        statement = statement.where(
+            search_index.c.rowid.op("&")(3).in_([SEARCH_KINDS[kind] for kind in kinds])
+        )
+    with _session_scope() as session:
+        rows = session.exec(statement.order_by(rank).limit(limit)).all()
+    return [
+        SearchHit(SEARCH_KIND_NAMES[rowid & 3], rowid >> 2, name, detail, score)
+        for rowid, name, detail, score in rows
+    ]
+
 # <------------------- Helper Functions ------------------>
 def has_administrator() -> bool:
     """Check if there is at least one administrator."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         admin = session.exec(
             select(User).where(User.role == Role.ADMINISTRATOR)
         ).first()
@@ -640,7 +1602,7 @@ def has_administrator() -> bool:
 
 def has_centers() -> bool:
     """Check if there is at least one center."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         center = session.exec(select(Center)).first()
         return center is not None
 
@@ -656,23 +1618,22 @@ def assign_user_to_default_center(user_id: int) -> bool:
         return result is not None
     return False
 
+def search_users_query(search_term: str):
+    """Select statement matching users by name, email or phone (prefix match)."""
+    return select(User).where(User.id.in_(search_ids_query(search_term, "user")))
+
 def search_users(search_term: str) -> list[User]:
-    """Search users by name or email."""
-    with Session(engine) as session:
-        return session.exec(
-            select(User).where(
-                (User.name.contains(search_term)) |
-                (User.email.contains(search_term))
-            )
-        ).all()
+    """Search users by name, email or phone."""
+    with _session_scope() as session:
+        return session.exec(search_users_query(search_term)).all()
 
 def get_session():
     """Retorna una nueva sesión de base de datos"""
-    return Session(engine)
+    return Session(get_engine())
 
 def get_payments_by_teacher(teacher_id: int, start_date: datetime = None, end_date: datetime = None) -> list[Payment]:
     """Get payments for classes taught by a teacher."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         query = select(Payment).join(YogaClass).where(YogaClass.teacher_id == teacher_id)
 
         if start_date and end_date:
@@ -685,7 +1646,7 @@ def get_payments_by_teacher(teacher_id: int, start_date: datetime = None, end_da
 
 def get_total_earnings_by_teacher(teacher_id: int) -> float:
     """Get total earnings for a teacher."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         result = session.exec(
             select(func.sum(Payment.amount * YogaClass.teacher_share_percentage / 100))
             .join(YogaClass, Payment.yogaclass_id == YogaClass.id)
@@ -695,7 +1656,7 @@ def get_total_earnings_by_teacher(teacher_id: int) -> float:
 
 def get_all_payments(start_date: datetime = None, end_date: datetime = None) -> list[Payment]:
     """Get all payments with filters."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         query = select(Payment)
 
         if start_date and end_date:
@@ -708,10 +1669,89 @@ def get_all_payments(start_date: datetime = None, end_date: datetime = None) ->
 
 def update_payment_status(payment_id: int, status: str) -> bool:
     """Update payment status."""
-    with Session(engine) as session:
+    with _session_scope() as session:
         payment = session.get(Payment, payment_id)
         if payment:
-            payment.status = status
-            session.commit()
+            if payment.status != status:
+                track_payments(session, [payment.model_dump()], sign=-1)
+                payment.status = status
+                track_payments(session, [payment.model_dump()])
+            _commit(session)
             return True
     return False
+
+# <------------------- Paginated listings ------------------>
+# Keyset-paginated counterparts of the get_all_* helpers. Pass the cursor of
+# a returned Page (next_cursor / prev_cursor) to move forwards or backwards.
+def get_payments_page(
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    status: str | None = None,
+) -> Page:
+    """Get a page of payments, newest first, keyed on (paid_at, id)."""
+    query = select(Payment)
+    if start_date and end_date:
+        query = query.where(Payment.paid_at >= start_date, Payment.paid_at <= end_date)
+    if status:
+        query = query.where(Payment.status == status)
+    with _session_scope() as session:
+        return paginate(
+            session, query, [(Payment.paid_at, True), (Payment.id, True)],
+            page_size, cursor
+        )
+
+def get_users_page(
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    role: Role | None = None,
+    is_active: bool | None = None,
+) -> Page:
+    """Get a page of users in registration order, keyed on (created_at, id)."""
+    query = select(User)
+    if role is not None:
+        query = query.where(User.role == role)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    with _session_scope() as session:
+        return paginate(
+            session, query, [(User.created_at, False), (User.id, False)],
+            page_size, cursor
+        )
+
+def get_classes_page(
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    center_id: int | None = None,
+    teacher_id: int | None = None,
+) -> Page:
+    """Get a page of classes, latest first, keyed on (scheduled_at, id)."""
+    query = select(YogaClass)
+    if center_id is not None:
+        query = query.where(YogaClass.center_id == center_id)
+    if teacher_id is not None:
+        query = query.where(YogaClass.teacher_id == teacher_id)
+    with _session_scope() as session:
+        return paginate(
+            session, query, [(YogaClass.scheduled_at, True), (YogaClass.id, True)],
+            page_size, cursor
+        )
+
+def get_attendance_page(
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    class_id: int | None = None,
+    student_id: int | None = None,
+) -> Page:
+    """Get a page of attendance records, newest first, keyed on (attended_at, id)."""
+    query = select(Attendance)
+    if class_id is not None:
+        query = query.where(Attendance.yogaclass_id == class_id)
+    if student_id is not None:
+        query = query.where(Attendance.student_id == student_id)
+    with _session_scope() as session:
+        return paginate(
+            session, query, [(Attendance.attended_at, True), (Attendance.id, True)],
+            page_size, cursor
+        )
@@ -0,0 +1,209 @@
+"""
+Streaming export of report data to CSV or JSON Lines.
+
+Each export is one SELECT that already joins in the names a reader needs.
+It runs with a streaming cursor and ``yield_per``, so rows reach the file in
+chunks of ``chunk_size`` and memory stays flat however long the period is.
+The file is written under a ``.part`` name and renamed when complete, so an
+interrupted or cancelled export never leaves a truncated file behind.
+"""
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+
+from database.cancellation import check_cancelled
+from database.db import Attendance, Center, Payment, User, YogaClass, get_session, select
+
+EXPORT_CHUNK_SIZE = 1000
+FORMATS = ("csv", "jsonl")
+
+
+@dataclass
+class ExportReport:
+    """Outcome of one export."""
+    kind: str
+    path: Path
+    rows: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return f"{self.kind}: {self.rows} rows written to {self.path} in {self.seconds:.2f}s"
+
+
+# <------------------- Queries ------------------>
+def _with_filters(query, fact, date_column, start_date, end_date, center_id, status):
+    if start_date:
+        query = query.where(date_column >= start_date)
+    if end_date:
+        query = query.where(date_column <= end_date)
+    if center_id:
+        query = query.where(YogaClass.center_id == center_id)
+    if status:
+        query = query.where(fact.status == status)
+    return query
+
+
+def payments_export(start_date=None, end_date=None, center_id=None, status=None):
+    """Payments with student, class, teacher and center, newest first."""
+    student, teacher = aliased(User), aliased(User)
+    query = (
+        select(
+            Payment.paid_at.label("paid_at"),
+            Payment.id.label("payment_id"),
+            student.name.label("student"),
+            Payment.yogaclass_id.label("class_id"),
+            teacher.name.label("teacher"),
+            Payment.amount.label("amount"),
+            Payment.payment_method.label("payment_method"),
+            Payment.status.label("status"),
+            Center.name.label("center"),
+        )
+        .select_from(Payment)
+        .outerjoin(student, student.id == Payment.student_id)
+        .outerjoin(YogaClass, YogaClass.id == Payment.yogaclass_id)
+        .outerjoin(teacher, teacher.id == YogaClass.teacher_id)
+        .outerjoin(Center, Center.id == YogaClass.center_id)
+        .order_by(Payment.paid_at.desc(), Payment.id.desc())
+    )
+    return _with_filters(
+        query, Payment, Payment.paid_at, start_date, end_date, center_id, status
+    )
+
+
+def attendance_export(start_date=None, end_date=None, center_id=None, status=None):
+    """Attendance records with student, class and teacher, newest first."""
+    student, teacher = aliased(User), aliased(User)
+    query = (
+        select(
+            Attendance.attended_at.label("attended_at"),
+            Attendance.id.label("attendance_id"),
+            student.name.label("student"),
+            Attendance.yogaclass_id.label("class_id"),
+            teacher.name.label("teacher"),
+            Attendance.status.label("status"),
+        )
+        .select_from(Attendance)
+        .outerjoin(student, student.id == Attendance.student_id)
+        .outerjoin(YogaClass, YogaClass.id == Attendance.yogaclass_id)
+        .outerjoin(teacher, teacher.id == YogaClass.teacher_id)
+        .order_by(Attendance.attended_at.desc(), Attendance.id.desc())
+    )
+    return _with_filters(
+        query, Attendance, Attendance.attended_at, start_date, end_date, center_id, status
+    )
+
+
+EXPORTS = {
+    "payments": payments_export,
+    "attendance": attendance_export,
+}
+
+
+# <------------------- Streaming ------------------>
+def count_rows(statement) -> int:
+    """Number of rows `statement` returns (ORDER BY dropped)."""
+    session = get_session()
+    try:
+        return session.exec(
+            select(func.count()).select_from(statement.order_by(None).subquery())
+        ).one()
+    finally:
+        session.close()
+
+
+def iter_chunks(statement, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield the rows of `statement` in lists of at most `chunk_size`."""
+    session = get_session()
+    try:
+        result = session.execute(
+            statement.execution_options(stream_results=True, yield_per=chunk_size)
+        )
+        for rows in result.partitions():
+            check_cancelled()
+            yield rows
+    finally:
+        session.close()
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _write_csv(file, keys, chunks):
+    writer = csv.writer(file)
+    writer.writerow(keys)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield len(rows)
+
+
+def _write_jsonl(file, keys, chunks):
+    for rows in chunks:
+        file.writelines(
+            json.dumps(dict(zip(keys, row)), default=_json_value, ensure_ascii=False) + "\n"
+            for row in rows
+        )
+        yield len(rows)
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl}
+
+
+def export_format(path) -> str:
+    """Format implied by the file extension (csv unless .jsonl/.json)."""
+    return "jsonl" if Path(path).suffix.lower() in (".jsonl", ".json") else "csv"
+
+
+def export_query(statement, path, fmt: str = None, chunk_size: int = EXPORT_CHUNK_SIZE,
+                 progress=None, kind: str = "export") -> ExportReport:
+    """Stream the rows of `statement` into `path` as CSV or JSON Lines.
+
+    `progress(written, total)` is called after every chunk. Raises on error
+    (including cancellation) without leaving a partial file at `path`.
+    """
+    path = Path(path)
+    fmt = fmt or export_format(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    report = ExportReport(kind, path)
+    started = time.perf_counter()
+    total = count_rows(statement) if progress else 0
+    if progress:
+        progress(0, total)
+
+    partial = path.with_name(path.name + ".part")
+    try:
+        with open(partial, "w", newline="", encoding="utf-8") as file:
+            keys = list(statement.selected_columns.keys())
+            chunks = iter_chunks(statement, chunk_size)
+            for written in WRITERS[fmt](file, keys, chunks):
+                report.rows += written
+                if progress:
+                    progress(report.rows, max(total, report.rows))
+        os.replace(partial, path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def export_data(kind: str, path, fmt: str = None, chunk_size: int = EXPORT_CHUNK_SIZE,
+                progress=None, **filters) -> ExportReport:
+    """Export one of EXPORTS with the report filters (start_date, end_date, center_id, status)."""
+    if kind not in EXPORTS:
+        raise ValueError(f"Unknown export: {kind}")
+    return export_query(
+        EXPORTS[kind](**filters), path, fmt, chunk_size, progress=progress, kind=kind
+    )
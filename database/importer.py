@@ -0,0 +1,503 @@
+"""
+Bulk import of users, classes and historical payments.
+
+Records come from a CSV file (with a header row) or a JSONL file (one JSON
+object per line). They are processed in chunks of ``chunk_size`` rows: each
+chunk is validated with a handful of set-based lookups, user passwords are
+hashed across a process pool, and the valid rows go in with one executemany
+inside their own transaction. Invalid rows are skipped and listed in the
+returned ImportReport with their line number, so one bad row never aborts the
+rest of the file.
+"""
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from database.db import (
+    Center, Payment, Role, User, UserCenter, YogaClass,
+    get_session, hash_password, reference_cache, select, track_payments,
+)
+from database.loader import IN_CHUNK_SIZE
+
+IMPORT_CHUNK_SIZE = 1000
+# Fewer passwords than this in a chunk are hashed in-process: starting
+# workers would cost more than it saves
+POOL_THRESHOLD = 32
+
+PAYMENT_STATUSES = {"paid", "pending", "refunded"}
+TRUE_VALUES = {"1", "true", "yes", "si", "sí"}
+FALSE_VALUES = {"0", "false", "no"}
+
+
+@dataclass
+class RowError:
+    """A rejected input row."""
+    line: int
+    message: str
+
+
+@dataclass
+class ImportReport:
+    """Outcome of one import: counts, timings and the rejected rows."""
+    kind: str
+    total: int = 0
+    imported: int = 0
+    errors: list[RowError] = field(default_factory=list)
+    seconds: float = 0.0
+    hash_seconds: float = 0.0
+
+    @property
+    def rejected(self) -> int:
+        return len(self.errors)
+
+    def error(self, line: int, message: str):
+        self.errors.append(RowError(line, message))
+
+    def summary(self) -> str:
+        return (
+            f"{self.kind}: {self.imported} of {self.total} rows imported, "
+            f"{self.rejected} rejected in {self.seconds:.2f}s"
+        )
+
+    def write_errors(self, path):
+        """Write the rejected rows as a CSV error report (line, error)."""
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["line", "error"])
+            writer.writerows((error.line, error.message) for error in self.errors)
+
+
+# <------------------- Reading ------------------>
+def _clean(record: dict) -> dict:
+    """Lower-case keys, strip strings and turn empty values into None."""
+    cleaned = {}
+    for key, value in record.items():
+        if key is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip() or None
+        cleaned[key.strip().lower()] = value
+    return cleaned
+
+
+def read_rows(path):
+    """Yield (line, record) pairs from a .csv or .jsonl/.json file.
+
+    `record` is a dict, or a ValueError for a line that could not be parsed.
+    """
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, _clean(record)
+            return
+        for line, text in enumerate(file, 1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except json.JSONDecodeError as error:
+                yield line, ValueError(f"invalid JSON: {error.msg}")
+                continue
+            if not isinstance(record, dict):
+                yield line, ValueError("expected a JSON object")
+                continue
+            yield line, _clean(record)
+
+
+def _chunks(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# <------------------- Field parsing ------------------>
+def _text(record, name, max_length, required=True):
+    value = record.get(name)
+    if value is None:
+        if required:
+            raise ValueError(f"missing {name}")
+        return None
+    value = str(value).strip()
+    if len(value) > max_length:
+        raise ValueError(f"{name} longer than {max_length} characters")
+    return value
+
+
+def _number(record, name, cast, default=None, minimum=None, maximum=None):
+    value = record.get(name)
+    if value is None:
+        if default is None:
+            raise ValueError(f"missing {name}")
+        return default
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid {name}: {record[name]!r}")
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise ValueError(f"{name} out of range: {value}")
+    return value
+
+
+def _datetime(record, name, default=None):
+    value = record.get(name)
+    if value is None:
+        if default is None:
+            raise ValueError(f"missing {name}")
+        return default
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"invalid {name}: {value!r} (expected ISO 8601)")
+
+
+def _bool(record, name, default):
+    value = record.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid {name}: {value!r}")
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _lookup(session, columns, key, values) -> list:
+    """Rows of `columns` whose `key` is in `values`, chunked below SQLite's limit."""
+    values = list({v for v in values if v is not None})
+    rows = []
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        chunk = values[start:start + IN_CHUNK_SIZE]
+        rows.extend(session.exec(select(*columns).where(key.in_(chunk))).all())
+    return rows
+
+
+class _UserRefs:
+    """Users referenced by a chunk, by id or by email, with their roles."""
+
+    def __init__(self, session, records, id_field, email_field):
+        ids = [_int_or_none(r.get(id_field)) for r in records]
+        emails = [r.get(email_field) for r in records]
+        rows = _lookup(session, (User.id, User.email, User.role), User.id, ids)
+        rows += _lookup(session, (User.id, User.email, User.role), User.email, emails)
+        self.roles = {row.id: row.role for row in rows}
+        self.ids_by_email = {row.email: row.id for row in rows}
+        self.id_field = id_field
+        self.email_field = email_field
+
+    def resolve(self, record, role=None) -> int:
+        """Id of the user a record points to; raise ValueError if unusable."""
+        if record.get(self.id_field) is not None:
+            user_id = _number(record, self.id_field, int)
+            if user_id not in self.roles:
+                raise ValueError(f"unknown {self.id_field}: {user_id}")
+        elif record.get(self.email_field) is not None:
+            user_id = self.ids_by_email.get(record[self.email_field])
+            if user_id is None:
+                raise ValueError(f"unknown {self.email_field}: {record[self.email_field]}")
+        else:
+            raise ValueError(f"missing {self.id_field} or {self.email_field}")
+        if role is not None and self.roles[user_id] != role:
+            raise ValueError(f"user {user_id} is not a {role.value}")
+        return user_id
+
+
+# <------------------- Writing ------------------>
+def _insert(model, rows, report, after=None) -> int:
+    """Insert (line, values) pairs in one transaction; return how many went in.
+
+    `after(session, rows, ids)` runs in the same transaction with the new
+    primary keys, in row order. If the chunk violates a constraint (e.g. a
+    concurrent insert of the same email), it is retried row by row so that
+    only the offending rows are rejected.
+    """
+    if not rows:
+        return 0
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    session = get_session()
+    try:
+        try:
+            ids = session.scalars(statement, [values for _, values in rows]).all()
+            if after:
+                after(session, rows, ids)
+            session.commit()
+            return len(rows)
+        except IntegrityError:
+            session.rollback()
+        if len(rows) == 1:
+            report.error(rows[0][0], "rejected by the database (duplicate or invalid reference)")
+            return 0
+    finally:
+        session.close()
+    return sum(_insert(model, [row], report, after) for row in rows)
+
+
+class _Hasher:
+    """bcrypt over a lazily started process pool."""
+
+    def __init__(self, workers):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+
+    def hash_all(self, passwords: list[str]) -> list[str]:
+        if len(passwords) < POOL_THRESHOLD or self.workers == 1:
+            return [hash_password(password) for password in passwords]
+        if self.pool is None:
+            # spawn: forking a process that runs Qt or pool threads is unsafe
+            self.pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self.pool.map(hash_password, passwords, chunksize=chunksize))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def _run(kind, path, chunk_size, import_chunk) -> ImportReport:
+    """Drive `import_chunk(records, report)` over the file, chunk by chunk."""
+    report = ImportReport(kind)
+    started = time.perf_counter()
+    for chunk in _chunks(read_rows(path), chunk_size):
+        report.total += len(chunk)
+        records = []
+        for line, record in chunk:
+            if isinstance(record, Exception):
+                report.error(line, str(record))
+            else:
+                records.append((line, record))
+        if records:
+            report.imported += import_chunk(records, report)
+    report.errors.sort(key=lambda error: error.line)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+# <------------------- Importers ------------------>
+def import_users(path, default_role: Role = Role.STUDENT, workers: int | None = None,
+                 chunk_size: int = IMPORT_CHUNK_SIZE) -> ImportReport:
+    """Import users from CSV/JSONL.
+
+    Columns: name, email, password (or an existing bcrypt password_hash),
+    and optionally phone, role (defaults to `default_role`), is_active and
+    center_id, which links the user to that center. Emails already in the
+    database or repeated in the file are rejected.
+    """
+    hasher = _Hasher(workers)
+    seen_emails = set()
+    session = get_session()
+    try:
+        center_ids = set(session.exec(select(Center.id)).all())
+    finally:
+        session.close()
+
+    def import_chunk(records, report):
+        session = get_session()
+        try:
+            existing = {
+                email for email in _lookup(
+                    session, (User.email,), User.email, (r.get("email") for _, r in records)
+                )
+            }
+        finally:
+            session.close()
+
+        valid, passwords, links = [], [], {}
+        for line, record in records:
+            try:
+                email = _text(record, "email", 120)
+                if "@" not in email:
+                    raise ValueError(f"invalid email: {email}")
+                if email in existing or email in seen_emails:
+                    raise ValueError(f"email already exists: {email}")
+                role = str(record.get("role") or default_role.value).upper()
+                if role not in Role.__members__:
+                    raise ValueError(f"unknown role: {record['role']}")
+                center_id = None
+                if record.get("center_id") is not None:
+                    center_id = _number(record, "center_id", int)
+                    if center_id not in center_ids:
+                        raise ValueError(f"unknown center_id: {center_id}")
+                password_hash = record.get("password_hash")
+                if password_hash is not None:
+                    if not str(password_hash).startswith("$2"):
+                        raise ValueError("password_hash is not a bcrypt hash")
+                    password = None
+                else:
+                    password = _text(record, "password", 250)
+                values = {
+                    "name": _text(record, "name", 100),
+                    "email": email,
+                    "phone": _text(record, "phone", 20, required=False),
+                    "password_hash": password_hash,
+                    "role": Role(role),
+                    "is_active": _bool(record, "is_active", True),
+                    "created_at": datetime.now(timezone.utc),
+                }
+            except ValueError as error:
+                report.error(line, str(error))
+                continue
+            seen_emails.add(email)
+            if password is not None:
+                passwords.append((len(valid), password))
+            if center_id is not None:
+                links[email] = center_id
+            valid.append((line, values))
+
+        started = time.perf_counter()
+        hashes = hasher.hash_all([password for _, password in passwords])
+        for (index, _), password_hash in zip(passwords, hashes):
+            valid[index][1]["password_hash"] = password_hash
+        report.hash_seconds += time.perf_counter() - started
+
+        def link_centers(session, rows, ids):
+            pairs = [
+                {"user_id": user_id, "center_id": links[values["email"]]}
+                for (_, values), user_id in zip(rows, ids)
+                if values["email"] in links
+            ]
+            if pairs:
+                session.execute(insert(UserCenter), pairs)
+
+        return _insert(User, valid, report, after=link_centers)
+
+    try:
+        return _run("users", path, chunk_size, import_chunk)
+    finally:
+        hasher.close()
+        reference_cache.invalidate("users")
+
+
+def import_classes(path, chunk_size: int = IMPORT_CHUNK_SIZE) -> ImportReport:
+    """Import classes from CSV/JSONL.
+
+    Columns: scheduled_at (ISO 8601), max_capacity, center_id, teacher_id or
+    teacher_email, and optionally price (default 0) and
+    teacher_share_percentage (default 70).
+    """
+    session = get_session()
+    try:
+        center_ids = set(session.exec(select(Center.id)).all())
+    finally:
+        session.close()
+
+    def import_chunk(records, report):
+        session = get_session()
+        try:
+            teachers = _UserRefs(session, [r for _, r in records], "teacher_id", "teacher_email")
+        finally:
+            session.close()
+
+        valid = []
+        for line, record in records:
+            try:
+                center_id = _number(record, "center_id", int)
+                if center_id not in center_ids:
+                    raise ValueError(f"unknown center_id: {center_id}")
+                values = {
+                    "scheduled_at": _datetime(record, "scheduled_at"),
+                    "max_capacity": _number(record, "max_capacity", int, minimum=1),
+                    "current_capacity": 0,
+                    "price": _number(record, "price", float, default=0.0, minimum=0),
+                    "teacher_share_percentage": _number(
+                        record, "teacher_share_percentage", float,
+                        default=70.0, minimum=0, maximum=100
+                    ),
+                    "teacher_id": teachers.resolve(record, Role.TEACHER),
+                    "center_id": center_id,
+                }
+            except ValueError as error:
+                report.error(line, str(error))
+                continue
+            valid.append((line, values))
+        return _insert(YogaClass, valid, report)
+
+    return _run("classes", path, chunk_size, import_chunk)
+
+
+def import_payments(path, chunk_size: int = IMPORT_CHUNK_SIZE) -> ImportReport:
+    """Import historical payments from CSV/JSONL.
+
+    Columns: student_id or student_email, yogaclass_id (or class_id),
+    amount, and optionally paid_at (default now), payment_method (default
+    cash) and status (paid, pending or refunded; default paid). Historical
+    payments are recorded as-is: no reservation is created and class
+    capacity is left untouched.
+    """
+    def import_chunk(records, report):
+        for _, record in records:
+            if record.get("yogaclass_id") is None and record.get("class_id") is not None:
+                record["yogaclass_id"] = record["class_id"]
+
+        session = get_session()
+        try:
+            students = _UserRefs(session, [r for _, r in records], "student_id", "student_email")
+            class_ids = set(_lookup(
+                session, (YogaClass.id,), YogaClass.id,
+                (_int_or_none(r.get("yogaclass_id")) for _, r in records)
+            ))
+        finally:
+            session.close()
+
+        valid = []
+        now = datetime.now(timezone.utc)
+        for line, record in records:
+            try:
+                class_id = _number(record, "yogaclass_id", int)
+                if class_id not in class_ids:
+                    raise ValueError(f"unknown yogaclass_id: {class_id}")
+                status = str(record.get("status") or "paid").lower()
+                if status not in PAYMENT_STATUSES:
+                    raise ValueError(f"invalid status: {record['status']}")
+                values = {
+                    "student_id": students.resolve(record),
+                    "yogaclass_id": class_id,
+                    "amount": _number(record, "amount", float, minimum=0),
+                    "paid_at": _datetime(record, "paid_at", default=now),
+                    "payment_method": _text(record, "payment_method", 50, required=False) or "cash",
+                    "status": status,
+                }
+            except ValueError as error:
+                report.error(line, str(error))
+                continue
+            valid.append((line, values))
+
+        def count_into_summaries(session, rows, ids):
+            track_payments(session, [values for _, values in rows])
+
+        return _insert(Payment, valid, report, after=count_into_summaries)
+
+    return _run("payments", path, chunk_size, import_chunk)
+
+
+IMPORTERS = {
+    "users": import_users,
+    "classes": import_classes,
+    "payments": import_payments,
+}
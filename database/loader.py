@@ -0,0 +1,66 @@
+"""
+Request-scoped batch loading of rows by primary key.
+"""
+from collections import defaultdict
+
+from sqlmodel import Session, select
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+
+class BatchLoader:
+    """Resolve many by-id lookups with one ``IN (...)`` query per model.
+
+    Widgets register the ids they are about to render, call ``resolve()``
+    once and then look rows up with ``get()``. Loaded rows live in the
+    session's identity map, so repeated lookups never reach the database, and
+    ids that do not exist are remembered so they are not queried again.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._pending = defaultdict(set)
+        self._loaded = defaultdict(dict)
+
+    def register(self, model, ids) -> "BatchLoader":
+        """Queue ids of `model` to be fetched on the next resolve()."""
+        known = self._loaded[model]
+        self._pending[model].update(
+            id_ for id_ in ids if id_ is not None and id_ not in known
+        )
+        return self
+
+    def resolve(self) -> "BatchLoader":
+        """Fetch every queued id, one query per model and chunk."""
+        for model, ids in self._pending.items():
+            known = self._loaded[model]
+            ids = list(ids)
+            for start in range(0, len(ids), IN_CHUNK_SIZE):
+                chunk = ids[start:start + IN_CHUNK_SIZE]
+                for row in self.session.exec(select(model).where(model.id.in_(chunk))):
+                    known[row.id] = row
+            for id_ in ids:
+                known.setdefault(id_, None)
+        self._pending.clear()
+        return self
+
+    def load(self, model, ids) -> dict:
+        """Register and resolve `ids` of `model`; return {id: row or None}."""
+        ids = [id_ for id_ in ids if id_ is not None]
+        self.register(model, ids).resolve()
+        known = self._loaded[model]
+        return {id_: known[id_] for id_ in ids}
+
+    def get(self, model, id_):
+        """Row of `model` with primary key `id_`, or None.
+
+        Ids that were never registered are fetched on demand, so a missed
+        register() costs a query instead of a wrong answer.
+        """
+        if id_ is None:
+            return None
+        known = self._loaded[model]
+        if id_ not in known:
+            self.register(model, [id_]).resolve()
+        return known[id_]
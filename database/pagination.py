@@ -0,0 +1,172 @@
+"""
+Keyset (seek) pagination over SQLModel selects.
+
+A page is located by the sort key of the row just before it (or just after
+it, when paging backwards) instead of an OFFSET, so every page costs the same
+index seek however deep the user has scrolled.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import and_, func, or_
+from sqlmodel import Session, select
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Filtered totals are counted up to this many rows, then reported as a floor
+COUNT_CAP = 10000
+
+
+@dataclass
+class Page:
+    """One page of rows plus the cursors to reach its neighbours."""
+    rows: list
+    next_cursor: str | None
+    prev_cursor: str | None
+    total_estimate: int
+    total_is_exact: bool
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def _signature(order_by) -> str:
+    return ",".join(str(column) for column in order_by)
+
+
+def encode_cursor(direction: str, key: tuple, order_by) -> str:
+    """Opaque cursor for the row with sort key `key`."""
+    payload = {
+        "dir": direction,
+        "key": [_encode_value(v) for v in key],
+        "sig": _signature(order_by),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by) -> tuple[str, tuple]:
+    """Return (direction, key) from a cursor; reject cursors of another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        direction, key, sig = payload["dir"], payload["key"], payload["sig"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+    if direction not in ("next", "prev") or len(key) != len(order_by):
+        raise ValueError("Invalid pagination cursor")
+    if sig != _signature(order_by):
+        raise ValueError("Cursor belongs to a different sort order")
+    return direction, tuple(_decode_value(v) for v in key)
+
+
+def _seek(order_by, key, forward: bool):
+    """WHERE clause selecting rows strictly after `key` in (col1, col2, ...) order.
+
+    Written as the expanded OR-chain rather than a row-value comparison so
+    that every column can carry its own direction. The redundant inclusive
+    bound on the leading column lets SQLite range-search its index instead
+    of scanning it.
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(order_by):
+        after = column < key[i] if descending == forward else column > key[i]
+        equal = [order_by[j][0] == key[j] for j in range(i)]
+        clauses.append(and_(*equal, after))
+    leading, descending = order_by[0]
+    bound = leading <= key[0] if descending == forward else leading >= key[0]
+    return and_(bound, or_(*clauses))
+
+
+def estimate_total(session: Session, query, id_column) -> tuple[int, bool]:
+    """Cheap row count for `query`: (estimate, is_exact).
+
+    Unfiltered tables use MAX(id), an index lookup that overcounts only by
+    deleted rows. Filtered queries are counted up to COUNT_CAP rows.
+    """
+    if query.whereclause is None:
+        total = session.exec(select(func.max(id_column))).one()
+        return total or 0, False
+    capped = query.order_by(None).limit(COUNT_CAP).subquery()
+    total = session.exec(select(func.count()).select_from(capped)).one()
+    return total, total < COUNT_CAP
+
+
+def paginate(
+    session: Session,
+    query,
+    order_by: list[tuple[Any, bool]],
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    with_total: bool = True,
+) -> Page:
+    """Fetch one keyset page of `query`.
+
+    `order_by` is a list of (column, descending) pairs of non-null model
+    attributes ending in a unique one (normally the primary key), so that
+    the order is total. `query` selects the entity those attributes belong
+    to; each row's sort key is read back from the loaded object.
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    columns = [column for column, _ in order_by]
+
+    direction, key = ("next", None)
+    if cursor:
+        direction, key = decode_cursor(cursor, columns)
+    forward = direction == "next"
+
+    base = query
+    if key is not None:
+        query = query.where(_seek(order_by, key, forward))
+    ordering = [
+        column.desc() if descending == forward else column.asc()
+        for column, descending in order_by
+    ]
+    query = query.order_by(*ordering).limit(page_size + 1)
+
+    rows = session.exec(query).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not forward:
+        rows.reverse()
+
+    keys = [tuple(getattr(row, column.key) for column in columns) for row in rows]
+
+    has_next = has_more if forward else True
+    has_prev = key is not None if forward else has_more
+    next_cursor = prev_cursor = None
+    if keys and has_next:
+        next_cursor = encode_cursor("next", keys[-1], columns)
+    if keys and has_prev:
+        prev_cursor = encode_cursor("prev", keys[0], columns)
+
+    total, exact = (0, True)
+    if with_total:
+        total, exact = estimate_total(session, base, columns[-1])
+    return Page(rows, next_cursor, prev_cursor, total, exact)
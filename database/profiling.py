@@ -0,0 +1,236 @@
+"""
+Opt-in profiling of the SQL statements each screen and helper issues.
+
+With ``YOGA_PROFILE_QUERIES`` set (``1``, or a ``.json`` path to dump the
+results to at exit) every engine made by database.db.build_engine gets
+``before/after_cursor_execute`` listeners. Each statement is reduced to its
+shape (parameters are already ``?``; IN lists and VALUES tuples collapse)
+and charged to an action:
+
+* the nearest frame of a screen (``ui.*``), such as
+  ``ui.payments_widget.PaymentsWidget.load_payments``;
+* else the name given with ``profile_action()``, which ui.task_runner sets
+  for every task (worker threads running model code have no screen frame);
+* else the nearest frame of other code outside the database and service
+  layers (scripts, benchmarks).
+
+The outermost database/service function on the way, e.g.
+``database.db.get_student_statistics``, is recorded as the helper.
+
+Per (action, shape) the profiler keeps the count, total time, a p95 over the
+last samples and the highest number of executions within one invocation of
+the action. A shape repeated ``N_PLUS_ONE_THRESHOLD`` times or more in one
+invocation, typically a lookup by id inside a loop over rows, is flagged as
+an N+1 pattern.
+"""
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from sqlalchemy import event
+
+ENV_VAR = "YOGA_PROFILE_QUERIES"
+# Same shape this many times in one invocation of an action = N+1
+N_PLUS_ONE_THRESHOLD = 5
+# A pause this long (seconds) between an action's statements starts a new invocation
+INVOCATION_GAP = 0.1
+# Durations kept per shape for the p95
+SAMPLES_KEPT = 1000
+# Modules that are never the action: the data layers and libraries under them
+SKIPPED_MODULES = (
+    "sqlalchemy", "sqlmodel", "database", "services", "models", "contextlib",
+    "threading", "ui.task_runner", "concurrent", "importlib",
+)
+HELPER_MODULES = ("database.", "services.")
+
+_action = ContextVar("profile_action", default=None)
+_PARAMETERS = re.compile(r"\?(?:, \?)+")
+_TUPLES = re.compile(r"\(\?\.\.\.\)(?:, \(\?\.\.\.\))+")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """`statement` with whitespace, parameter lists and VALUES tuples collapsed."""
+    shape = _SPACES.sub(" ", statement).strip()
+    shape = _PARAMETERS.sub("?...", shape)
+    return _TUPLES.sub("(?...), ...", shape)
+
+
+def _qualname(frame) -> str:
+    code = frame.f_code
+    return getattr(code, "co_qualname", code.co_name)
+
+
+@contextmanager
+def profile_action(name: str):
+    """Charge statements in the block to `name` when no application frame names them."""
+    reset = _action.set((name, object()))
+    try:
+        yield
+    finally:
+        _action.reset(reset)
+
+
+class _ShapeStats:
+    __slots__ = ("helper", "count", "total", "samples", "max_per_invocation",
+                 "invocation", "in_invocation")
+
+    def __init__(self, helper):
+        self.helper = helper
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=SAMPLES_KEPT)
+        self.max_per_invocation = 0
+        self.invocation = None
+        self.in_invocation = 0
+
+    def add(self, seconds, invocation):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+        if invocation != self.invocation:
+            self.invocation = invocation
+            self.in_invocation = 0
+        self.in_invocation += 1
+        self.max_per_invocation = max(self.max_per_invocation, self.in_invocation)
+
+    def p95(self) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+
+
+class QueryProfiler:
+    """Collects per-action statement statistics from the engines it is installed on."""
+
+    def __init__(self, enabled: bool = False, dump_path: str | None = None):
+        self.enabled = enabled
+        self.dump_path = dump_path
+        self._lock = threading.Lock()
+        self._stats = {}  # (action, shape) -> _ShapeStats
+        # (thread, action) -> (invocation key, time of the last statement)
+        self._invocations = {}
+        self.started_at = datetime.now()
+
+    @classmethod
+    def from_env(cls) -> "QueryProfiler":
+        value = os.environ.get(ENV_VAR, "").strip()
+        enabled = value.lower() not in ("", "0", "false", "no")
+        return cls(enabled, value if value.lower().endswith(".json") else None)
+
+    def install(self, engine):
+        """Listen to `engine`'s cursor executions."""
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._invocations.clear()
+            self.started_at = datetime.now()
+
+    # <------------------- Collection ------------------>
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["profile_started"].pop()
+        now = time.perf_counter()
+        action, helper, invocation = self._caller()
+        shape = statement_shape(statement)
+
+        with self._lock:
+            # A frame address can be reused by the next call of the same
+            # function; a pause between statements also ends the invocation
+            thread_action = (threading.get_ident(), action)
+            previous = self._invocations.get(thread_action)
+            if previous and previous[0][0] == invocation and now - previous[1] < INVOCATION_GAP:
+                invocation_key = previous[0]
+            else:
+                invocation_key = (invocation, now)
+            self._invocations[thread_action] = (invocation_key, now)
+
+            stats = self._stats.get((action, shape))
+            if stats is None:
+                stats = self._stats[(action, shape)] = _ShapeStats(helper)
+            stats.add(now - started, invocation_key)
+
+    def _caller(self):
+        """(action, helper, invocation id) of the statement being executed."""
+        helper = fallback = None
+        frame = sys._getframe(2)
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "")
+            if module.startswith(HELPER_MODULES):
+                # Walking outwards: the last one seen is what the caller called
+                helper = f"{module}.{_qualname(frame)}"
+            elif not module.startswith(SKIPPED_MODULES):
+                if module.startswith("ui."):
+                    return f"{module}.{_qualname(frame)}", helper, id(frame)
+                if fallback is None:
+                    fallback = (f"{module}.{_qualname(frame)}", id(frame))
+            frame = frame.f_back
+        explicit = _action.get()
+        if explicit is not None:
+            return explicit[0], helper, id(explicit[1])
+        if fallback is not None:
+            return fallback[0], helper, fallback[1]
+        return helper or threading.current_thread().name, helper, None
+
+    # <------------------- Results ------------------>
+    def report(self) -> list[dict]:
+        """Actions with their statement shapes, slowest action first."""
+        actions = {}
+        with self._lock:
+            items = [
+                (key, stats.helper, stats.count, stats.total, stats.p95(), stats.max_per_invocation)
+                for key, stats in self._stats.items()
+            ]
+        for (action, shape), helper, count, total, p95, max_per_invocation in items:
+            entry = actions.setdefault(action, {"action": action, "count": 0, "total_ms": 0.0,
+                                                "n_plus_one": 0, "queries": []})
+            n_plus_one = max_per_invocation >= N_PLUS_ONE_THRESHOLD
+            entry["count"] += count
+            entry["total_ms"] += total * 1000
+            entry["n_plus_one"] += n_plus_one
+            entry["queries"].append({
+                "shape": shape,
+                "helper": helper,
+                "count": count,
+                "total_ms": total * 1000,
+                "p95_ms": p95 * 1000,
+                "max_per_invocation": max_per_invocation,
+                "n_plus_one": n_plus_one,
+            })
+        for entry in actions.values():
+            entry["queries"].sort(key=lambda query: query["total_ms"], reverse=True)
+        return sorted(actions.values(), key=lambda entry: entry["total_ms"], reverse=True)
+
+    def n_plus_one(self) -> list[tuple[str, dict]]:
+        """(action, query) for every shape flagged as N+1."""
+        return [
+            (entry["action"], query)
+            for entry in self.report() for query in entry["queries"] if query["n_plus_one"]
+        ]
+
+    def dump(self, path):
+        """Write the report as JSON."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "dumped_at": datetime.now().isoformat(timespec="seconds"),
+                "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+                "actions": self.report(),
+            }, file, indent=2, ensure_ascii=False)
+
+
+profiler = QueryProfiler.from_env()
+if profiler.dump_path:
+    atexit.register(lambda: profiler.dump(profiler.dump_path))
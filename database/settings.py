@@ -0,0 +1,113 @@
+"""
+Connection settings for the SQLite database.
+
+Values are read, in order of precedence, from ``YOGA_DB_*`` environment
+variables, from a JSON settings file and from the defaults below. The settings
+file defaults to ``data/db_settings.json`` and can be moved with
+``YOGA_DB_SETTINGS``.
+"""
+import json
+import os
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+
+SETTINGS_PATH = Path(__file__).parent.parent / "data" / "db_settings.json"
+ENV_PREFIX = "YOGA_DB_"
+
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SYNCHRONOUS_LEVELS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+TEMP_STORES = {"DEFAULT", "FILE", "MEMORY"}
+# Range accepted by bcrypt.gensalt()
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 31
+
+
+@dataclass(frozen=True)
+class Settings:
+    """PRAGMA profile applied to every new SQLite connection.
+
+    Also carries the bcrypt cost used when hashing stored passwords.
+    """
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -65536  # negative = KiB, i.e. 64 MiB
+    mmap_size: int = 268435456  # 256 MiB
+    temp_store: str = "MEMORY"
+    busy_timeout: int = 5000  # ms
+    # bcrypt work factor for new password hashes (2**rounds iterations)
+    bcrypt_rounds: int = 12
+
+    @classmethod
+    def sqlite_defaults(cls) -> "Settings":
+        """Profile matching a stock pysqlite connection (rollback journal)."""
+        return cls(
+            journal_mode="DELETE",
+            synchronous="FULL",
+            cache_size=-2000,
+            mmap_size=0,
+            temp_store="DEFAULT",
+            busy_timeout=5000,  # sqlite3.connect() default timeout
+        )
+
+    def validated(self) -> "Settings":
+        """Normalize values and reject anything SQLite would not accept."""
+        journal_mode = self.journal_mode.upper()
+        synchronous = self.synchronous.upper()
+        temp_store = self.temp_store.upper()
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"Invalid journal_mode: {self.journal_mode}")
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Invalid synchronous level: {self.synchronous}")
+        if temp_store not in TEMP_STORES:
+            raise ValueError(f"Invalid temp_store: {self.temp_store}")
+        if not BCRYPT_MIN_ROUNDS <= int(self.bcrypt_rounds) <= BCRYPT_MAX_ROUNDS:
+            raise ValueError(f"Invalid bcrypt_rounds: {self.bcrypt_rounds}")
+        return replace(
+            self,
+            journal_mode=journal_mode,
+            synchronous=synchronous,
+            temp_store=temp_store,
+            cache_size=int(self.cache_size),
+            mmap_size=max(0, int(self.mmap_size)),
+            busy_timeout=max(0, int(self.busy_timeout)),
+            bcrypt_rounds=int(self.bcrypt_rounds),
+        )
+
+    def pragmas(self) -> list[tuple[str, str | int]]:
+        """PRAGMA statements (name, value) in the order they must run."""
+        return [
+            ("busy_timeout", self.busy_timeout),
+            ("journal_mode", self.journal_mode),
+            ("synchronous", self.synchronous),
+            ("cache_size", self.cache_size),
+            ("mmap_size", self.mmap_size),
+            ("temp_store", self.temp_store),
+        ]
+
+
+def _coerce(name: str, value):
+    """Convert a raw file/env value to the type of the matching field."""
+    default = getattr(Settings, name)
+    if isinstance(default, int):
+        return int(value)
+    return str(value)
+
+
+def load_settings(path: Path | None = None) -> Settings:
+    """Load settings from the settings file and environment."""
+    path = Path(os.environ.get(f"{ENV_PREFIX}SETTINGS", path or SETTINGS_PATH))
+    values = {}
+
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for field in fields(Settings):
+            if field.name in data:
+                values[field.name] = _coerce(field.name, data[field.name])
+
+    for field in fields(Settings):
+        env_value = os.environ.get(f"{ENV_PREFIX}{field.name.upper()}")
+        if env_value is not None:
+            values[field.name] = _coerce(field.name, env_value)
+
+    return Settings(**values).validated()
@@ -1,33 +1,74 @@
 """main"""
 
+import time
+
+STARTED = time.perf_counter()
+
+import os
 import sys
 from pathlib import Path
 
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QApplication
 
 from database.db import (
     Add_User,
-    Create_Tables,
     Role,
-    has_administrator,
-    has_centers,
+    bootstrap,
+    unit_of_work,
 )
-from ui.login_dialog import LoginDialog
-from ui.main_window import MainWindow
+
+
+# Con YOGA_STARTUP_TIMING=1 se imprimen los tiempos del arranque
+STARTUP_TIMING_ENV = "YOGA_STARTUP_TIMING"
+
+
+class StartupTimer:
+    """Tiempos de las fases del arranque, medidos desde el inicio del proceso."""
+
+    enabled = os.environ.get(STARTUP_TIMING_ENV, "").strip().lower() not in (
+        "", "0", "false", "no"
+    )
+
+    def __init__(self, started: float):
+        self.started = started
+        self.last = started
+        self.phases = []
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self, title: str):
+        if not self.enabled:
+            return
+        total = (self.last - self.started) * 1000
+        print(f"{title}: {total:.0f} ms")
+        for phase, elapsed in self.phases:
+            print(f"  {phase:<26} {elapsed:>7.0f} ms")
+        self.phases = []
 
 
 class YogaManagerApp(QApplication):
     def __init__(self, argv: list[str]):
+        self.timer = StartupTimer(STARTED)
+        self.timer.mark("importaciones")
         super().__init__(argv)
+        self.timer.mark("QApplication")
 
-        # Crear tablas si no existen
-        Create_Tables()
+        # Esquema al día (se omite si la versión coincide) y datos iniciales
+        self.state = bootstrap()
+        self.timer.mark(
+            "base de datos (migrada)" if self.state.schema_upgraded else "base de datos"
+        )
 
         # Crear administrador por defecto si no existe
         self.create_default_admin()
 
         # Verificar que hay centros
         self.check_centers()
+        self.timer.mark("datos iniciales")
 
         # Configurar aplicación
         self.setApplicationName("Sistema de Gestión de Centros de Yoga")
@@ -35,43 +76,70 @@ class YogaManagerApp(QApplication):
 
         # Cargar estilos
         self.load_styles()
+        self.timer.mark("estilos")
+
+        # Mostrar login (las pantallas se importan sólo cuando hacen falta)
+        from ui.login_dialog import LoginDialog
 
-        # Mostrar login
         self.login_dialog = LoginDialog()
+        self.timer.mark("diálogo de login")
+        # Salta dentro del bucle del diálogo, una vez pintado
+        QTimer.singleShot(0, self.report_login_shown)
         if self.login_dialog.exec():
             self.user = self.login_dialog.user
+            self.timer = StartupTimer(time.perf_counter())
+            from ui.main_window import MainWindow
+
+            self.timer.mark("importaciones")
             self.main_window = MainWindow(self.user)
+            self.timer.mark("ventana principal")
             self.main_window.show()
+            # El temporizador salta cuando la ventana ya se ha pintado
+            QTimer.singleShot(0, self.report_window_shown)
         else:
             sys.exit(0)
 
+    def report_login_shown(self):
+        """Registrar el tiempo desde el inicio hasta el diálogo de login visible"""
+        self.timer.mark("pintado")
+        self.timer.report("Login visible")
+
+    def report_window_shown(self):
+        """Registrar el tiempo desde el login hasta la ventana principal visible"""
+        self.timer.mark("pintado")
+        self.timer.report("Ventana principal lista desde el login")
+
     def create_default_admin(self):
         """Crear administrador por defecto si no existe"""
-        if not has_administrator():
+        if not self.state.has_administrator:
             try:
-                _ = Add_User(
-                    name="Administrador",
-                    email="admin@yogacenter.com",
-                    phone="123456789",
-                    password="admin123",
-                    role=Role.ADMINISTRATOR,
-                )
-                print("Administrador creado: admin@yogacenter.com / admin123")
-
-                # Crear un centro por defecto
                 from database.db import add_center
-                default_center = add_center(
-                    name="Centro Principal",
-                    address="Calle Principal 123",
-                    phone="123-456-7890"
-                )
+
+                # Administrador y centro por defecto en una sola transacción
+                with unit_of_work():
+                    _ = Add_User(
+                        name="Administrador",
+                        email="admin@yogacenter.com",
+                        phone="123456789",
+                        password="admin123",
+                        role=Role.ADMINISTRATOR,
+                    )
+
+                    # Crear un centro por defecto
+                    default_center = add_center(
+                        name="Centro Principal",
+                        address="Calle Principal 123",
+                        phone="123-456-7890"
+                    )
+                self.state = self.state._replace(has_administrator=True, has_centers=True)
+                print("Administrador creado: admin@yogacenter.com / admin123")
                 print(f"Centro por defecto creado: {default_center.name}")
 
             except Exception as e:
                 print(f"No se pudo crear administrador o centro: {e}")
     def check_centers(self):
         """Verificar que hay al menos un centro creado"""
-        if not has_centers():
+        if not self.state.has_centers:
             print(
                 "⚠️  No hay centros creados. Crea al menos un centro desde la interfaz de administración."
             )
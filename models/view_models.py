@@ -1,5 +1,14 @@
-from PyQt6.QtCore import QAbstractTableModel, Qt, QModelIndex
-from typing import Any
+import re
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from PyQt6.QtCore import QAbstractTableModel, QSortFilterProxyModel, Qt, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QHeaderView
+from typing import Any, Callable, NamedTuple
+from database.db import get_session
+from database.loader import BatchLoader
+from database.pagination import paginate
 
 class UserTableModel(QAbstractTableModel):
     def __init__(self, users=None):
@@ -38,3 +47,389 @@ class UserTableModel(QAbstractTableModel):
         if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
             return self.headers[section]
         return None
+
+
+@dataclass(frozen=True)
+class Column:
+    """One column of a SqlTableModel.
+
+    `value(row, loader)` returns the display text for an ORM row; `loader` is
+    a BatchLoader already primed by the model's `prefetch` hook. `sort` is
+    the model attribute ordered on the database side when the header is
+    clicked (None = not sortable; it must be non-null for keyset paging).
+    """
+    header: str
+    value: Callable[[Any, BatchLoader], str]
+    sort: Any = None
+    align: Qt.AlignmentFlag | None = None
+    color: Callable[[Any], str | None] | None = None
+
+
+class SqlTableModel(QAbstractTableModel):
+    """Lazy table model over an SQLModel select.
+
+    Rows arrive in windows of `window_size` through canFetchMore/fetchMore,
+    each window a keyset page (see database.pagination). Only the display
+    text of a row is kept, and at most `max_windows` windows stay cached;
+    scrolling back to an evicted window re-reads it from the cursor it was
+    first fetched with.
+
+    Given a `runner` (ui.task_runner.TaskRunner), refresh() and fetchMore()
+    read their window in the thread pool and insert the rows when it arrives;
+    a newer query or sort supersedes a load still in flight. Re-reading an
+    evicted window stays synchronous: it is a single indexed page.
+    """
+
+    # Emitted with the exception when a background load fails
+    loadFailed = pyqtSignal(object)
+
+    def __init__(self, columns, id_column, query=None, order_by=None,
+                 prefetch=None, window_size=100, max_windows=20, runner=None):
+        super().__init__()
+        self.columns = list(columns)
+        self.id_column = id_column
+        self.query = query
+        self.default_order = list(order_by or [(id_column, False)])
+        self.order_by = self.default_order
+        self.prefetch = prefetch
+        self.window_size = window_size
+        self.max_windows = max_windows
+        self.total_estimate = 0
+        self.total_is_exact = True
+        self.runner = runner
+        self._task_key = f"{type(self).__name__}-{id(self)}"
+        if runner is not None:
+            runner.taskCancelled.connect(self._load_cancelled)
+        self._reset_state()
+
+    def _reset_state(self):
+        self._row_count = 0
+        self._window_cursors = []
+        self._windows = OrderedDict()
+        self._next_cursor = None
+        self._loading = False
+
+    # <------------------- Loading ------------------>
+    def _ordering(self):
+        """Current ORDER BY plus the id tiebreaker that makes it total."""
+        order = list(self.order_by)
+        if order[-1][0] is not self.id_column:
+            order.append((self.id_column, order[-1][1]))
+        return order
+
+    def _fetch(self, query, ordering, cursor, with_total=False):
+        """Read one window; return (page, records).
+
+        Takes the query and ordering as arguments so that it can run in a
+        worker thread while the GUI thread changes them.
+        """
+        session = get_session()
+        try:
+            page = paginate(
+                session, query, ordering, self.window_size,
+                cursor, with_total=with_total
+            )
+            loader = BatchLoader(session)
+            if self.prefetch:
+                self.prefetch(loader, page.rows)
+                loader.resolve()
+            records = [self._record(row, loader) for row in page.rows]
+        finally:
+            session.close()
+        return page, records
+
+    def _record(self, row, loader):
+        texts = tuple(column.value(row, loader) for column in self.columns)
+        colors = tuple(
+            column.color(row) if column.color else None for column in self.columns
+        )
+        return getattr(row, self.id_column.key), texts, colors
+
+    def _store(self, window, records):
+        self._windows[window] = records
+        self._windows.move_to_end(window)
+        while len(self._windows) > self.max_windows:
+            self._windows.popitem(last=False)
+
+    def _window(self, window):
+        records = self._windows.get(window)
+        if records is None:
+            _, records = self._fetch(
+                self.query, self._ordering(), self._window_cursors[window]
+            )
+            self._store(window, records)
+        else:
+            self._windows.move_to_end(window)
+        return records
+
+    def _record_at(self, row):
+        records = self._window(row // self.window_size)
+        offset = row % self.window_size
+        return records[offset] if offset < len(records) else None
+
+    def set_query(self, query):
+        """Replace the underlying select (e.g. new filters) and reload."""
+        self.query = query
+        self.refresh()
+
+    def refresh(self):
+        """Drop every cached window and load the first one again."""
+        self.beginResetModel()
+        self._reset_state()
+        if self.runner is not None:
+            self.total_estimate, self.total_is_exact = 0, True
+            self.endResetModel()
+            if self.query is not None:
+                self._load(None)
+            return
+        if self.query is not None:
+            page, records = self._fetch(self.query, self._ordering(), None, with_total=True)
+            self.total_estimate = page.total_estimate
+            self.total_is_exact = page.total_is_exact
+            self._window_cursors.append(None)
+            self._store(0, records)
+            self._row_count = len(records)
+            self._next_cursor = page.next_cursor
+        else:
+            self.total_estimate, self.total_is_exact = 0, True
+        self.endResetModel()
+
+    def _load(self, cursor):
+        """Fetch the window after `cursor` in the runner's thread pool."""
+        self._loading = True
+        self.runner.submit(
+            self._task_key, self._fetch,
+            self.query, self._ordering(), cursor, cursor is None,
+            on_result=lambda result: self._append(cursor, *result),
+            on_error=self._load_failed,
+        )
+
+    def _load_failed(self, error):
+        self._loading = False
+        self.loadFailed.emit(error)
+
+    def _load_cancelled(self, key):
+        if key == self._task_key:
+            self._loading = False
+
+    def _append(self, cursor, page, records):
+        """Insert a freshly read window after the rows already loaded."""
+        self._loading = False
+        if cursor is None:
+            self.total_estimate = page.total_estimate
+            self.total_is_exact = page.total_is_exact
+        if not records:
+            self._next_cursor = None
+            return
+        window = len(self._window_cursors)
+        self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(records) - 1)
+        self._window_cursors.append(cursor)
+        self._store(window, records)
+        self._row_count += len(records)
+        self._next_cursor = page.next_cursor
+        self.endInsertRows()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._next_cursor is not None and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        cursor = self._next_cursor
+        if self.runner is not None:
+            self._load(cursor)
+        else:
+            self._append(cursor, *self._fetch(self.query, self._ordering(), cursor))
+
+    def iter_records(self):
+        """Yield the display text of every row, page by page, in view order."""
+        query, ordering = self.query, self._ordering()
+        cursor = None
+        while True:
+            page, records = self._fetch(query, ordering, cursor)
+            for _, texts, _ in records:
+                yield texts
+            if not page.next_cursor:
+                return
+            cursor = page.next_cursor
+
+    def row_id(self, row):
+        """Primary key of the row at `row`, or None."""
+        record = self._record_at(row) if 0 <= row < self._row_count else None
+        return record[0] if record else None
+
+    # <------------------- Qt model interface ------------------>
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        record = self._record_at(index.row())
+        if record is None:
+            return None
+        row_id, texts, colors = record
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return texts[column]
+        if role == Qt.ItemDataRole.ForegroundRole and colors[column]:
+            return QColor(colors[column])
+        if role == Qt.ItemDataRole.TextAlignmentRole and self.columns[column].align:
+            return self.columns[column].align
+        if role == Qt.ItemDataRole.UserRole:
+            return row_id
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.columns[section].header
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Re-query with ORDER BY on the column's sort attribute."""
+        if 0 <= column < len(self.columns) and self.columns[column].sort is not None:
+            descending = order == Qt.SortOrder.DescendingOrder
+            self.order_by = [(self.columns[column].sort, descending)]
+        else:
+            self.order_by = self.default_order
+        self.refresh()
+
+
+def attach_table_view(view, model):
+    """Wire a QTableView to a SqlTableModel with database-side sorting."""
+    view.setModel(model)
+    # No initial indicator: keep the model's default order until a click
+    view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+    view.setSortingEnabled(True)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    return view
+
+
+# <------------------- In-memory user list ------------------>
+USER_LIST_HEADERS = ["ID", "Nombre", "Email", "Teléfono", "Rol", "Estado", "Acciones"]
+# Role holding the value the proxy sorts by (numbers and dates, not their text)
+SORT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+def fold_text(text: str) -> str:
+    """Lower-case `text` without accents, as the FTS5 index tokenizes it."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def search_words(text: str) -> list[str]:
+    """Words of a search box input, folded like the indexed text."""
+    return re.findall(r"\w+", fold_text(text))
+
+
+class UserRecord(NamedTuple):
+    """Plain copy of a user row, safe to build in a worker thread."""
+    id: int
+    name: str
+    email: str
+    phone: str
+    role: str
+    is_active: bool
+    created_at: Any
+    # Folded words of name, email and phone, for prefix matching
+    words: tuple[str, ...]
+
+    @classmethod
+    def from_user(cls, user):
+        phone = user.phone or ""
+        return cls(
+            user.id, user.name, user.email, phone, user.role.value, user.is_active,
+            user.created_at, tuple(search_words(f"{user.name} {user.email} {phone}")),
+        )
+
+
+class UserListModel(QAbstractTableModel):
+    """Users held in memory as UserRecord tuples, replaced all at once."""
+
+    def __init__(self, records=None):
+        super().__init__()
+        self.records = list(records or [])
+
+    def set_records(self, records):
+        self.beginResetModel()
+        self.records = list(records)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(USER_LIST_HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        record = self.records[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return (
+                str(record.id), record.name, record.email, record.phone, record.role,
+                "Activo" if record.is_active else "Inactivo", "",
+            )[column]
+        if role == Qt.ItemDataRole.ForegroundRole and column == 5:
+            return QColor("green" if record.is_active else "red")
+        if role == Qt.ItemDataRole.UserRole:
+            return record.id
+        if role == SORT_ROLE:
+            return (
+                record.id, record.name.lower(), record.email.lower(), record.phone,
+                record.role, record.is_active, record.created_at,
+            )[column]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return USER_LIST_HEADERS[section]
+        return None
+
+
+class UserFilterProxyModel(QSortFilterProxyModel):
+    """Client-side search and role/status filters over a UserListModel.
+
+    A row matches the search text when every word of it is a prefix of a
+    word of the user's name, email or phone, the same rule the FTS5 index
+    applies, so narrowing in memory and querying the database agree.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.words = []
+        self.roles = None  # None = every role
+        self.statuses = None  # None = active and inactive; else a set of is_active values
+        self.setSortRole(SORT_ROLE)
+
+    def set_text(self, text: str):
+        words = search_words(text)
+        if words != self.words:
+            self.words = words
+            self.invalidateFilter()
+
+    def set_roles(self, roles):
+        self.roles = set(roles) if roles is not None else None
+        self.invalidateFilter()
+
+    def set_statuses(self, statuses):
+        self.statuses = set(statuses) if statuses is not None else None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        record = self.sourceModel().records[source_row]
+        if self.roles is not None and record.role not in self.roles:
+            return False
+        if self.statuses is not None and record.is_active not in self.statuses:
+            return False
+        return all(
+            any(word.startswith(prefix) for word in record.words) for prefix in self.words
+        )
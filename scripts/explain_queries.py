@@ -0,0 +1,105 @@
+"""
+Dump ``EXPLAIN QUERY PLAN`` for the statements issued by the database helpers.
+
+Each helper is called with sample arguments while the SQL it sends is
+captured; the plan of every captured SELECT, UPDATE, INSERT and DELETE is
+then printed. By default the helpers run against a fresh schema in a
+temporary file; pass ``--database`` to inspect an existing one. That
+database is never migrated, and every helper runs in a transaction that is
+rolled back (database.db.dry_run), so write helpers leave it untouched.
+
+Usage: python -m scripts.explain_queries [--database data/database.db]
+"""
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import event
+
+import database.db as db
+
+EXPLAINED = ("SELECT", "UPDATE", "INSERT", "DELETE")
+
+
+def helper_calls():
+    """(label, callable) pairs covering the hot helpers in database.db."""
+    now = datetime.now()
+    month_ago = now - timedelta(days=30)
+    return [
+        ("authenticate", lambda: db.authenticate("nobody@example.com", "x")),
+        ("get_users_by_role", lambda: db.get_users_by_role(db.Role.TEACHER)),
+        ("has_administrator", db.has_administrator),
+        ("get_classes_by_date", lambda: db.get_classes_by_date(now)),
+        ("get_classes_by_teacher", lambda: db.get_classes_by_teacher(1, now)),
+        ("get_available_classes_for_date",
+         lambda: db.get_available_classes_for_date(now, student_id=1)),
+        ("Add_Reservation", lambda: db.Add_Reservation(1, 1)),
+        ("get_reservations_by_student", lambda: db.get_reservations_by_student(1)),
+        ("get_reservations_by_class", lambda: db.get_reservations_by_class(1)),
+        ("get_attendance_by_class", lambda: db.get_attendance_by_class(1)),
+        ("get_attendance_by_student", lambda: db.get_attendance_by_student(1, 1)),
+        ("get_student_statistics", lambda: db.get_student_statistics(1)),
+        ("get_teacher_statistics", lambda: db.get_teacher_statistics(1)),
+        ("get_payments_by_teacher",
+         lambda: db.get_payments_by_teacher(1, month_ago, now)),
+        ("get_total_earnings_by_teacher", lambda: db.get_total_earnings_by_teacher(1)),
+        ("get_all_payments", lambda: db.get_all_payments(month_ago, now)),
+    ]
+
+
+def capture_statements(call) -> list[tuple[str, tuple]]:
+    """Run `call` and return the (sql, params) pairs it executed."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(EXPLAINED) and not executemany:
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        with db.dry_run():
+            call()
+    except Exception as e:
+        captured.append((None, e))
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(statement: str, parameters) -> list[str]:
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        ).all()
+    return [row[-1] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database", type=Path, help="SQLite file to inspect")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.database or Path(tmp) / "explain.db"
+        db.engine = db.build_engine(f"sqlite:///{path}", db.DB_SETTINGS)
+        if not args.database:
+            db.Create_Tables()
+
+        for label, call in helper_calls():
+            print(f"== {label}")
+            for statement, parameters in capture_statements(call):
+                if statement is None:
+                    print(f"   !! failed: {parameters}")
+                    continue
+                print("   " + " ".join(statement.split()))
+                for line in explain(statement, parameters):
+                    marker = "!!" if line.startswith("SCAN") else "  "
+                    print(f"   {marker} {line}")
+            print()
+
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
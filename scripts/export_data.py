@@ -0,0 +1,81 @@
+"""
+Export payments or attendance records to a CSV or JSONL file.
+
+Rows are streamed from the database in chunks (see database.exporter), so the
+export runs in constant memory whatever the period. The format follows the
+file extension (.jsonl/.json for JSON Lines, CSV otherwise) unless
+``--format`` is given. Without ``--database`` the application database is
+used. The database is only read: a missing file or one whose schema is not
+at the current version (start the application once to migrate it) is an
+error, never created or migrated here.
+
+Usage: python -m scripts.export_data {payments,attendance} FILE [--from 2024-01-01] [--to 2024-12-31] [--center 1] [--status paid]
+"""
+import argparse
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import database.db as db
+from database.exporter import EXPORT_CHUNK_SIZE, EXPORTS, FORMATS, export_data
+
+
+def parse_day(text: str) -> datetime:
+    return datetime.strptime(text, "%Y-%m-%d")
+
+
+def schema_version(path: Path) -> int:
+    """PRAGMA user_version of `path`, read without writing to the file."""
+    connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("kind", choices=sorted(EXPORTS))
+    parser.add_argument("file", type=Path, help=".csv or .jsonl output")
+    parser.add_argument("--format", choices=FORMATS, help="override the file extension")
+    parser.add_argument("--from", dest="start", type=parse_day, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=parse_day, help="last day (YYYY-MM-DD)")
+    parser.add_argument("--center", type=int, help="center id")
+    parser.add_argument("--status", help="payment or attendance status")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    parser.add_argument("--database", type=Path, help="SQLite file to export from")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args()
+
+    path = args.database or db.DB_PATH
+    if not path.is_file():
+        parser.error(f"database not found: {path}")
+    version = schema_version(path)
+    if version != db.SCHEMA_VERSION:
+        parser.error(
+            f"{path} has schema version {version}, expected {db.SCHEMA_VERSION}; "
+            "start the application once to migrate it"
+        )
+    if args.database:
+        db.engine = db.build_engine(f"sqlite:///{args.database}", db.DB_SETTINGS)
+
+    def progress(done, total):
+        print(f"\r{done:,} / {total:,} rows", end="", file=sys.stderr, flush=True)
+
+    report = export_data(
+        args.kind, args.file, args.format, args.chunk_size,
+        progress=None if args.quiet else progress,
+        start_date=args.start,
+        end_date=args.end.replace(hour=23, minute=59, second=59, microsecond=999999) if args.end else None,
+        center_id=args.center,
+        status=args.status,
+    )
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(report.summary())
+    db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Bulk-import users, classes or historical payments from a CSV or JSONL file.
+
+Rows are validated and inserted in chunks (see database.importer); rejected
+rows are skipped and, with ``--errors``, written to a CSV report with their
+line number and reason. Without ``--database`` the application database is
+used.
+
+Usage: python -m scripts.import_data {users,classes,payments} FILE [--errors errors.csv] [--workers 4]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import database.db as db
+from database.importer import IMPORT_CHUNK_SIZE, IMPORTERS, import_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("kind", choices=sorted(IMPORTERS))
+    parser.add_argument("file", type=Path, help=".csv or .jsonl input")
+    parser.add_argument("--errors", type=Path, help="write rejected rows to this CSV")
+    parser.add_argument("--workers", type=int, help="password hashing processes (users only)")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--database", type=Path, help="SQLite file to import into")
+    args = parser.parse_args()
+
+    if args.database:
+        db.engine = db.build_engine(f"sqlite:///{args.database}", db.DB_SETTINGS)
+    db.Create_Tables()
+
+    if args.kind == "users":
+        report = import_users(args.file, workers=args.workers, chunk_size=args.chunk_size)
+    else:
+        report = IMPORTERS[args.kind](args.file, chunk_size=args.chunk_size)
+
+    print(report.summary())
+    if args.kind == "users":
+        print(f"password hashing: {report.hash_seconds:.2f}s")
+    for error in report.errors[:20]:
+        print(f"  line {error.line}: {error.message}")
+    if report.rejected > 20:
+        print(f"  ... {report.rejected - 20} more")
+    if args.errors and report.errors:
+        report.write_errors(args.errors)
+        print(f"error report written to {args.errors}")
+
+    db.engine.dispose()
+    sys.exit(1 if report.rejected else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Recompute the daily and per-class summary tables from the raw rows.
+
+The write helpers keep the summaries current, so this is only needed after
+changes that bypass them (direct SQL, moving a class to another center or
+day) or to verify them: with ``--check`` the tables are rebuilt in a scratch
+transaction, compared with the stored ones, and left untouched.
+
+Usage: python -m scripts.rebuild_summaries [--database data/database.db] [--check]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import database.db as db
+
+# Summary table -> number of leading key columns
+SUMMARY_TABLES = {"dailyrevenuesummary": 4, "dailyactivitysummary": 2, "classsummary": 1}
+
+
+def snapshot(connection) -> dict[str, set]:
+    """Rows of each summary table, leaving out rows whose counters are all zero.
+
+    Incremental updates can leave such rows behind (e.g. a payment moved to
+    another status); a rebuild never creates them and they add nothing.
+    """
+    return {
+        table: {
+            row for row in connection.exec_driver_sql(f"SELECT * FROM {table}").all()
+            if any(row[keys:])
+        }
+        for table, keys in SUMMARY_TABLES.items()
+    }
+
+
+def check() -> int:
+    """Number of summary rows that differ from a fresh rebuild."""
+    with db.engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            stored = snapshot(connection)
+            for statement in db.SUMMARY_REBUILD:
+                connection.exec_driver_sql(statement)
+            rebuilt = snapshot(connection)
+        finally:
+            transaction.rollback()
+
+    differences = 0
+    for table in SUMMARY_TABLES:
+        stale = stored[table] ^ rebuilt[table]
+        differences += len(stale)
+        print(f"{table}: {len(rebuilt[table])} rows, {len(stale)} differ")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database", type=Path, help="SQLite file to rebuild")
+    parser.add_argument("--check", action="store_true",
+                        help="only report differences from a fresh rebuild")
+    args = parser.parse_args()
+
+    if args.database:
+        db.engine = db.build_engine(f"sqlite:///{args.database}", db.DB_SETTINGS)
+    db.Create_Tables()
+
+    status = 0
+    if args.check:
+        status = 1 if check() else 0
+    else:
+        db.rebuild_summaries()
+        print("summary tables rebuilt")
+    db.engine.dispose()
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Paginated PDF rendering of the financial report with QPdfWriter.
+
+Rows come from the same streaming query as the CSV export
+(database.exporter) and are painted as they arrive: each page is finished
+as soon as it is full, so memory depends on the page size, not on the number
+of rows. Headings and totals are small QTextDocuments; the table body is
+drawn straight with QPainter, which is what keeps a 10k-row report within a
+few seconds.
+
+Without a center filter every center gets its own section, starting on a new
+page with its own totals, which is the month-end report the centers receive.
+QPdfWriter and QPainter work outside the GUI thread, so render_financial_pdf
+can run on ui.task_runner.TaskRunner once a QGuiApplication exists.
+"""
+import html
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from PyQt6.QtCore import QMarginsF, QPointF, QRectF, Qt
+from PyQt6.QtGui import (
+    QColor, QFont, QFontMetricsF, QPageLayout, QPageSize, QPainter, QPdfWriter,
+    QTextDocument,
+)
+
+from database.db import Center, Payment
+from database.exporter import EXPORT_CHUNK_SIZE, count_rows, iter_chunks, payments_export
+
+PDF_FONT = "Arial"
+PDF_FONT_SIZE = 8
+PDF_MARGIN_MM = 15
+PAYMENT_STATUS_NAMES = {"paid": "Pagado", "pending": "Pendiente", "refunded": "Reembolsado"}
+
+
+@dataclass(frozen=True)
+class PdfColumn:
+    """A table column: header, row key, relative width and text format."""
+    header: str
+    key: str
+    width: float
+    format: Callable[[object], str] = str
+    align_right: bool = False
+
+
+PAYMENT_PDF_COLUMNS = [
+    PdfColumn("Fecha", "paid_at", 3.0, lambda value: value.strftime("%Y-%m-%d %H:%M")),
+    PdfColumn("ID", "payment_id", 1.0, str, align_right=True),
+    PdfColumn("Estudiante", "student", 3.4, lambda value: value or "N/A"),
+    PdfColumn("Clase", "class_id", 1.2, lambda value: f"#{value}"),
+    PdfColumn("Profesor", "teacher", 3.0, lambda value: value or "N/A"),
+    PdfColumn("Método", "payment_method", 1.8),
+    PdfColumn("Estado", "status", 1.8, lambda value: PAYMENT_STATUS_NAMES.get(value, value)),
+    PdfColumn("Monto", "amount", 1.6, lambda value: f"${value:,.2f}", align_right=True),
+]
+
+
+@dataclass
+class PdfReport:
+    """Outcome of one PDF render."""
+    path: Path
+    rows: int = 0
+    pages: int = 0
+    sections: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.rows} rows, {self.sections} sections, {self.pages} pages "
+            f"written to {self.path} in {self.seconds:.2f}s"
+        )
+
+
+@dataclass
+class _Totals:
+    """Running totals of one section."""
+    payments: int = 0
+    by_status: dict = field(default_factory=dict)  # status -> (count, amount)
+
+    def add(self, status, amount):
+        count, total = self.by_status.get(status, (0, 0.0))
+        self.by_status[status] = (count + 1, total + amount)
+        self.payments += 1
+
+
+class _PdfTable:
+    """Paints headings, a repeated table header and rows onto a QPdfWriter."""
+
+    def __init__(self, path, title, columns):
+        self.title = title
+        self.columns = columns
+        self.writer = QPdfWriter(str(path))
+        self.writer.setTitle(title)
+        self.writer.setCreator("Yoga Centers")
+        self.writer.setPageLayout(QPageLayout(
+            QPageSize(QPageSize.PageSizeId.A4), QPageLayout.Orientation.Portrait,
+            QMarginsF(PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM, PDF_MARGIN_MM),
+            QPageLayout.Unit.Millimeter,
+        ))
+        self.painter = QPainter()
+        if not self.painter.begin(self.writer):
+            raise OSError(f"No se pudo escribir el PDF: {path}")
+
+        self.font = QFont(PDF_FONT, PDF_FONT_SIZE)
+        self.bold = QFont(PDF_FONT, PDF_FONT_SIZE, QFont.Weight.Bold)
+        self.metrics = QFontMetricsF(self.font, self.writer)
+        self.row_height = self.metrics.height() * 1.5
+        self.padding = self.metrics.averageCharWidth() / 2
+
+        area = self.writer.pageLayout().paintRectPixels(self.writer.resolution())
+        self.width = area.width()
+        # The footer line lives below the last row
+        self.bottom = area.height() - self.row_height * 1.5
+        # (left, text width, right-aligned) of each cell, computed once
+        scale = self.width / sum(column.width for column in columns)
+        self.cells = []
+        x = 0.0
+        for column in columns:
+            width = column.width * scale
+            self.cells.append((x + self.padding, width - 2 * self.padding, column.align_right))
+            x += width
+        # Names repeat on most rows: elide and measure each distinct text once
+        self.elided = {}
+
+        self.pages = 1
+        self.y = 0.0
+        self.section = ""
+        self.shaded = False
+
+    # <------------------- Pages ------------------>
+    def _footer(self):
+        self.painter.setFont(self.font)
+        self.painter.setPen(QColor("#7f8c8d"))
+        rect = QRectF(0, self.bottom + self.row_height / 2, self.width, self.row_height)
+        self.painter.drawText(rect, Qt.AlignmentFlag.AlignLeft, f"{self.title} · {self.section}")
+        self.painter.drawText(rect, Qt.AlignmentFlag.AlignRight, f"Página {self.pages}")
+
+    def new_page(self):
+        self._footer()
+        self.writer.newPage()
+        self.pages += 1
+        self.y = 0.0
+
+    def finish(self):
+        self._footer()
+        self.painter.end()
+
+    def abort(self):
+        if self.painter.isActive():
+            self.painter.end()
+
+    # <------------------- Content ------------------>
+    def document(self, markup):
+        """QTextDocument laid out for the PDF's resolution and page width."""
+        document = QTextDocument()
+        document.documentLayout().setPaintDevice(self.writer)
+        document.setDefaultFont(self.font)
+        document.setDocumentMargin(0)
+        document.setTextWidth(self.width)
+        document.setHtml(markup)
+        return document
+
+    def draw_document(self, document):
+        height = document.size().height()
+        if self.y and self.y + height > self.bottom:
+            self.new_page()
+        self.painter.save()
+        self.painter.translate(0, self.y)
+        document.drawContents(self.painter)
+        self.painter.restore()
+        self.y += height
+
+    def start_section(self, name, markup):
+        """Begin a section on a fresh page with its heading and the table header."""
+        if self.y:
+            self.new_page()
+        self.section = name
+        self.draw_document(self.document(markup))
+        self.header()
+
+    def header(self):
+        self.painter.setFont(self.bold)
+        self.painter.fillRect(QRectF(0, self.y, self.width, self.row_height), QColor("#34495e"))
+        self.painter.setPen(QColor("white"))
+        for column, (x, width, right) in zip(self.columns, self.cells):
+            align = Qt.AlignmentFlag.AlignRight if right else Qt.AlignmentFlag.AlignLeft
+            self.painter.drawText(
+                QRectF(x, self.y, width, self.row_height),
+                align | Qt.AlignmentFlag.AlignVCenter, column.header,
+            )
+        self.y += self.row_height
+        self.painter.setFont(self.font)
+        self.painter.setPen(QColor("black"))
+        self.shaded = False
+
+    def row(self, texts):
+        if self.y + self.row_height > self.bottom:
+            self.new_page()
+            self.header()
+        if self.shaded:
+            self.painter.fillRect(QRectF(0, self.y, self.width, self.row_height), QColor("#f2f4f4"))
+        self.shaded = not self.shaded
+        self._cells(texts)
+
+    def _cells(self, texts):
+        # Drawing at a baseline point skips Qt's per-call rectangle layout
+        baseline = self.y + (self.row_height - self.metrics.height()) / 2 + self.metrics.ascent()
+        for column, (x, width, right), text in zip(self.columns, self.cells, texts):
+            key = (column.key, text)
+            cell = self.elided.get(key)
+            if cell is None:
+                if len(self.elided) > 10000:
+                    self.elided.clear()
+                elided = self.metrics.elidedText(text, Qt.TextElideMode.ElideRight, width)
+                offset = width - self.metrics.horizontalAdvance(elided) if right else 0.0
+                cell = self.elided[key] = (elided, offset)
+            self.painter.drawText(QPointF(x + cell[1], baseline), cell[0])
+        self.y += self.row_height
+
+
+def _heading(title, section, start_date, end_date):
+    period = f"{start_date:%d/%m/%Y} - {end_date:%d/%m/%Y}" if start_date and end_date else "Todo el historial"
+    return (
+        f"<h2 style='color:#2c3e50'>{html.escape(title)}</h2>"
+        f"<p><b>Centro:</b> {html.escape(section)}<br>"
+        f"<b>Período:</b> {period}<br>"
+        f"<b>Generado:</b> {datetime.now():%d/%m/%Y %H:%M}</p>"
+    )
+
+
+def _totals(totals):
+    rows = "".join(
+        f"<tr><td>{PAYMENT_STATUS_NAMES.get(status, status)}</td>"
+        f"<td align='right'>{count}</td><td align='right'>${amount:,.2f}</td></tr>"
+        for status, (count, amount) in sorted(totals.by_status.items())
+    )
+    paid = totals.by_status.get("paid", (0, 0.0))[1]
+    return (
+        "<p></p><table cellpadding='3' border='0'>"
+        "<tr><th align='left'>Estado</th><th>Pagos</th><th>Monto</th></tr>"
+        f"{rows}</table>"
+        f"<p><b>Total de pagos:</b> {totals.payments} &nbsp; "
+        f"<b>Ingresos cobrados:</b> ${paid:,.2f}</p>"
+    )
+
+
+def render_financial_pdf(path, start_date=None, end_date=None, center_id=None, status=None,
+                         chunk_size: int = EXPORT_CHUNK_SIZE, progress=None) -> PdfReport:
+    """Write the payments of the period to `path` as a paginated PDF.
+
+    One section per center, ordered by center and date. `progress(done,
+    total)` is called after every chunk. On error or cancellation no file
+    is left at `path`.
+    """
+    path = Path(path)
+    report = PdfReport(path)
+    started = time.perf_counter()
+    statement = payments_export(start_date, end_date, center_id, status).order_by(None).order_by(
+        Center.name, Payment.paid_at, Payment.id
+    )
+    total = count_rows(statement) if progress else 0
+    if progress:
+        progress(0, total)
+
+    title = "Reporte Financiero"
+    partial = path.with_name(path.name + ".part")
+    table = _PdfTable(partial, title, PAYMENT_PDF_COLUMNS)
+    try:
+        section, totals = None, None
+        for rows in iter_chunks(statement, chunk_size):
+            for row in rows:
+                values = row._mapping
+                center = values["center"] or "Sin centro"
+                if center != section:
+                    if totals is not None:
+                        table.draw_document(table.document(_totals(totals)))
+                    section, totals = center, _Totals()
+                    report.sections += 1
+                    table.start_section(center, _heading(title, center, start_date, end_date))
+                totals.add(values["status"], values["amount"])
+                table.row([column.format(values[column.key]) for column in PAYMENT_PDF_COLUMNS])
+            report.rows += len(rows)
+            if progress:
+                progress(report.rows, max(total, report.rows))
+
+        if totals is None:
+            table.start_section("Todos", _heading(title, "Todos", start_date, end_date))
+            table.draw_document(table.document("<p>No hay pagos en el período.</p>"))
+        else:
+            table.draw_document(table.document(_totals(totals)))
+        table.finish()
+        os.replace(partial, path)
+    except BaseException:
+        table.abort()
+        partial.unlink(missing_ok=True)
+        raise
+
+    report.pages = table.pages
+    report.seconds = time.perf_counter() - started
+    return report
@@ -1,98 +1,446 @@
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from database.db import get_session, select, Payment, YogaClass, User, Attendance, Center
-from sqlalchemy import func
+from typing import List, Dict, Any, Sequence
+from database.db import (
+    get_session, Payment, YogaClass, User, Attendance, Center, Role, Reserve,
+    DailyRevenueSummary, DailyActivitySummary, ClassSummary,
+)
+# SQLAlchemy's select: a single-measure query must still yield rows, not scalars
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.sql.util import find_tables
 
-class ReportService:
-    @staticmethod
-    def generate_attendance_report(center_id: int = None, start_date: datetime = None, end_date: datetime = None) -> Dict[str, Any]:
-        """Generate attendance report with filters."""
-        session = get_session()
-        try:
-            query = select(Attendance)
 
-            if center_id:
-                query = query.join(YogaClass).where(YogaClass.center_id == center_id)
+# <------------------- Aggregation engine ------------------>
+@dataclass(frozen=True)
+class Fact:
+    """A table that can be aggregated, with its measures and dimensions."""
+    model: Any
+    date_column: Any
+    measures: Dict[str, Any]
+    # Dimensions stored on the fact itself (status, method, ...)
+    columns: Dict[str, Any] = field(default_factory=dict)
+    # Whether center/teacher live on the fact or on the joined YogaClass
+    joins_class: bool = True
+    # Summary tables store a date per row: date filters compare whole days
+    daily: bool = False
+    # (model, onclause) outer-joined only when a measure reads the model;
+    # each must match at most one row per fact row
+    outer_joins: Sequence[Any] = ()
 
-            if start_date and end_date:
-                query = query.where(
-                    Attendance.attended_at >= start_date,
-                    Attendance.attended_at <= end_date
-                )
 
-            attendances = session.exec(query).all()
+FACTS: Dict[str, Fact] = {
+    "payment": Fact(
+        model=Payment,
+        date_column=Payment.paid_at,
+        measures={
+            "payments": func.count(Payment.id),
+            "revenue": func.coalesce(func.sum(Payment.amount), 0.0),
+            "avg_amount": func.coalesce(func.avg(Payment.amount), 0.0),
+            "students": func.count(func.distinct(Payment.student_id)),
+            # The teacher's cut of each payment, at the class's share
+            "teacher_earnings": func.coalesce(
+                func.sum(Payment.amount * YogaClass.teacher_share_percentage / 100), 0.0
+            ),
+        },
+        columns={
+            "status": Payment.status,
+            "method": Payment.payment_method,
+            "student": Payment.student_id,
+            "class": Payment.yogaclass_id,
+        },
+    ),
+    "attendance": Fact(
+        model=Attendance,
+        date_column=Attendance.attended_at,
+        measures={
+            "attendances": func.count(Attendance.id),
+            "students": func.count(func.distinct(Attendance.student_id)),
+        },
+        columns={
+            "status": Attendance.status,
+            "student": Attendance.student_id,
+            "class": Attendance.yogaclass_id,
+        },
+    ),
+    "class": Fact(
+        model=YogaClass,
+        date_column=YogaClass.scheduled_at,
+        measures={
+            "classes": func.count(YogaClass.id),
+            "capacity": func.coalesce(func.sum(YogaClass.max_capacity), 0),
+            "booked": func.coalesce(func.sum(YogaClass.current_capacity), 0),
+            "present": func.coalesce(func.sum(ClassSummary.present), 0),
+        },
+        columns={"class": YogaClass.id, "teacher": YogaClass.teacher_id},
+        joins_class=False,
+        outer_joins=((ClassSummary, ClassSummary.yogaclass_id == YogaClass.id),),
+    ),
+    # Bookings dated by the class they are for, not by when they were made
+    "reserve": Fact(
+        model=Reserve,
+        date_column=YogaClass.scheduled_at,
+        measures={
+            "bookings": func.count(Reserve.id),
+            "students": func.count(func.distinct(Reserve.student_id)),
+        },
+        columns={
+            "status": Reserve.status,
+            "student": Reserve.student_id,
+            "class": Reserve.yogaclass_id,
+        },
+    ),
+    # Pre-aggregated counterparts (see the summary tables in database.db):
+    # the cost depends on the number of days, not of payments or attendances
+    "revenue": Fact(
+        model=DailyRevenueSummary,
+        date_column=DailyRevenueSummary.day,
+        measures={
+            "payments": func.coalesce(func.sum(DailyRevenueSummary.payments), 0),
+            "revenue": func.coalesce(func.sum(DailyRevenueSummary.amount), 0.0),
+        },
+        columns={
+            "center": DailyRevenueSummary.center_id,
+            "status": DailyRevenueSummary.status,
+            "method": DailyRevenueSummary.payment_method,
+        },
+        joins_class=False,
+        daily=True,
+    ),
+    "activity": Fact(
+        model=DailyActivitySummary,
+        date_column=DailyActivitySummary.day,
+        measures={
+            "bookings": func.coalesce(func.sum(DailyActivitySummary.bookings), 0),
+            "present": func.coalesce(func.sum(DailyActivitySummary.present), 0),
+            "late": func.coalesce(func.sum(DailyActivitySummary.late), 0),
+            "absent": func.coalesce(func.sum(DailyActivitySummary.absent), 0),
+        },
+        columns={"center": DailyActivitySummary.center_id},
+        joins_class=False,
+        daily=True,
+    ),
+}
 
-            # Process data
-            total_attendance = len(attendances)
-            unique_students = len(set(a.student_id for a in attendances))
+# Dimensions resolved through YogaClass for every fact
+CLASS_DIMENSIONS = {
+    "center": YogaClass.center_id,
+    "teacher": YogaClass.teacher_id,
+}
 
-            return {
-                "total_attendance": total_attendance,
-                "unique_students": unique_students,
-                "attendances": attendances
-            }
-        finally:
-            session.close()
+# Calendar buckets of the fact's date column (SQLite strftime formats)
+TIME_DIMENSIONS = {
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%W",
+    "month": "%Y-%m",
+}
 
-    @staticmethod
-    def generate_financial_report(start_date: datetime = None, end_date: datetime = None) -> Dict[str, Any]:
-        """Generate financial report with detailed breakdown."""
-        session = get_session()
-        try:
-            query = select(Payment)
+# Filter keyword -> dimension it constrains
+FILTERS = {
+    "center_id": "center",
+    "teacher_id": "teacher",
+    "status": "status",
+    "payment_method": "method",
+    "student_id": "student",
+    "class_id": "class",
+}
 
-            if start_date and end_date:
-                query = query.where(
-                    Payment.paid_at >= start_date,
-                    Payment.paid_at <= end_date
-                )
 
-            payments = session.exec(query).all()
+def _dimension_column(fact: Fact, name: str):
+    """SQL expression for dimension `name` of `fact`, or raise ValueError."""
+    if name in fact.columns:
+        return fact.columns[name]
+    if name in CLASS_DIMENSIONS and not fact.daily:
+        return CLASS_DIMENSIONS[name]
+    if name in TIME_DIMENSIONS:
+        return func.strftime(TIME_DIMENSIONS[name], fact.date_column)
+    raise ValueError(f"Unknown dimension for {fact.model.__name__}: {name}")
+
 
-            total_revenue = sum(p.amount for p in payments)
+def _tables(expression):
+    """Tables an expression (ORM attribute or SQL) reads."""
+    if hasattr(expression, "__clause_element__"):
+        expression = expression.__clause_element__()
+    return find_tables(expression, check_columns=True)
 
-            # Group by payment method
-            payment_methods = {}
-            for p in payments:
-                payment_methods[p.payment_method] = payment_methods.get(p.payment_method, 0) + p.amount
 
-            # Group by status
-            status_counts = {}
-            for p in payments:
-                status_counts[p.status] = status_counts.get(p.status, 0) + 1
+def build_aggregate_query(
+    fact_name: str,
+    measures: Sequence[str],
+    group_by: Sequence[str] = (),
+    start_date: datetime = None,
+    end_date: datetime = None,
+    **filters,
+):
+    """Compile a fact, measures, dimensions and filters into one GROUP BY select."""
+    if fact_name not in FACTS:
+        raise ValueError(f"Unknown fact: {fact_name}")
+    fact = FACTS[fact_name]
 
-            return {
-                "total_revenue": total_revenue,
-                "payment_methods": payment_methods,
-                "status_counts": status_counts,
-                "payments": payments
-            }
+    unknown = [m for m in measures if m not in fact.measures]
+    if unknown:
+        raise ValueError(f"Unknown measures for {fact_name}: {', '.join(unknown)}")
+    unknown = [f for f in filters if f not in FILTERS]
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(unknown)}")
+
+    dimensions = [(name, _dimension_column(fact, name)) for name in group_by]
+    query = select(
+        *(column.label(name) for name, column in dimensions),
+        *(fact.measures[name].label(name) for name in measures),
+    ).select_from(fact.model)
+
+    # Join YogaClass (and the optional tables) only when something reads them
+    used = [column for _, column in dimensions]
+    used += [fact.measures[name] for name in measures]
+    used += [
+        _dimension_column(fact, FILTERS[name]) for name, value in filters.items()
+        if value is not None
+    ]
+    if start_date or end_date:
+        used.append(fact.date_column)
+    tables = {table for expression in used for table in _tables(expression)}
+    if fact.joins_class and YogaClass.__table__ in tables:
+        query = query.join(YogaClass, YogaClass.id == fact.model.yogaclass_id)
+    for model, onclause in fact.outer_joins:
+        if model.__table__ in tables:
+            query = query.outerjoin(model, onclause)
+
+    if fact.daily:
+        start_date = start_date.date() if start_date else None
+        end_date = end_date.date() if end_date else None
+    if start_date:
+        query = query.where(fact.date_column >= start_date)
+    if end_date:
+        query = query.where(fact.date_column <= end_date)
+    for name, value in filters.items():
+        if value is None:
+            continue
+        column = _dimension_column(fact, FILTERS[name])
+        if isinstance(value, (list, tuple, set, frozenset)):
+            query = query.where(column.in_(list(value)))
+        else:
+            query = query.where(column == value)
+
+    if dimensions:
+        columns = [column for _, column in dimensions]
+        query = query.group_by(*columns).order_by(*columns)
+    return query
+
+
+class ReportService:
+    @staticmethod
+    def aggregate(
+        fact_name: str,
+        measures: Sequence[str],
+        group_by: Sequence[str] = (),
+        start_date: datetime = None,
+        end_date: datetime = None,
+        **filters,
+    ) -> List[Row]:
+        """Aggregate a fact table in SQL and return one row per group.
+
+        `fact_name` is one of FACTS: "payment", "attendance", "class" and
+        "reserve" read the raw rows; "revenue" and "activity" read the daily summary
+        tables and only support the dimensions stored on them.
+        `group_by` takes dimension names: center, teacher, status, method,
+        student, class, day, week or month. Filters are keyword arguments
+        (center_id, teacher_id, status, payment_method, student_id,
+        class_id); a list/tuple value becomes an IN filter and None is
+        ignored. Rows are named tuples with one field per dimension followed
+        by one per measure, e.g. ``row.method, row.revenue``. Measure names
+        avoid ``count``/``index`` so they never shadow tuple methods.
+        """
+        query = build_aggregate_query(
+            fact_name, measures, group_by, start_date, end_date, **filters
+        )
+        session = get_session()
+        try:
+            return session.exec(query).all()
         finally:
             session.close()
 
+    @staticmethod
+    def generate_attendance_report(center_id: int = None, start_date: datetime = None, end_date: datetime = None) -> Dict[str, Any]:
+        """Generate attendance report with filters."""
+        totals = ReportService.aggregate(
+            "attendance", ("attendances", "students"),
+            start_date=start_date, end_date=end_date, center_id=center_id
+        )[0]
+        by_status = ReportService.aggregate(
+            "attendance", ("attendances",), ("status",),
+            start_date=start_date, end_date=end_date, center_id=center_id
+        )
+
+        return {
+            "total_attendance": totals.attendances,
+            "unique_students": totals.students,
+            "status_counts": {row.status: row.attendances for row in by_status},
+        }
+
+    @staticmethod
+    def generate_financial_report(start_date: datetime = None, end_date: datetime = None) -> Dict[str, Any]:
+        """Generate financial report with detailed breakdown."""
+        rows = ReportService.aggregate(
+            "revenue", ("payments", "revenue"), ("method", "status"),
+            start_date=start_date, end_date=end_date
+        )
+
+        total_revenue = 0.0
+        payment_methods = {}
+        status_counts = {}
+        for row in rows:
+            total_revenue += row.revenue
+            payment_methods[row.method] = payment_methods.get(row.method, 0) + row.revenue
+            status_counts[row.status] = status_counts.get(row.status, 0) + row.payments
+
+        return {
+            "total_revenue": total_revenue,
+            "payment_methods": payment_methods,
+            "status_counts": status_counts,
+        }
+
     @staticmethod
     def generate_class_report(center_id: int = None) -> Dict[str, Any]:
         """Generate class statistics report."""
-        session = get_session()
-        try:
-            query = select(YogaClass)
+        totals = ReportService.aggregate(
+            "class", ("classes", "capacity", "booked"), center_id=center_id
+        )[0]
+
+        total_capacity = totals.capacity
+        total_booked = totals.booked
+        occupancy_rate = (total_booked / total_capacity * 100) if total_capacity > 0 else 0
+
+        return {
+            "total_classes": totals.classes,
+            "total_capacity": total_capacity,
+            "total_booked": total_booked,
+            "occupancy_rate": occupancy_rate,
+        }
+
+
+# <------------------- Executive dashboard ------------------>
+MONTH_NAMES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun",
+               "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+# Revenue series lengths offered by the dashboard
+DASHBOARD_HORIZONS = (6, 12, 24)
+# Seconds a computed dashboard is served from cache
+DASHBOARD_CACHE_SECONDS = 30
+TOP_CLASSES = 5
+# Attendance rate assumes this many students per class
+EXPECTED_CLASS_SIZE = 10
+
+
+def _add_months(day: datetime, months: int) -> datetime:
+    """First day of the month `months` away from `day`'s month."""
+    index = day.year * 12 + day.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
 
-            if center_id:
-                query = query.where(YogaClass.center_id == center_id)
 
-            classes = session.exec(query).all()
+class ExecutiveDashboard:
+    """KPIs and the monthly revenue series of the executive dashboard.
 
-            total_classes = len(classes)
-            total_capacity = sum(c.max_capacity for c in classes)
-            total_booked = sum(c.current_capacity for c in classes)
-            occupancy_rate = (total_booked / total_capacity * 100) if total_capacity > 0 else 0
+    Everything comes from a handful of grouped queries: the revenue figures
+    read the daily summary table, so the cost grows with the number of days
+    in the horizon rather than with the number of payments. Results are
+    cached per horizon for `ttl` seconds; get() is safe to call from worker
+    threads.
+    """
 
-            return {
-                "total_classes": total_classes,
-                "total_capacity": total_capacity,
-                "total_booked": total_booked,
-                "occupancy_rate": occupancy_rate,
-                "classes": classes
-            }
+    def __init__(self, ttl: float = DASHBOARD_CACHE_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: Dict[int, tuple] = {}
+
+    def get(self, months: int = 6, force: bool = False) -> Dict[str, Any]:
+        """Dashboard data with a `months`-long revenue series, newest month first."""
+        with self._lock:
+            cached = self._cache.get(months)
+            if cached and not force and cached[0] > time.monotonic():
+                return cached[1]
+        data = self._compute(months, datetime.now())
+        with self._lock:
+            self._cache[months] = (time.monotonic() + self.ttl, data)
+        return data
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _compute(self, months: int, now: datetime) -> Dict[str, Any]:
+        month_start = _add_months(now, 0)
+        month_end = _add_months(now, 1) - timedelta(microseconds=1)
+        series_start = _add_months(now, -(months - 1))
+
+        total_revenue = ReportService.aggregate("revenue", ("revenue",))[0].revenue
+        by_month = {
+            row.month: row.revenue
+            for row in ReportService.aggregate(
+                "revenue", ("revenue",), ("month",), start_date=series_start
+            )
+        }
+        monthly_revenue = []
+        for offset in range(months):
+            month = _add_months(now, -offset)
+            monthly_revenue.append((
+                f"{MONTH_NAMES[month.month - 1]} {month.year}",
+                by_month.get(month.strftime("%Y-%m"), 0),
+            ))
+
+        classes = ReportService.aggregate(
+            "class", ("classes", "capacity", "booked"),
+            start_date=month_start, end_date=month_end
+        )[0]
+
+        session = get_session()
+        try:
+            active_users, new_students = session.exec(
+                select(
+                    func.count(User.id).filter(User.is_active == True),
+                    func.count(User.id).filter(
+                        User.role == Role.STUDENT, User.created_at >= month_start
+                    ),
+                )
+            ).one()
+
+            # Classes since the start of the month that recorded attendance
+            present, attended_classes = session.exec(
+                select(func.coalesce(func.sum(ClassSummary.present), 0), func.count())
+                .join(YogaClass, YogaClass.id == ClassSummary.yogaclass_id)
+                .where(YogaClass.scheduled_at >= month_start, ClassSummary.present > 0)
+            ).one()
+
+            top_classes = session.exec(
+                select(
+                    YogaClass.scheduled_at, YogaClass.id,
+                    func.coalesce(User.name, "N/A"),
+                    YogaClass.current_capacity, YogaClass.max_capacity,
+                )
+                .outerjoin(User, User.id == YogaClass.teacher_id)
+                .where(YogaClass.scheduled_at >= month_start)
+                .order_by(YogaClass.current_capacity.desc())
+                .limit(TOP_CLASSES)
+            ).all()
         finally:
             session.close()
+
+        return {
+            "total_revenue": total_revenue,
+            "active_users": active_users,
+            "classes_this_month": classes.classes,
+            "occupancy_rate": (
+                classes.booked / classes.capacity * 100 if classes.capacity else 0
+            ),
+            "avg_attendance": (
+                present / (attended_classes * EXPECTED_CLASS_SIZE) * 100
+                if attended_classes else 0
+            ),
+            "new_students": new_students,
+            "monthly_revenue": monthly_revenue,
+            "top_classes": [tuple(row) for row in top_classes],
+        }
+
+
+executive_dashboard = ExecutiveDashboard()
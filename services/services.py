@@ -7,7 +7,8 @@ from typing import List, Optional
 from database.db import (
     Session, User, YogaClass, Center, Reserve, Attendance, Payment,
     Role, select, get_user_centers, Add_User, Add_YogaClass,
-    Add_Reservation, Add_Attendance, Add_Payment, assign_user_to_center, get_session
+    Add_Reservation, Add_Attendance, Add_Payment, assign_user_to_center, get_session,
+    unit_of_work
 )
 
 class UserService:
@@ -15,11 +16,12 @@ class UserService:
     def create_user(name: str, email: str, phone: str,
                    password: str, role: Role, center_ids: List[int]) -> Optional[User]:
         """Crear un nuevo usuario y asignarlo a centros"""
-        user = Add_User(name, email, phone, password, role)
+        with unit_of_work():
+            user = Add_User(name, email, phone, password, role)
 
-        if user:
-            for center_id in center_ids:
-                assign_user_to_center(user.id, center_id)
+            if user:
+                for center_id in center_ids:
+                    assign_user_to_center(user.id, center_id)
 
         return user
 
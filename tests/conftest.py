@@ -0,0 +1,71 @@
+"""
+Shared fixtures: every test runs against its own temporary SQLite file.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import database.db as db
+
+# One cheap hash for every test user; bcrypt at the configured cost is slow
+PASSWORD_HASH = db.hash_password("secret", rounds=4)
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Point database.db at a fresh schema in tmp_path for one test."""
+    previous = vars(db).get("engine")
+    db.engine = db.build_engine(f"sqlite:///{tmp_path / 'test.db'}", db.DB_SETTINGS)
+    db.reference_cache.invalidate()
+    db.Create_Tables()
+    yield db.engine
+    db.engine.dispose()
+    db.reference_cache.invalidate()
+    if previous is None:
+        del db.engine
+    else:
+        db.engine = previous
+
+
+@pytest.fixture
+def make_user(database):
+    """Factory for users inserted directly, skipping the bcrypt cost of Add_User."""
+    count = 0
+
+    def make(role=db.Role.STUDENT, **fields):
+        nonlocal count
+        count += 1
+        user = db.User(
+            name=f"User {count}", email=f"user{count}@example.com",
+            password_hash=PASSWORD_HASH, role=role, **fields,
+        )
+        with db.get_session() as session:
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+        return user
+
+    return make
+
+
+@pytest.fixture
+def center(database):
+    return db.add_center("Centro", "Calle 1", "555-0000")
+
+
+@pytest.fixture
+def teacher(make_user):
+    return make_user(db.Role.TEACHER)
+
+
+@pytest.fixture
+def make_class(center, teacher):
+    """Factory for classes of `teacher` at `center`, tomorrow by default."""
+
+    def make(max_capacity=10, scheduled_at=None, **fields):
+        scheduled_at = scheduled_at or datetime.now() + timedelta(days=1)
+        return db.Add_YogaClass(
+            scheduled_at, max_capacity, teacher.id, center.id, **fields
+        )
+
+    return make
@@ -0,0 +1,91 @@
+"""
+save_class_attendance: one upsert per roster, one record per student and class.
+"""
+from datetime import datetime
+
+import pytest
+
+import database.db as db
+
+FIRST = datetime(2024, 5, 6, 9, 0)
+SECOND = datetime(2024, 5, 6, 9, 30)
+
+
+@pytest.fixture
+def roster_class(make_user, make_class):
+    students = [make_user() for _ in range(3)]
+    return make_class(), [student.id for student in students]
+
+
+def records(class_id):
+    return {a.student_id: a for a in db.get_attendance_by_class(class_id)}
+
+
+def test_saving_twice_upserts(roster_class):
+    yogaclass, (ana, ben, eva) = roster_class
+
+    assert db.save_class_attendance(
+        yogaclass.id, [(ana, "present"), (ben, "late"), (eva, "present")], FIRST
+    ) == 3
+    first_ids = {student: a.id for student, a in records(yogaclass.id).items()}
+    assert db.save_class_attendance(
+        yogaclass.id, [(ana, "late"), (ben, "late"), (eva, "present")], SECOND
+    ) == 3
+
+    saved = records(yogaclass.id)
+    assert len(db.get_attendance_by_class(yogaclass.id)) == 3
+    assert {student: a.id for student, a in saved.items()} == first_ids
+    assert {student: a.status for student, a in saved.items()} == {
+        ana: "late", ben: "late", eva: "present",
+    }
+    assert saved[ana].attended_at == SECOND
+
+
+def test_absent_without_record_writes_nothing(roster_class):
+    yogaclass, (ana, ben, eva) = roster_class
+
+    written = db.save_class_attendance(
+        yogaclass.id, [(ana, "present"), (ben, "absent"), (eva, "absent")], FIRST
+    )
+
+    assert written == 1
+    assert set(records(yogaclass.id)) == {ana}
+    assert db.get_attendance_by_student(ben, yogaclass.id) is None
+
+
+def test_absent_updates_an_existing_record_and_keeps_its_time(roster_class):
+    yogaclass, (ana, ben, _) = roster_class
+    db.save_class_attendance(yogaclass.id, [(ana, "present"), (ben, "late")], FIRST)
+
+    written = db.save_class_attendance(
+        yogaclass.id, [(ana, "absent"), (ben, "present")], SECOND
+    )
+
+    saved = records(yogaclass.id)
+    assert written == 2
+    assert (saved[ana].status, saved[ana].attended_at) == ("absent", FIRST)
+    assert (saved[ben].status, saved[ben].attended_at) == ("present", SECOND)
+
+
+def test_empty_or_all_absent_roster(roster_class):
+    yogaclass, students = roster_class
+
+    assert db.save_class_attendance(yogaclass.id, [], FIRST) == 0
+    assert db.save_class_attendance(
+        yogaclass.id, [(student, "absent") for student in students], FIRST
+    ) == 0
+    assert records(yogaclass.id) == {}
+
+
+def test_summary_follows_status_changes(roster_class):
+    yogaclass, (ana, ben, eva) = roster_class
+    db.save_class_attendance(
+        yogaclass.id, [(ana, "present"), (ben, "present"), (eva, "absent")], FIRST
+    )
+    db.save_class_attendance(
+        yogaclass.id, [(ana, "late"), (ben, "absent"), (eva, "present")], SECOND
+    )
+
+    with db.get_session() as session:
+        summary = session.get(db.ClassSummary, yogaclass.id)
+    assert (summary.present, summary.late, summary.absent) == (1, 1, 1)
@@ -0,0 +1,110 @@
+"""
+Keyset pagination: cursors, and pages that tile the result exactly.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import database.db as db
+from database.pagination import decode_cursor, encode_cursor, paginate
+
+ORDER = [(db.Payment.paid_at, True), (db.Payment.id, True)]
+
+
+@pytest.fixture
+def payments(make_user, make_class):
+    """25 payments whose paid_at values come in groups of 4 equal ones."""
+    student, yogaclass = make_user(), make_class()
+    start = datetime(2024, 1, 1, 9, 0)
+    with db.get_session() as session:
+        for i in range(25):
+            session.add(db.Payment(
+                student_id=student.id, yogaclass_id=yogaclass.id, amount=10.0 + i,
+                paid_at=start + timedelta(hours=i // 4),
+                status="refunded" if i % 5 == 0 else "paid",
+            ))
+        session.commit()
+        # The full order the pages must reproduce
+        return [p.id for p in session.exec(
+            db.select(db.Payment).order_by(db.Payment.paid_at.desc(), db.Payment.id.desc())
+        ).all()]
+
+
+def walk_forward(page_size, **filters):
+    pages, cursor = [], None
+    while True:
+        page = db.get_payments_page(page_size, cursor, **filters)
+        pages.append(page)
+        if not page.has_next:
+            return pages
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        (datetime(2024, 3, 1, 10, 30, 15, 123456), 7),
+        (date(2024, 3, 1), "text", 1.5, None),
+    ],
+)
+def test_cursor_round_trip(key):
+    columns = [object()] * len(key)
+    for direction in ("next", "prev"):
+        cursor = encode_cursor(direction, key, columns)
+        assert decode_cursor(cursor, columns) == (direction, key)
+
+
+def test_cursor_of_another_sort_is_rejected():
+    cursor = encode_cursor("next", (datetime(2024, 1, 1), 1), [c for c, _ in ORDER])
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, [db.User.created_at, db.User.id])
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor", [c for c, _ in ORDER])
+
+
+@pytest.mark.parametrize("page_size", [1, 3, 4, 7, 25, 50])
+def test_pages_neither_overlap_nor_skip_ties(payments, page_size):
+    pages = walk_forward(page_size)
+
+    seen = [row.id for page in pages for row in page.rows]
+    assert seen == payments
+    assert all(len(page.rows) == page_size for page in pages[:-1])
+    assert not pages[0].has_prev
+    assert all(page.has_prev for page in pages[1:])
+
+
+def test_prev_cursor_returns_the_previous_page(payments):
+    pages = walk_forward(6)
+
+    for earlier, later in zip(pages, pages[1:]):
+        back = db.get_payments_page(6, later.prev_cursor)
+        assert [row.id for row in back.rows] == [row.id for row in earlier.rows]
+        assert back.has_next
+    first = db.get_payments_page(6, pages[1].prev_cursor)
+    assert not first.has_prev
+
+
+def test_filtered_pages_and_total(payments):
+    pages = walk_forward(4, status="paid")
+
+    rows = [row for page in pages for row in page.rows]
+    assert all(row.status == "paid" for row in rows)
+    with db.get_session() as session:
+        refunded = set(session.exec(
+            db.select(db.Payment.id).where(db.Payment.status == "refunded")
+        ).all())
+    assert [row.id for row in rows] == [id_ for id_ in payments if id_ not in refunded]
+    assert (pages[0].total_estimate, pages[0].total_is_exact) == (len(rows), True)
+
+
+def test_ascending_order(payments):
+    order = [(db.Payment.paid_at, False), (db.Payment.id, False)]
+    seen, cursor = [], None
+    with db.get_session() as session:
+        while True:
+            page = paginate(session, db.select(db.Payment), order, 5, cursor)
+            seen += [row.id for row in page.rows]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+    assert seen == list(reversed(payments))
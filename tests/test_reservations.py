@@ -0,0 +1,73 @@
+"""
+Add_Reservation: seats are claimed atomically and never oversold.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import database.db as db
+
+
+def seats_taken(class_id):
+    return db.get_class_by_id(class_id).current_capacity
+
+
+def active_reservations(class_id):
+    return [r for r in db.get_reservations_by_class(class_id) if r.status == "active"]
+
+
+def test_reservation_takes_a_seat(make_user, make_class):
+    student = make_user()
+    yogaclass = make_class(max_capacity=2)
+
+    reserve = db.Add_Reservation(student.id, yogaclass.id)
+
+    assert reserve is not None
+    assert (reserve.student_id, reserve.yogaclass_id) == (student.id, yogaclass.id)
+    assert reserve.status == "active"
+    assert seats_taken(yogaclass.id) == 1
+
+
+def test_duplicate_booking_returns_none_and_gives_the_seat_back(make_user, make_class):
+    student = make_user()
+    yogaclass = make_class(max_capacity=5)
+
+    assert db.Add_Reservation(student.id, yogaclass.id) is not None
+    assert db.Add_Reservation(student.id, yogaclass.id) is None
+
+    assert seats_taken(yogaclass.id) == 1
+    assert len(active_reservations(yogaclass.id)) == 1
+
+
+def test_full_class_returns_none(make_user, make_class):
+    yogaclass = make_class(max_capacity=2)
+    first, second, late = make_user(), make_user(), make_user()
+
+    assert db.Add_Reservation(first.id, yogaclass.id) is not None
+    assert db.Add_Reservation(second.id, yogaclass.id) is not None
+    assert db.Add_Reservation(late.id, yogaclass.id) is None
+
+    assert seats_taken(yogaclass.id) == 2
+    assert {r.student_id for r in active_reservations(yogaclass.id)} == {
+        first.id, second.id
+    }
+
+
+def test_missing_class_returns_none(make_user, database):
+    assert db.Add_Reservation(make_user().id, 999) is None
+
+
+def test_concurrent_bookings_never_exceed_capacity(make_user, make_class):
+    yogaclass = make_class(max_capacity=3)
+    students = [make_user() for _ in range(12)]
+    # Every student tries twice, from different threads
+    attempts = [student.id for student in students] * 2
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(
+            lambda student_id: db.Add_Reservation(student_id, yogaclass.id), attempts
+        ))
+
+    booked = active_reservations(yogaclass.id)
+    assert sum(result is not None for result in results) == 3
+    assert len(booked) == 3
+    assert len({r.student_id for r in booked}) == 3
+    assert seats_taken(yogaclass.id) == 3
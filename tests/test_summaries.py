@@ -0,0 +1,103 @@
+"""
+Summary tables: the incremental updates of the write helpers agree with
+rebuild_summaries() recomputing them from the raw rows.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import database.db as db
+
+SUMMARIES = (db.DailyRevenueSummary, db.DailyActivitySummary, db.ClassSummary)
+
+
+def snapshot():
+    """Every non-empty summary row, keyed by table and primary key."""
+    rows = {}
+    with db.get_session() as session:
+        for model in SUMMARIES:
+            keys = [column.name for column in model.__table__.primary_key]
+            for row in session.exec(db.select(model)).all():
+                values = row.model_dump()
+                counters = {k: v for k, v in values.items() if k not in keys}
+                # Incremental updates can leave rows counted back down to zero
+                if any(counters.values()):
+                    key = (model.__name__, *(values[k] for k in keys))
+                    rows[key] = {k: pytest.approx(v) for k, v in counters.items()}
+    return rows
+
+
+def assert_matches_rebuild():
+    incremental = snapshot()
+    db.rebuild_summaries()
+    assert incremental == snapshot()
+
+
+@pytest.fixture
+def activity(make_user, make_class, teacher):
+    """Two centers, classes on several days and a handful of students."""
+    other = db.add_center("Otro centro", "Calle 2", "555-0001")
+    start = datetime(2024, 6, 3, 8, 0)
+    classes = [make_class(max_capacity=3, scheduled_at=start + timedelta(days=d), price=15.0)
+               for d in range(3)]
+    classes.append(db.Add_YogaClass(start, 3, teacher.id, other.id, price=20.0))
+    students = [make_user().id for _ in range(5)]
+    return [c.id for c in classes], students
+
+
+def test_bookings_attendance_and_payments(activity):
+    classes, students = activity
+    for class_id in classes:
+        for student_id in students:
+            db.Add_Reservation(student_id, class_id)  # the last two find it full
+        db.Add_Reservation(students[0], class_id)  # duplicate
+    for class_id in classes[:3]:
+        db.save_class_attendance(class_id, [
+            (students[0], "present"), (students[1], "late"), (students[2], "absent"),
+        ])
+    db.save_class_attendance(classes[0], [
+        (students[0], "absent"), (students[1], "present"), (students[3], "present"),
+    ])
+    db.Add_Attendance(students[4], classes[3])
+    payments = [
+        db.Add_Payment(student_id, class_id, 15.0 + i, method)
+        for i, (class_id, student_id, method) in enumerate([
+            (classes[0], students[0], "cash"),
+            (classes[0], students[1], "card"),
+            (classes[1], students[0], "cash"),
+            (classes[3], students[2], "transfer"),
+        ])
+    ]
+    db.update_payment_status(payments[1].id, "refunded")
+    db.update_payment_status(payments[2].id, "pending")
+    db.update_payment_status(payments[2].id, "paid")
+
+    assert_matches_rebuild()
+
+
+def test_helpers_inside_a_unit_of_work(activity):
+    classes, students = activity
+    with db.unit_of_work():
+        for student_id in students[:3]:
+            db.Add_Reservation(student_id, classes[2])
+            db.Add_Payment(student_id, classes[2], 15.0)
+        db.save_class_attendance(classes[2], [(students[0], "present")])
+    db.Add_Reservation(students[0], classes[1])
+    db.Add_Payment(students[0], classes[1], 15.0)
+
+    assert_matches_rebuild()
+
+
+def test_rolled_back_unit_of_work_leaves_no_counts(activity):
+    classes, students = activity
+    db.Add_Reservation(students[0], classes[0])
+    with pytest.raises(RuntimeError):
+        with db.unit_of_work():
+            db.Add_Reservation(students[1], classes[0])
+            db.Add_Payment(students[1], classes[0], 15.0)
+            raise RuntimeError("abort")
+
+    with db.get_session() as session:
+        summary = session.get(db.ClassSummary, classes[0])
+    assert (summary.bookings, summary.payments) == (1, 0)
+    assert_matches_rebuild()
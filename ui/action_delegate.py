@@ -0,0 +1,137 @@
+"""
+Painted action buttons for a table column.
+
+Instead of a QWidget with its own layout and QPushButtons in every row
+(setIndexWidget/setCellWidget), ``ActionDelegate`` draws the buttons with
+the style's push-button primitive and finds the clicked one by hit-testing
+the mouse position against the same rectangles. Only visible rows are ever
+painted and no per-row objects exist, so memory and paint time do not grow
+with the number of rows, and sorting, filtering or scrolling a model never
+has to create or reparent widgets.
+
+A click is reported once for the whole column through ``triggered(name,
+index)``; the screen maps the index to its row id.
+"""
+from typing import NamedTuple
+
+from PyQt6.QtCore import QEvent, QModelIndex, QRect, QSize, Qt, pyqtSignal
+from PyQt6.QtWidgets import (
+    QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton, QToolTip,
+)
+
+BUTTON_SIZE = 30
+BUTTON_SPACING = 4
+
+
+class Action(NamedTuple):
+    """One button: the name sent with `triggered`, its text and tooltip."""
+    name: str
+    text: str
+    tooltip: str
+
+
+EDIT_DELETE = [Action("edit", "✏️", "Editar"), Action("delete", "🗑️", "Eliminar")]
+
+
+class ActionDelegate(QStyledItemDelegate):
+    """Draws `actions` as buttons in every cell of a column and reports clicks."""
+
+    triggered = pyqtSignal(str, QModelIndex)
+
+    def __init__(self, view, column, actions=EDIT_DELETE):
+        super().__init__(view)
+        self.view = view
+        self.column = column
+        self.actions = list(actions)
+        # (row, action) under the mouse and pressed, for the button states
+        self.hovered = None
+        self.pressed = None
+        view.setItemDelegateForColumn(column, self)
+        # Hover feedback needs move events without a pressed button
+        view.setMouseTracking(True)
+        view.entered.connect(self._left_column)
+
+    def _left_column(self, index):
+        # editorEvent only sees this column: clear the hover when moving away
+        if index.column() != self.column and self.hovered is not None:
+            self.hovered = None
+            self.view.viewport().update()
+
+    # <------------------- Geometry ------------------>
+    def button_rects(self, cell: QRect) -> list[QRect]:
+        """Rectangle of each action inside `cell`, centered."""
+        size = min(BUTTON_SIZE, cell.height())
+        width = len(self.actions) * size + (len(self.actions) - 1) * BUTTON_SPACING
+        x = cell.x() + max(0, (cell.width() - width) // 2)
+        y = cell.y() + (cell.height() - size) // 2
+        return [
+            QRect(x + i * (size + BUTTON_SPACING), y, size, size)
+            for i in range(len(self.actions))
+        ]
+
+    def action_at(self, cell: QRect, position) -> int | None:
+        """Index of the action whose button contains `position`, or None."""
+        for i, rect in enumerate(self.button_rects(cell)):
+            if rect.contains(position):
+                return i
+        return None
+
+    def sizeHint(self, option, index):
+        hint = super().sizeHint(option, index)
+        width = len(self.actions) * (BUTTON_SIZE + BUTTON_SPACING) + BUTTON_SPACING
+        return QSize(max(hint.width(), width), max(hint.height(), BUTTON_SIZE + 2))
+
+    # <------------------- Painting ------------------>
+    def paint(self, painter, option, index):
+        # Cell background and selection as the style draws them, without text
+        self.initStyleOption(option, index)
+        option.text = ""
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, option, painter, option.widget)
+
+        for i, (action, rect) in enumerate(zip(self.actions, self.button_rects(option.rect))):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = action.text
+            button.state = QStyle.StateFlag.State_Enabled
+            if self.hovered == (index.row(), i):
+                button.state |= QStyle.StateFlag.State_MouseOver
+                if self.pressed == self.hovered:
+                    button.state |= QStyle.StateFlag.State_Sunken
+            else:
+                button.state |= QStyle.StateFlag.State_Raised
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    # <------------------- Mouse ------------------>
+    def editorEvent(self, event, model, option, index):
+        kind = event.type()
+        if kind not in (QEvent.Type.MouseMove, QEvent.Type.MouseButtonPress,
+                        QEvent.Type.MouseButtonRelease, QEvent.Type.MouseButtonDblClick):
+            return super().editorEvent(event, model, option, index)
+
+        hit = self.action_at(option.rect, event.position().toPoint())
+        target = (index.row(), hit) if hit is not None else None
+        if target != self.hovered:
+            self.hovered = target
+            self.view.viewport().update()
+
+        if event.button() != Qt.MouseButton.LeftButton:
+            return kind != QEvent.Type.MouseMove and target is not None
+        if kind in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonDblClick):
+            self.pressed = target
+            return target is not None
+        # Release: a click only if it ends on the button it started on
+        clicked = target is not None and target == self.pressed
+        self.pressed = None
+        self.view.viewport().update()
+        if clicked:
+            self.triggered.emit(self.actions[hit].name, QModelIndex(index))
+        return target is not None
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.Type.ToolTip:
+            hit = self.action_at(option.rect, event.pos())
+            if hit is not None:
+                QToolTip.showText(event.globalPos(), self.actions[hit].tooltip, view)
+                return True
+        return super().helpEvent(event, view, option, index)
@@ -7,12 +7,81 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import QDate, Qt
 from PyQt6.QtGui import QColor
 from datetime import datetime, timedelta
-from database.db import get_session, select, YogaClass, User, Attendance, Reserve, Role
+from database.db import (
+    get_session, select, YogaClass, User, Attendance, Reserve, Role,
+    get_class_by_id, save_class_attendance,
+)
+from ui.task_runner import LoadingIndicator, TaskRunner
+
+
+def query_teacher_classes(teacher_id, selected_date):
+    """[(id, fecha)] de las clases del profesor en el día."""
+    session = get_session()
+    try:
+        classes = session.exec(
+            select(YogaClass).where(
+                YogaClass.teacher_id == teacher_id,
+                YogaClass.scheduled_at >= datetime.combine(selected_date, datetime.min.time()),
+                YogaClass.scheduled_at < datetime.combine(selected_date + timedelta(days=1), datetime.min.time())
+            ).order_by(YogaClass.scheduled_at.asc())
+        ).all()
+        return [(yoga_class.id, yoga_class.scheduled_at) for yoga_class in classes]
+    finally:
+        session.close()
+
+
+def query_class_attendance(class_id):
+    """(info de la clase o None, [(id, nombre, email, estado o None)]) de los inscritos."""
+    session = get_session()
+    try:
+        # Obtener información de la clase
+        info = None
+        yoga_class = session.get(YogaClass, class_id)
+        if yoga_class:
+            teacher = session.get(User, yoga_class.teacher_id)
+            info = {
+                "id": yoga_class.id,
+                "scheduled_at": yoga_class.scheduled_at,
+                "teacher_name": teacher.name if teacher else "Desconocido",
+                "current_capacity": yoga_class.current_capacity,
+                "max_capacity": yoga_class.max_capacity,
+            }
+
+        # Obtener alumnos inscritos en esta clase
+        reservations = session.exec(
+            select(Reserve).where(
+                Reserve.yogaclass_id == class_id,
+                Reserve.status == "active"
+            )
+        ).all()
+
+        student_ids = [r.student_id for r in reservations]
+        if not student_ids:
+            return info, []
+
+        students = session.exec(
+            select(User).where(User.id.in_(student_ids)).order_by(User.name.asc())
+        ).all()
+
+        # Obtener asistencia existente
+        attendances = session.exec(
+            select(Attendance).where(Attendance.yogaclass_id == class_id)
+        ).all()
+        status_by_student = {a.student_id: a.status for a in attendances}
+
+        return info, [
+            (student.id, student.name, student.email, status_by_student.get(student.id))
+            for student in students
+        ]
+    finally:
+        session.close()
+
 
 class AttendanceWidget(QWidget):
     def __init__(self, user):
         super().__init__()
         self.current_user = user
+        self.runner = TaskRunner(self)
         self.init_ui()
         self.load_classes_by_date(self.date_input.date())
 
@@ -113,6 +182,7 @@ class AttendanceWidget(QWidget):
         self.stats_label = QLabel("👥 0 alumnos | ✅ 0 presentes | ❌ 0 ausentes")
         self.stats_label.setStyleSheet("font-size: 14px; padding: 10px; background-color: #f8f9fa; border-radius: 5px;")
 
+        layout.addWidget(LoadingIndicator(self.runner))
         layout.addWidget(self.attendance_table)
         layout.addWidget(notes_group)
         layout.addWidget(self.stats_label)
@@ -122,117 +192,85 @@ class AttendanceWidget(QWidget):
 
     def load_classes_by_date(self, date):
         """Cargar clases del profesor para la fecha seleccionada."""
-        session = get_session()
-        try:
-            selected_date = date.toPyDate()
-            classes = session.exec(
-                select(YogaClass).where(
-                    YogaClass.teacher_id == self.current_user.id,
-                    YogaClass.scheduled_at >= datetime.combine(selected_date, datetime.min.time()),
-                    YogaClass.scheduled_at < datetime.combine(selected_date + timedelta(days=1), datetime.min.time())
-                ).order_by(YogaClass.scheduled_at.asc())
-            ).all()
-
+        def show(classes):
             self.class_combo.clear()
             self.class_combo.addItem("-- Seleccione una clase --", None)
 
-            for yoga_class in classes:
+            for class_id, scheduled_at in classes:
                 # Verificar si la clase ya pasó
-                class_time = yoga_class.scheduled_at
                 current_time = datetime.now()
 
-                time_status = "🟢" if class_time > current_time else "🔴"
+                time_status = "🟢" if scheduled_at > current_time else "🔴"
                 self.class_combo.addItem(
-                    f"{time_status} Clase {yoga_class.id} - {yoga_class.scheduled_at.strftime('%H:%M')}",
-                    yoga_class.id
+                    f"{time_status} Clase {class_id} - {scheduled_at.strftime('%H:%M')}",
+                    class_id
                 )
-        finally:
-            session.close()
+
+        self.runner.submit(
+            "classes", query_teacher_classes, self.current_user.id, date.toPyDate(),
+            on_result=show, on_error=self.show_load_error,
+        )
+
+    def show_load_error(self, error):
+        QMessageBox.critical(self, "❌ Error", f"No se pudo cargar la asistencia:\n{str(error)}")
 
     def load_attendance_for_class(self):
         """Cargar asistencia para la clase seleccionada."""
         class_id = self.class_combo.currentData()
         if not class_id:
+            self.runner.cancel("attendance")
             self.attendance_table.setRowCount(0)
             self.class_info_label.setText("Seleccione una clase")
             self.update_stats()
             return
 
-        session = get_session()
-        try:
-            # Obtener información de la clase
-            yoga_class = session.get(YogaClass, class_id)
-            if yoga_class:
-                teacher = session.get(User, yoga_class.teacher_id)
-                teacher_name = teacher.name if teacher else "Desconocido"
-                self.class_info_label.setText(
-                    f"🎯 Clase {yoga_class.id} | 🕒 {yoga_class.scheduled_at.strftime('%H:%M')} | "
-                    f"👨‍🏫 {teacher_name} | 👥 {yoga_class.current_capacity}/{yoga_class.max_capacity}"
-                )
-
-            # Obtener alumnos inscritos en esta clase
-            reservations = session.exec(
-                select(Reserve).where(
-                    Reserve.yogaclass_id == class_id,
-                    Reserve.status == "active"
-                )
-            ).all()
-
-            student_ids = [r.student_id for r in reservations]
-
-            if student_ids:
-                students = session.exec(
-                    select(User).where(User.id.in_(student_ids)).order_by(User.name.asc())
-                ).all()
-
-                # Obtener asistencia existente
-                attendances = session.exec(
-                    select(Attendance).where(Attendance.yogaclass_id == class_id)
-                ).all()
-
-                attendance_dict = {a.student_id: a for a in attendances}
-
-                self.attendance_table.setRowCount(len(students))
+        self.runner.submit(
+            "attendance", query_class_attendance, class_id,
+            on_result=self.show_class_attendance, on_error=self.show_load_error,
+        )
+
+    def show_class_attendance(self, result):
+        info, students = result
+        if info:
+            self.class_info_label.setText(
+                f"🎯 Clase {info['id']} | 🕒 {info['scheduled_at'].strftime('%H:%M')} | "
+                f"👨‍🏫 {info['teacher_name']} | 👥 {info['current_capacity']}/{info['max_capacity']}"
+            )
 
-                for row, student in enumerate(students):
-                    # ID
-                    self.attendance_table.setItem(row, 0, QTableWidgetItem(str(student.id)))
+        if students:
+            self.attendance_table.setRowCount(len(students))
 
-                    # Nombre
-                    self.attendance_table.setItem(row, 1, QTableWidgetItem(student.name))
+            for row, (student_id, name, email, status) in enumerate(students):
+                # ID
+                self.attendance_table.setItem(row, 0, QTableWidgetItem(str(student_id)))
 
-                    # Email
-                    self.attendance_table.setItem(row, 2, QTableWidgetItem(student.email or ""))
+                # Nombre
+                self.attendance_table.setItem(row, 1, QTableWidgetItem(name))
 
-                    # Checkbox para asistencia
-                    attended_checkbox = QCheckBox()
-                    attended_checkbox.setStyleSheet("QCheckBox { margin-left: 50%; margin-right: 50%; }")
+                # Email
+                self.attendance_table.setItem(row, 2, QTableWidgetItem(email or ""))
 
-                    if student.id in attendance_dict:
-                        attendance = attendance_dict[student.id]
-                        attended_checkbox.setChecked(attendance.status == "present")
-                        if attendance.status == "late":
-                            attended_checkbox.setText("Tarde")
-                    else:
-                        # Por defecto, marcar como presente si la clase ya pasó
-                        if yoga_class and yoga_class.scheduled_at < datetime.now():
-                            attended_checkbox.setChecked(True)
+                # Checkbox para asistencia
+                attended_checkbox = QCheckBox()
+                attended_checkbox.setStyleSheet("QCheckBox { margin-left: 50%; margin-right: 50%; }")
 
-                    self.attendance_table.setCellWidget(row, 3, attended_checkbox)
+                if status is not None:
+                    attended_checkbox.setChecked(status == "present")
+                    if status == "late":
+                        attended_checkbox.setText("Tarde")
+                else:
+                    # Por defecto, marcar como presente si la clase ya pasó
+                    if info and info["scheduled_at"] < datetime.now():
+                        attended_checkbox.setChecked(True)
 
-                    # Observaciones
-                    notes_item = QTableWidgetItem()
-                    if student.id in attendance_dict:
-                        attendance = attendance_dict[student.id]
-                        # Podríamos agregar un campo de observaciones en el modelo Attendance
-                        pass
-                    self.attendance_table.setItem(row, 4, notes_item)
-            else:
-                self.attendance_table.setRowCount(0)
-                self.class_info_label.setText("No hay alumnos inscritos en esta clase")
+                self.attendance_table.setCellWidget(row, 3, attended_checkbox)
 
-        finally:
-            session.close()
+                # Observaciones
+                # Podríamos agregar un campo de observaciones en el modelo Attendance
+                self.attendance_table.setItem(row, 4, QTableWidgetItem())
+        else:
+            self.attendance_table.setRowCount(0)
+            self.class_info_label.setText("No hay alumnos inscritos en esta clase")
 
         self.update_stats()
 
@@ -272,82 +310,47 @@ class AttendanceWidget(QWidget):
             QMessageBox.warning(self, "Error", "Seleccione una clase primero")
             return
 
-        session = get_session()
-        try:
-            yoga_class = session.get(YogaClass, class_id)
-            if not yoga_class:
-                QMessageBox.warning(self, "Error", "Clase no encontrada")
-                return
-
-            for row in range(self.attendance_table.rowCount()):
-                student_id_item = self.attendance_table.item(row, 0)
-                if not student_id_item:
-                    continue
-
-                student_id = int(student_id_item.text())
-                checkbox = self.attendance_table.cellWidget(row, 3)
-                notes_item = self.attendance_table.item(row, 4)
-                notes = notes_item.text() if notes_item else ""
-
-                if not checkbox:
-                    continue
-
-                # Buscar registro de asistencia existente
-                attendance = session.exec(
-                    select(Attendance).where(
-                        Attendance.student_id == student_id,
-                        Attendance.yogaclass_id == class_id
-                    )
-                ).first()
-
-                if checkbox.isChecked():
-                    status = "present"
-                    if checkbox.text() == "Tarde":
-                        status = "late"
-
-                    if not attendance:
-                        # Crear nueva asistencia
-                        attendance = Attendance(
-                            student_id=student_id,
-                            yogaclass_id=class_id,
-                            attended_at=datetime.now(),
-                            status=status
-                        )
-                        session.add(attendance)
-                    else:
-                        # Actualizar asistencia existente
-                        attendance.attended_at = datetime.now()
-                        attendance.status = status
-                else:
-                    if attendance:
-                        # Marcar como ausente
-                        attendance.status = "absent"
-                        attendance.attended_at = None
-
-            session.commit()
-
-            # Registrar observaciones si las hay
-            notes_text = self.notes_text.toPlainText().strip()
-            if notes_text:
-                # Podríamos guardar esto en una tabla de observaciones de clase
-                pass
+        yoga_class = get_class_by_id(class_id)
+        if not yoga_class:
+            QMessageBox.warning(self, "Error", "Clase no encontrada")
+            return
 
-            QMessageBox.information(
-                self,
-                "✅ Asistencia Guardada",
-                f"La asistencia de {self.attendance_table.rowCount()} alumnos ha sido guardada correctamente.\n\n"
-                f"Clase: {yoga_class.id}\n"
-                f"Fecha: {yoga_class.scheduled_at.strftime('%Y-%m-%d %H:%M')}"
-            )
+        # (alumno, estado) de toda la lista; se guarda en una sola sentencia
+        roster = []
+        for row in range(self.attendance_table.rowCount()):
+            student_id_item = self.attendance_table.item(row, 0)
+            checkbox = self.attendance_table.cellWidget(row, 3)
+            if not student_id_item or not checkbox:
+                continue
 
-            self.load_attendance_for_class()  # Recargar para mostrar cambios
+            if checkbox.isChecked():
+                status = "late" if checkbox.text() == "Tarde" else "present"
+            else:
+                status = "absent"
+            roster.append((int(student_id_item.text()), status))
 
+        try:
+            save_class_attendance(class_id, roster)
         except Exception as e:
-            session.rollback()
             QMessageBox.critical(
                 self,
                 "❌ Error",
                 f"No se pudo guardar la asistencia:\n{str(e)}"
             )
-        finally:
-            session.close()
+            return
+
+        # Registrar observaciones si las hay
+        notes_text = self.notes_text.toPlainText().strip()
+        if notes_text:
+            # Podríamos guardar esto en una tabla de observaciones de clase
+            pass
+
+        QMessageBox.information(
+            self,
+            "✅ Asistencia Guardada",
+            f"La asistencia de {self.attendance_table.rowCount()} alumnos ha sido guardada correctamente.\n\n"
+            f"Clase: {yoga_class.id}\n"
+            f"Fecha: {yoga_class.scheduled_at.strftime('%Y-%m-%d %H:%M')}"
+        )
+
+        self.load_attendance_for_class()  # Recargar para mostrar cambios
@@ -1,15 +1,21 @@
+from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QTableWidget, QTableWidgetItem,
     QHeaderView, QMessageBox, QDialog, QFormLayout,
     QDialogButtonBox, QLineEdit
 )
-from database.db import get_session, select, Center, add_center, Role, delete_center, update_center
+from database.db import (
+    get_session, Center, add_center, Role, delete_center, update_center, get_all_centers
+)
+from ui.action_delegate import ActionDelegate
+from ui.task_runner import LoadingIndicator, TaskRunner
 
 class CenterManagementWidget(QWidget):
     def __init__(self, user):
         super().__init__()
         self.current_user = user
+        self.runner = TaskRunner(self)
         self.init_ui()
         self.load_centers()
 
@@ -36,18 +42,22 @@ class CenterManagementWidget(QWidget):
             "ID", "Nombre", "Dirección", "Teléfono", "Acciones"
         ])
         self.centers_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        if self.current_user.role in [Role.ADMINISTRATOR, Role.RECEPTIONIST]:
+            # Botones de acción pintados por el delegado: ningún widget por fila
+            self.actions_delegate = ActionDelegate(self.centers_table, 4)
+            self.actions_delegate.triggered.connect(self.center_action)
 
         layout.addLayout(toolbar)
+        layout.addWidget(LoadingIndicator(self.runner))
         layout.addWidget(self.centers_table)
         self.setLayout(layout)
 
     def load_centers(self):
-        session = get_session()
-        try:
-            centers = session.exec(select(Center)).all()
-            self.display_centers(centers)
-        finally:
-            session.close()
+        self.runner.submit(
+            "centers", get_all_centers,
+            on_result=self.display_centers,
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Error al cargar centros: {str(e)}"),
+        )
 
     def display_centers(self, centers):
         self.centers_table.setRowCount(len(centers))
@@ -58,31 +68,20 @@ class CenterManagementWidget(QWidget):
             self.centers_table.setItem(row, 2, QTableWidgetItem(center.address))
             self.centers_table.setItem(row, 3, QTableWidgetItem(center.phone))
 
-            if self.current_user.role in [
-            Role.ADMINISTRATOR,
-            Role.RECEPTIONIST,
-            ]:
-                # Botones de acción
-                action_widget = QWidget()
-                action_layout = QHBoxLayout()
-                action_layout.setContentsMargins(0, 0, 0, 0)
-
-                edit_btn = QPushButton("✏️")
-                edit_btn.setFixedSize(30, 30)
-                edit_btn.clicked.connect(
-                    lambda checked, center_id=center.id: self.edit_center(center_id)
-                )
-
-                delete_btn = QPushButton("🗑️")
-                delete_btn.setFixedSize(30, 30)
-                delete_btn.clicked.connect(
-                    lambda checked, center_id=center.id: self.delete_center(center_id)
-                )
-
-                action_layout.addWidget(edit_btn)
-                action_layout.addWidget(delete_btn)
-                action_widget.setLayout(action_layout)
-                self.centers_table.setCellWidget(row, 4, action_widget)
+            # Id del centro para los botones que pinta el delegado
+            actions_item = QTableWidgetItem()
+            actions_item.setData(Qt.ItemDataRole.UserRole, center.id)
+            actions_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
+            self.centers_table.setItem(row, 4, actions_item)
+
+    def center_action(self, name, index):
+        center_id = index.data(Qt.ItemDataRole.UserRole)
+        if center_id is None:
+            return
+        if name == "edit":
+            self.edit_center(center_id)
+        elif name == "delete":
+            self.delete_center(center_id)
 
     def edit_center(self, center_id):
         dialog = EditCenterDialog(center_id, self)
@@ -1,13 +1,62 @@
-from PyQt6.QtCore import QDateTime
+from PyQt6.QtCore import QDate, QDateTime
 from PyQt6.QtWidgets import (
-    QComboBox, QDateTimeEdit, QDialog, QDialogButtonBox,
-    QFormLayout, QHBoxLayout, QHeaderView, QLabel,
-    QMessageBox, QPushButton, QSpinBox, QTableWidget,
-    QTableWidgetItem, QVBoxLayout, QWidget, QDoubleSpinBox
+    QCheckBox, QComboBox, QDateEdit, QDateTimeEdit, QDialog, QDialogButtonBox,
+    QFormLayout, QHBoxLayout, QLabel,
+    QMessageBox, QPushButton, QSpinBox, QTableView,
+    QVBoxLayout, QWidget, QDoubleSpinBox
 )
 
-from database.db import Center, Role, User, YogaClass, get_session, select
+from database.db import (
+    Center, Role, User, YogaClass, expand_weekly, find_teacher_conflicts,
+    get_center_refs, get_session, get_user_refs, select,
+)
+from models.view_models import Column, SqlTableModel, attach_table_view
 from services.services import ClassService
+from ui.action_delegate import ActionDelegate
+from ui.task_runner import LoadingIndicator, TaskRunner
+
+
+def _teacher_name(yoga_class, loader):
+    teacher = loader.get(User, yoga_class.teacher_id)
+    return teacher.name if teacher else "No asignado"
+
+
+def _center_name(yoga_class, loader):
+    center = loader.get(Center, yoga_class.center_id)
+    return center.name if center else "Desconocido"
+
+
+def _prefetch_class_refs(loader, classes):
+    loader.register(User, (c.teacher_id for c in classes))
+    loader.register(Center, (c.center_id for c in classes))
+
+
+CLASS_COLUMNS = [
+    Column("ID", lambda c, _: str(c.id), sort=YogaClass.id),
+    Column(
+        "Fecha/Hora", lambda c, _: c.scheduled_at.strftime("%Y-%m-%d %H:%M"),
+        sort=YogaClass.scheduled_at,
+    ),
+    Column("Profesor", _teacher_name),
+    Column("Centro", _center_name),
+    Column("Capacidad", lambda c, _: str(c.max_capacity), sort=YogaClass.max_capacity),
+    Column("Disponibles", lambda c, _: str(c.max_capacity - c.current_capacity)),
+]
+ACTIONS_COLUMN = len(CLASS_COLUMNS)
+
+WEEKDAY_LABELS = ["L", "M", "X", "J", "V", "S", "D"]
+# Conflictos que se listan al avisar de solapamientos
+MAX_LISTED_CONFLICTS = 10
+
+
+def _conflicts_message(conflicts):
+    listed = "\n".join(
+        f"• {when.strftime('%Y-%m-%d %H:%M')}" for when in conflicts[:MAX_LISTED_CONFLICTS]
+    )
+    more = len(conflicts) - MAX_LISTED_CONFLICTS
+    if more > 0:
+        listed += f"\n... y {more} más"
+    return f"El profesor ya tiene clases en estos horarios:\n{listed}"
 
 
 class ClassManagementWidget(QWidget):
@@ -20,6 +69,7 @@ class ClassManagementWidget(QWidget):
 
     def init_ui(self):
         layout = QVBoxLayout()
+        self.runner = TaskRunner(self)
 
         # Barra de herramientas
         toolbar = QHBoxLayout()
@@ -35,108 +85,44 @@ class ClassManagementWidget(QWidget):
         toolbar.addWidget(refresh_btn)
         toolbar.addStretch()
 
-        # Tabla de clases
-        self.classes_table = QTableWidget()
-        self.classes_table.setColumnCount(7)
-        self.classes_table.setHorizontalHeaderLabels(
-            [
-                "ID",
-                "Fecha/Hora",
-                "Profesor",
-                "Centro",
-                "Capacidad",
-                "Disponibles",
-                "Acciones",
-            ]
+        # Tabla de clases (carga por ventanas desde la base de datos)
+        can_edit = self.current_user.role in [Role.ADMINISTRATOR, Role.RECEPTIONIST]
+        actions = Column("Acciones", lambda c, _: "" if can_edit else "-")
+        self.classes_model = SqlTableModel(
+            CLASS_COLUMNS + [actions], YogaClass.id,
+            order_by=[(YogaClass.scheduled_at, True)],
+            prefetch=_prefetch_class_refs,
+            runner=self.runner,
         )
-        self.classes_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch
+        self.classes_model.loadFailed.connect(
+            lambda e: QMessageBox.critical(self, "Error", f"Error al cargar clases: {str(e)}")
         )
+        self.classes_table = attach_table_view(QTableView(), self.classes_model)
+
+        if can_edit:
+            # Botones de acción pintados por el delegado: ningún widget por fila
+            self.actions_delegate = ActionDelegate(self.classes_table, ACTIONS_COLUMN)
+            self.actions_delegate.triggered.connect(self.class_action)
 
         layout.addLayout(toolbar)
+        layout.addWidget(LoadingIndicator(self.runner))
         layout.addWidget(self.classes_table)
         self.setLayout(layout)
 
     def load_classes(self):
-        session = get_session()
-        try:
-            classes = session.exec(select(YogaClass)).all()
-            self.display_classes(classes)
-        finally:
-            session.close()
-
-    def display_classes(self, classes):
-        self.classes_table.setRowCount(len(classes))
-
-        session = get_session()
-        try:
-            for row, yoga_class in enumerate(classes):
-                self.classes_table.setItem(
-                    row, 0, QTableWidgetItem(str(yoga_class.id))
-                )
-                self.classes_table.setItem(
-                    row, 1, QTableWidgetItem(yoga_class.scheduled_at.strftime("%Y-%m-%d %H:%M"))
-                )
-
-                # Obtener profesor
-                teacher = session.get(User, yoga_class.teacher_id)
-                teacher_name = teacher.name if teacher else "No asignado"
-                self.classes_table.setItem(
-                    row, 2, QTableWidgetItem(teacher_name)
-                )
-
-                # Obtener centro
-                center = session.get(Center, yoga_class.center_id)
-                center_name = center.name if center else "Desconocido"
-                self.classes_table.setItem(
-                    row, 3, QTableWidgetItem(center_name)
-                )
-
-                self.classes_table.setItem(
-                    row, 4, QTableWidgetItem(str(yoga_class.max_capacity))
-                )
-
-                # Calcular disponibilidad
-                available = (
-                    yoga_class.max_capacity - yoga_class.current_capacity
-                )
-                self.classes_table.setItem(
-                    row, 5, QTableWidgetItem(str(available))
-                )
-
-                # Botones de acción
-                if self.current_user.role in [
-                    Role.ADMINISTRATOR,
-                    Role.RECEPTIONIST,
-                ]:
-                    action_widget = QWidget()
-                    action_layout = QHBoxLayout()
-                    action_layout.setContentsMargins(0, 0, 0, 0)
-
-                    edit_btn = QPushButton("✏️")
-                    edit_btn.setFixedSize(30, 30)
-                    edit_btn.clicked.connect(
-                        lambda checked, class_id=yoga_class.id: self.edit_class(
-                            class_id
-                        )
-                    )
+        self.display_classes(select(YogaClass))
 
-                    delete_btn = QPushButton("🗑️")
-                    delete_btn.setFixedSize(30, 30)
-                    delete_btn.clicked.connect(
-                        lambda checked, class_id=yoga_class.id: self.delete_class(
-                            class_id
-                        )
-                    )
+    def display_classes(self, query):
+        self.classes_model.set_query(query)
 
-                    action_layout.addWidget(edit_btn)
-                    action_layout.addWidget(delete_btn)
-                    action_widget.setLayout(action_layout)
-                    self.classes_table.setCellWidget(row, 6, action_widget)
-                else:
-                    self.classes_table.setItem(row, 6, QTableWidgetItem("-"))
-        finally:
-            session.close()
+    def class_action(self, name, index):
+        class_id = self.classes_model.row_id(index.row())
+        if class_id is None:
+            return
+        if name == "edit":
+            self.edit_class(class_id)
+        elif name == "delete":
+            self.delete_class(class_id)
 
     def show_add_class_dialog(self):
         dialog = AddClassDialog(self.current_user, self)
@@ -149,6 +135,12 @@ class ClassManagementWidget(QWidget):
             self.load_classes()
 
     def delete_class(self, class_id):
+        from database.db import get_class_by_id
+        yoga_class = get_class_by_id(class_id)
+        if yoga_class and yoga_class.series_id:
+            self.cancel_series(yoga_class)
+            return
+
         reply = QMessageBox.question(
             self, "Confirmar",
             "¿Está seguro que desea eliminar esta clase?",
@@ -167,12 +159,48 @@ class ClassManagementWidget(QWidget):
                 QMessageBox.critical(self, "Error", f"No se pudo eliminar la clase: {str(e)}")
 
 
+    def cancel_series(self, yoga_class):
+        """Eliminar una clase de una serie, o la serie desde esa fecha."""
+        box = QMessageBox(self)
+        box.setWindowTitle("Clase recurrente")
+        box.setText("Esta clase forma parte de una serie semanal. ¿Qué desea eliminar?")
+        only_btn = box.addButton("Solo esta clase", QMessageBox.ButtonRole.AcceptRole)
+        series_btn = box.addButton("Esta y las siguientes", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton(QMessageBox.StandardButton.Cancel)
+        box.exec()
+
+        try:
+            if box.clickedButton() is only_btn:
+                from database.db import delete_class as db_delete_class
+                if db_delete_class(yoga_class.id):
+                    QMessageBox.information(self, "Éxito", "Clase eliminada correctamente")
+                else:
+                    QMessageBox.critical(self, "Error", "No se pudo eliminar la clase")
+            elif box.clickedButton() is series_btn:
+                from database.db import cancel_class_series
+                deleted, kept = cancel_class_series(
+                    yoga_class.series_id, from_date=yoga_class.scheduled_at
+                )
+                message = f"Se eliminaron {deleted} clases de la serie."
+                if kept:
+                    message += (
+                        f"\n{kept} clases con reservas o pagos se mantuvieron; "
+                        "revíselas antes de eliminarlas."
+                    )
+                QMessageBox.information(self, "Serie cancelada", message)
+            else:
+                return
+            self.load_classes()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudo eliminar la clase: {str(e)}")
+
+
 class AddClassDialog(QDialog):
     def __init__(self, user, parent=None):
         super().__init__(parent)
         self.user = user
         self.setWindowTitle("Nueva Clase")
-        self.setFixedSize(400, 350)
+        self.setFixedSize(400, 450)
         self.init_ui()
         self.load_teachers_and_centers()
 
@@ -203,6 +231,27 @@ class AddClassDialog(QDialog):
         self.teacher_share_input.setSuffix(" %")
         self.teacher_share_input.setDecimals(1)
 
+        # Serie semanal: la fecha de arriba es la primera clase
+        self.repeat_check = QCheckBox("🔁 Repetir semanalmente")
+        self.weekday_checks = []
+        weekdays_widget = QWidget()
+        weekdays_layout = QHBoxLayout()
+        weekdays_layout.setContentsMargins(0, 0, 0, 0)
+        for label in WEEKDAY_LABELS:
+            check = QCheckBox(label)
+            self.weekday_checks.append(check)
+            weekdays_layout.addWidget(check)
+        weekdays_widget.setLayout(weekdays_layout)
+
+        self.until_input = QDateEdit()
+        self.until_input.setCalendarPopup(True)
+        self.until_input.setDate(QDate.currentDate().addMonths(3))
+
+        self.repeat_check.toggled.connect(weekdays_widget.setEnabled)
+        self.repeat_check.toggled.connect(self.until_input.setEnabled)
+        weekdays_widget.setEnabled(False)
+        self.until_input.setEnabled(False)
+
         buttons = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok
             | QDialogButtonBox.StandardButton.Cancel
@@ -216,40 +265,35 @@ class AddClassDialog(QDialog):
         layout.addRow("Centro:", self.center_combo)
         layout.addRow("Precio:", self.price_input)
         layout.addRow("Porcentaje Profesor:", self.teacher_share_input)
+        layout.addRow(self.repeat_check)
+        layout.addRow("Días:", weekdays_widget)
+        layout.addRow("Hasta:", self.until_input)
         layout.addRow(buttons)
 
         self.setLayout(layout)
 
     def load_teachers_and_centers(self):
-        session = get_session()
-        try:
-            # Cargar profesores
-            teachers = session.exec(
-                select(User).where(User.role == Role.TEACHER)
-            ).all()
-            for teacher in teachers:
-                self.teacher_combo.addItem(teacher.name, teacher.id)
-
-            # Cargar centros
-            centers = session.exec(select(Center)).all()
-            for center in centers:
-                self.center_combo.addItem(center.name, center.id)
-
-            # Mostrar advertencia si no hay centros
-            if not centers:
-                QMessageBox.warning(self, "Advertencia",
-                                  "No hay centros creados. Por favor, cree un centro primero desde la pestaña 'Centros'.")
-                self.reject()
-                return
-
-            if not teachers:
-                QMessageBox.warning(self, "Advertencia",
-                                  "No hay profesores disponibles. Por favor, cree un profesor primero.")
-                self.reject()
-                return
+        # Cargar profesores y centros (caché de datos de referencia)
+        teachers = get_user_refs(Role.TEACHER)
+        for teacher in teachers:
+            self.teacher_combo.addItem(teacher.name, teacher.id)
+
+        centers = get_center_refs()
+        for center in centers:
+            self.center_combo.addItem(center.name, center.id)
+
+        # Mostrar advertencia si no hay centros
+        if not centers:
+            QMessageBox.warning(self, "Advertencia",
+                              "No hay centros creados. Por favor, cree un centro primero desde la pestaña 'Centros'.")
+            self.reject()
+            return
 
-        finally:
-            session.close()
+        if not teachers:
+            QMessageBox.warning(self, "Advertencia",
+                              "No hay profesores disponibles. Por favor, cree un profesor primero.")
+            self.reject()
+            return
 
     def create_class(self):
         scheduled_at = self.datetime_input.dateTime().toPyDateTime()
@@ -263,6 +307,12 @@ class AddClassDialog(QDialog):
             QMessageBox.warning(self, "Error", "Seleccione profesor y centro")
             return
 
+        if self.repeat_check.isChecked():
+            self.create_series(
+                scheduled_at, max_capacity, teacher_id, center_id, price, teacher_share
+            )
+            return
+
         try:
             from database.db import Add_YogaClass
             yoga_class = Add_YogaClass(
@@ -288,13 +338,58 @@ class AddClassDialog(QDialog):
             )
 
 
+    def create_series(self, first_class, max_capacity, teacher_id, center_id,
+                      price, teacher_share):
+        weekdays = [day for day, check in enumerate(self.weekday_checks) if check.isChecked()]
+        if not weekdays:
+            weekdays = [first_class.weekday()]
+        until = self.until_input.date().toPyDate()
+
+        occurrences = expand_weekly(first_class.date(), until, weekdays, first_class.time())
+        if not occurrences:
+            QMessageBox.warning(self, "Error", "La serie no contiene ninguna clase")
+            return
+
+        try:
+            conflicts = find_teacher_conflicts(teacher_id, occurrences)
+            if conflicts:
+                QMessageBox.warning(self, "Horario ocupado", _conflicts_message(conflicts))
+                return
+
+            from database.db import Add_ClassSeries
+            series = Add_ClassSeries(
+                weekdays=weekdays,
+                start_time=first_class.time(),
+                start_date=first_class.date(),
+                end_date=until,
+                max_capacity=max_capacity,
+                teacher_id=teacher_id,
+                center_id=center_id,
+                price=price,
+                teacher_share_percentage=teacher_share
+            )
+            if series:
+                QMessageBox.information(
+                    self, "Éxito", f"Serie creada: {len(occurrences)} clases"
+                )
+                self.accept()
+            else:
+                QMessageBox.critical(self, "Error", "No se pudo crear la serie")
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error", f"No se pudo crear la serie: {str(e)}"
+            )
+
+
 class EditClassDialog(QDialog):
     def __init__(self, class_id, user, parent=None):
         super().__init__(parent)
         self.class_id = class_id
         self.user = user
+        self.series_id = None
+        self.original_scheduled_at = None
         self.setWindowTitle("Editar Clase")
-        self.setFixedSize(400, 350)
+        self.setFixedSize(400, 380)
         self.init_ui()
         self.load_class_data()
 
@@ -328,12 +423,19 @@ class EditClassDialog(QDialog):
         buttons.accepted.connect(self.save_changes)
         buttons.rejected.connect(self.reject)
 
+        self.series_check = QCheckBox("🔁 Aplicar a esta y las siguientes clases de la serie")
+        self.series_check.setToolTip(
+            "En la serie solo se aplica la hora: cada clase conserva su día"
+        )
+        self.series_check.hide()
+
         layout.addRow("Fecha y Hora:", self.datetime_input)
         layout.addRow("Capacidad:", self.capacity_input)
         layout.addRow("Profesor:", self.teacher_combo)
         layout.addRow("Centro:", self.center_combo)
         layout.addRow("Precio:", self.price_input)
         layout.addRow("Porcentaje Profesor:", self.teacher_share_input)
+        layout.addRow(self.series_check)
         layout.addRow(buttons)
 
         self.setLayout(layout)
@@ -347,6 +449,10 @@ class EditClassDialog(QDialog):
                 self.reject()
                 return
 
+            self.series_id = yoga_class.series_id
+            self.original_scheduled_at = yoga_class.scheduled_at
+            self.series_check.setVisible(self.series_id is not None)
+
             # Establecer valores actuales
             self.datetime_input.setDateTime(
                 QDateTime.fromString(
@@ -356,11 +462,7 @@ class EditClassDialog(QDialog):
             self.capacity_input.setValue(yoga_class.max_capacity)
 
             # Cargar profesores
-            teachers = session.exec(
-                select(User).where(
-                    (User.role == Role.TEACHER) & (User.is_active == True)
-                )
-            ).all()
+            teachers = get_user_refs(Role.TEACHER, active_only=True)
 
             current_teacher_index = 0
             for idx, teacher in enumerate(teachers):
@@ -371,7 +473,7 @@ class EditClassDialog(QDialog):
             self.teacher_combo.setCurrentIndex(current_teacher_index)
 
             # Cargar centros
-            centers = session.exec(select(Center)).all()
+            centers = get_center_refs()
 
             current_center_index = 0
             for idx, center in enumerate(centers):
@@ -407,6 +509,12 @@ class EditClassDialog(QDialog):
             QMessageBox.warning(self, "Error", "Seleccione un centro")
             return
 
+        if self.series_check.isChecked():
+            self.save_series_changes(
+                scheduled_at, max_capacity, teacher_id, center_id, price, teacher_share
+            )
+            return
+
         try:
             from database.db import update_class
             success = update_class(
@@ -430,3 +538,47 @@ class EditClassDialog(QDialog):
             QMessageBox.critical(
                 self, "Error", f"No se pudo actualizar la clase: {str(e)}"
             )
+
+    def save_series_changes(self, scheduled_at, max_capacity, teacher_id, center_id,
+                            price, teacher_share):
+        from database.db import get_series_classes, update_class_series
+        try:
+            # Comprobar solapamientos del profesor antes de tocar la serie
+            occurrences = [
+                yoga_class.scheduled_at.replace(
+                    hour=scheduled_at.hour, minute=scheduled_at.minute, second=0, microsecond=0
+                )
+                for yoga_class in get_series_classes(self.series_id, self.original_scheduled_at)
+            ]
+            conflicts = find_teacher_conflicts(
+                teacher_id, occurrences, exclude_series_id=self.series_id
+            )
+            if conflicts:
+                QMessageBox.warning(self, "Horario ocupado", _conflicts_message(conflicts))
+                return
+
+            success = update_class_series(
+                self.series_id,
+                from_date=self.original_scheduled_at,
+                start_time=scheduled_at.time().replace(second=0, microsecond=0),
+                max_capacity=max_capacity,
+                teacher_id=teacher_id,
+                center_id=center_id,
+                price=price,
+                teacher_share_percentage=teacher_share
+            )
+            if success:
+                QMessageBox.information(
+                    self, "Éxito", "Serie actualizada correctamente"
+                )
+                self.accept()
+            else:
+                QMessageBox.warning(
+                    self, "Error",
+                    "No se pudo actualizar la serie: alguna clase tiene más "
+                    "reservas que la nueva capacidad o el horario está ocupado"
+                )
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error", f"No se pudo actualizar la serie: {str(e)}"
+            )
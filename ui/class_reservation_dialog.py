@@ -10,8 +10,9 @@ from datetime import datetime, timedelta
 from database.db import (
     get_session, select, YogaClass, User, Center,
     Add_Reservation, get_available_classes_for_date,
-    Add_Payment, Payment, Reserve
+    Add_Payment, Payment, Reserve, unit_of_work, get_center_refs
 )
+from database.loader import BatchLoader
 
 class ClassReservationDialog(QDialog):
     def __init__(self, user):
@@ -172,13 +173,8 @@ class ClassReservationDialog(QDialog):
 
     def load_centers(self):
         """Cargar centros en el combo box."""
-        session = get_session()
-        try:
-            centers = session.exec(select(Center)).all()
-            for center in centers:
-                self.center_combo.addItem(center.name, center.id)
-        finally:
-            session.close()
+        for center in get_center_refs():
+            self.center_combo.addItem(center.name, center.id)
 
     def get_active_reservations_count(self):
         """Obtener número de reservas activas del usuario."""
@@ -228,6 +224,10 @@ class ClassReservationDialog(QDialog):
                 if reserved_classes:
                     classes = [c for c in classes if c.id not in reserved_classes]
 
+            loader = BatchLoader(session)
+            loader.register(User, (c.teacher_id for c in classes))
+            loader.register(Center, (c.center_id for c in classes)).resolve()
+
             self.classes_table.setRowCount(len(classes))
 
             for row, yoga_class in enumerate(classes):
@@ -244,7 +244,7 @@ class ClassReservationDialog(QDialog):
                 )
 
                 # Profesor
-                teacher = session.get(User, yoga_class.teacher_id)
+                teacher = loader.get(User, yoga_class.teacher_id)
                 teacher_name = teacher.name if teacher else "No asignado"
                 self.classes_table.setItem(
                     row, 2,
@@ -252,7 +252,7 @@ class ClassReservationDialog(QDialog):
                 )
 
                 # Centro
-                center = session.get(Center, yoga_class.center_id)
+                center = loader.get(Center, yoga_class.center_id)
                 center_name = center.name if center else "Desconocido"
                 self.classes_table.setItem(
                     row, 3,
@@ -383,24 +383,12 @@ class ClassReservationDialog(QDialog):
                 QMessageBox.warning(self, "Error", "Clase no encontrada")
                 return
 
-            # Verificar disponibilidad
+            # Verificar disponibilidad (Add_Reservation vuelve a comprobarlo
+            # de forma atómica al reservar)
             if yoga_class.current_capacity >= yoga_class.max_capacity:
                 QMessageBox.warning(self, "Clase Llena", "Lo sentimos, esta clase ya está llena.")
                 return
 
-            # Verificar si ya tiene reserva
-            existing_reservation = session.exec(
-                select(Reserve).where(
-                    Reserve.student_id == self.user.id,
-                    Reserve.yogaclass_id == self.selected_class_id,
-                    Reserve.status == "active"
-                )
-            ).first()
-
-            if existing_reservation:
-                QMessageBox.warning(self, "Ya Reservado", "Ya tienes una reserva activa para esta clase.")
-                return
-
             # Confirmar reserva y pago
             reply = QMessageBox.question(
                 self,
@@ -415,18 +403,20 @@ class ClassReservationDialog(QDialog):
             )
 
             if reply == QMessageBox.StandardButton.Yes:
-                # Crear reserva
-                reservation = Add_Reservation(self.user.id, self.selected_class_id)
+                # Reserva y pago en una sola transacción
+                with unit_of_work():
+                    reservation = Add_Reservation(self.user.id, self.selected_class_id)
+
+                    if reservation:
+                        # Crear pago automáticamente
+                        payment = Add_Payment(
+                            student_id=self.user.id,
+                            yogaclass_id=self.selected_class_id,
+                            amount=yoga_class.price,
+                            payment_method="Tarjeta de Débito"  # Por defecto
+                        )
 
                 if reservation:
-                    # Crear pago automáticamente
-                    payment = Add_Payment(
-                        student_id=self.user.id,
-                        yogaclass_id=self.selected_class_id,
-                        amount=yoga_class.price,
-                        payment_method="Tarjeta de Débito"  # Por defecto
-                    )
-
                     QMessageBox.information(
                         self,
                         "🎉 ¡Reserva Exitosa!",
@@ -448,7 +438,8 @@ class ClassReservationDialog(QDialog):
                     QMessageBox.warning(
                         self,
                         "Error en la Reserva",
-                        "No se pudo realizar la reserva. La clase puede estar llena o haber un problema con el sistema."
+                        "No se pudo realizar la reserva. La clase puede estar llena "
+                        "o ya tienes una reserva activa para esta clase."
                     )
 
         except Exception as e:
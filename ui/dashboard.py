@@ -9,6 +9,7 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QHeaderView,
     QLabel,
+    QMessageBox,
     QPushButton,
     QTableWidget,
     QTableWidgetItem,
@@ -18,13 +19,133 @@ from PyQt6.QtWidgets import (
 
 from database.db import (
     get_session, select, YogaClass, User, Role, Payment, Center, Attendance,
-    get_available_classes_for_date, get_student_statistics, get_teacher_statistics
+    get_available_classes_for_date, get_student_statistics, get_teacher_statistics,
+    func
 )
+from database.loader import BatchLoader
+from services.report_service import ReportService
+from ui.task_runner import LoadingIndicator, TaskRunner
+
+# <------------------- Consultas en segundo plano ------------------>
+# Se ejecutan en el pool de hilos (ui.task_runner) y devuelven los textos de
+# las tarjetas o las filas de la tabla; los widgets se actualizan después.
+
+def query_student_stats(student_id):
+    stats = get_student_statistics(student_id)
+    return [
+        str(stats.get("classes_attended", 0)),
+        str(stats.get("classes_reserved", 0)),
+        f"${stats.get('total_paid', 0):.2f}",
+        f"{stats.get('attendance_rate', 0):.1f}%",
+    ]
+
+
+def query_teacher_stats(teacher_id):
+    stats = get_teacher_statistics(teacher_id)
+    return [
+        str(stats.get("total_classes", 0)),
+        str(stats.get("upcoming_classes", 0)),
+        f"${stats.get('total_earnings', 0):.2f}",
+        query_unique_students_count(teacher_id),
+    ]
+
+
+def query_admin_stats():
+    session = get_session()
+    try:
+        today = datetime.now().date()
+        day_start = datetime.combine(today, datetime.min.time())
+
+        # Clases hoy
+        classes_today = session.exec(
+            select(func.count(YogaClass.id)).where(
+                YogaClass.scheduled_at >= day_start,
+                YogaClass.scheduled_at < day_start + timedelta(days=1),
+            )
+        ).one()
+
+        # Ingresos del día, desde el resumen diario
+        today_payments = ReportService.aggregate(
+            "revenue", ("revenue",), start_date=day_start, end_date=day_start, status="paid"
+        )[0].revenue
+
+        # Usuarios activos
+        active_users = session.exec(
+            select(func.count(User.id)).where(User.is_active == True)
+        ).one()
+
+        # Centros activos
+        active_centers = session.exec(select(func.count(Center.id))).one()
+
+        return [
+            str(classes_today),
+            f"${today_payments:.2f}",
+            str(active_users),
+            str(active_centers),
+        ]
+    finally:
+        session.close()
+
+
+def query_general_stats():
+    session = get_session()
+    try:
+        # Estadísticas básicas
+        total_classes = session.exec(select(func.count(YogaClass.id))).one()
+        active_users = session.exec(
+            select(func.count(User.id)).where(User.is_active == True)
+        ).one()
+        return [str(total_classes), str(active_users)]
+    finally:
+        session.close()
+
+
+def query_classes_for_date(day, student_id):
+    """[(hora, clase, profesor, precio, disponibles)] de las clases del día."""
+    session = get_session()
+    try:
+        classes = get_available_classes_for_date(
+            datetime.combine(day, datetime.min.time()), student_id
+        )
+
+        loader = BatchLoader(session)
+        loader.register(User, (c.teacher_id for c in classes)).resolve()
+
+        rows = []
+        for yoga_class in classes:
+            teacher = loader.get(User, yoga_class.teacher_id)
+            rows.append((
+                yoga_class.scheduled_at.strftime("%H:%M"),
+                f"Clase {yoga_class.id}",
+                teacher.name if teacher else "No asignado",
+                f"${yoga_class.price:.2f}",
+                str(yoga_class.max_capacity - yoga_class.current_capacity),
+            ))
+        return rows
+    finally:
+        session.close()
+
+
+def query_unique_students_count(teacher_id: int) -> str:
+    """Obtener número de estudiantes únicos para un profesor."""
+    session = get_session()
+    try:
+        # Estudiantes únicos que han asistido a clases del profesor
+        unique_students = session.exec(
+            select(func.count(func.distinct(Attendance.student_id)))
+            .join(YogaClass, Attendance.yogaclass_id == YogaClass.id)
+            .where(YogaClass.teacher_id == teacher_id)
+        ).one()
+        return str(unique_students)
+    finally:
+        session.close()
+
 
 class DashboardWidget(QWidget):
     def __init__(self, user):
         super().__init__()
         self.user = user
+        self.runner = TaskRunner(self)
         self.init_ui()
 
     def init_ui(self):
@@ -49,125 +170,65 @@ class DashboardWidget(QWidget):
         calendar_frame = self.create_calendar_with_classes()
 
         layout.addWidget(header)
+        layout.addWidget(LoadingIndicator(self.runner))
         layout.addLayout(stats_layout)
         layout.addWidget(calendar_frame)
 
         self.setLayout(layout)
 
-    def create_student_stats(self):
-        """Estadísticas para estudiantes."""
+    def create_stats_grid(self, stat_cards, query, *args):
+        """Tarjetas con valor pendiente que se completan al llegar `query`."""
         layout = QGridLayout()
+        value_labels = []
 
-        stats = get_student_statistics(self.user.id)
-
-        stat_cards = [
-            ("📊 Clases Asistidas", str(stats.get("classes_attended", 0)), "primary"),
-            ("📅 Clases Reservadas", str(stats.get("classes_reserved", 0)), "success"),
-            ("💰 Total Pagado", f"${stats.get('total_paid', 0):.2f}", "warning"),
-            ("🎯 Tasa de Asistencia", f"{stats.get('attendance_rate', 0):.1f}%", "info"),
-        ]
-
-        for i, (title, value, color) in enumerate(stat_cards):
-            card = self.create_stat_card(title, value, color)
+        for i, (title, color) in enumerate(stat_cards):
+            card = self.create_stat_card(title, "…", color)
+            value_labels.append(card.findChild(QLabel, "value"))
             layout.addWidget(card, i // 2, i % 2)
 
-        return layout
-
-    def create_teacher_stats(self):
-        """Estadísticas para profesores."""
-        layout = QGridLayout()
+        def show(values):
+            for label, value in zip(value_labels, values):
+                label.setText(value)
 
-        stats = get_teacher_statistics(self.user.id)
+        self.runner.submit("stats", query, *args, on_result=show, on_error=self.show_error)
+        return layout
 
-        stat_cards = [
-            ("🎓 Clases Impartidas", str(stats.get("total_classes", 0)), "primary"),
-            ("📅 Próximas Clases", str(stats.get("upcoming_classes", 0)), "success"),
-            ("💰 Ganancias Totales", f"${stats.get('total_earnings', 0):.2f}", "warning"),
-            ("👥 Alumnos Únicos", self.get_unique_students_count(self.user.id), "info"),
-        ]
+    def show_error(self, error):
+        QMessageBox.critical(self, "Error", f"Error al cargar datos: {str(error)}")
 
-        for i, (title, value, color) in enumerate(stat_cards):
-            card = self.create_stat_card(title, value, color)
-            layout.addWidget(card, i // 2, i % 2)
+    def create_student_stats(self):
+        """Estadísticas para estudiantes."""
+        return self.create_stats_grid([
+            ("📊 Clases Asistidas", "primary"),
+            ("📅 Clases Reservadas", "success"),
+            ("💰 Total Pagado", "warning"),
+            ("🎯 Tasa de Asistencia", "info"),
+        ], query_student_stats, self.user.id)
 
-        return layout
+    def create_teacher_stats(self):
+        """Estadísticas para profesores."""
+        return self.create_stats_grid([
+            ("🎓 Clases Impartidas", "primary"),
+            ("📅 Próximas Clases", "success"),
+            ("💰 Ganancias Totales", "warning"),
+            ("👥 Alumnos Únicos", "info"),
+        ], query_teacher_stats, self.user.id)
 
     def create_admin_stats(self):
         """Estadísticas para administradores/recepcionistas."""
-        layout = QGridLayout()
-
-        session = get_session()
-        try:
-            today = datetime.now().date()
-
-            # Clases hoy
-            classes_today = session.exec(
-                select(YogaClass).where(
-                    YogaClass.scheduled_at >= datetime.combine(today, datetime.min.time()),
-                    YogaClass.scheduled_at < datetime.combine(today + timedelta(days=1), datetime.min.time()),
-                )
-            ).all()
-
-            # Ingresos del día
-            today_payments_result = session.exec(
-                select(Payment).where(
-                    Payment.paid_at >= datetime.combine(today, datetime.min.time()),
-                    Payment.paid_at < datetime.combine(today + timedelta(days=1), datetime.min.time()),
-                    Payment.status == "paid"
-                )
-            ).all()
-
-            today_payments = sum(p.amount for p in today_payments_result)
-
-            # Usuarios activos
-            active_users = session.exec(
-                select(User).where(User.is_active == True)
-            ).all()
-
-            # Centros activos
-            active_centers = session.exec(
-                select(Center)
-            ).all()
-
-            stat_cards = [
-                ("🎯 Clases Hoy", str(len(classes_today)), "primary"),
-                ("💰 Ingresos Hoy", f"${today_payments:.2f}", "success"),
-                ("👥 Usuarios Activos", str(len(active_users)), "warning"),
-                ("🏢 Centros", str(len(active_centers)), "info"),
-            ]
-
-            for i, (title, value, color) in enumerate(stat_cards):
-                card = self.create_stat_card(title, value, color)
-                layout.addWidget(card, i // 2, i % 2)
-
-        finally:
-            session.close()
-
-        return layout
+        return self.create_stats_grid([
+            ("🎯 Clases Hoy", "primary"),
+            ("💰 Ingresos Hoy", "success"),
+            ("👥 Usuarios Activos", "warning"),
+            ("🏢 Centros", "info"),
+        ], query_admin_stats)
 
     def create_general_stats(self):
         """Estadísticas generales para roles no específicos."""
-        layout = QGridLayout()
-
-        session = get_session()
-        try:
-            # Estadísticas básicas
-            total_classes = session.exec(select(YogaClass)).all()
-            active_users = session.exec(select(User).where(User.is_active == True)).all()
-
-            stat_cards = [
-                ("🎯 Total de Clases", str(len(total_classes)), "primary"),
-                ("👥 Usuarios Activos", str(len(active_users)), "success"),
-            ]
-
-            for i, (title, value, color) in enumerate(stat_cards):
-                card = self.create_stat_card(title, value, color)
-                layout.addWidget(card, i // 2, i % 2)
-
-        finally:
-            session.close()
-
-        return layout
+        return self.create_stats_grid([
+            ("🎯 Total de Clases", "primary"),
+            ("👥 Usuarios Activos", "success"),
+        ], query_general_stats)
 
     def create_stat_card(self, title: str, value: str, color: str) -> QWidget:
         """Crear una tarjeta de estadística."""
@@ -189,6 +250,7 @@ class DashboardWidget(QWidget):
         title_label.setStyleSheet("color: #666;")
 
         value_label = QLabel(value)
+        value_label.setObjectName("value")
         value_label.setFont(QFont("Arial", 20, QFont.Weight.Bold))
 
         color_map = {
@@ -246,65 +308,16 @@ class DashboardWidget(QWidget):
 
     def load_classes_for_date(self, date):
         """Cargar clases disponibles para una fecha específica."""
-        session = get_session()
-        try:
-            py_date = date.toPyDate()
-            classes = get_available_classes_for_date(
-                datetime.combine(py_date, datetime.min.time()),
-                self.user.id if self.user.role == Role.STUDENT else None
-            )
-
-            self.classes_table.setRowCount(len(classes))
-
-            for row, yoga_class in enumerate(classes):
-                # Hora
-                self.classes_table.setItem(
-                    row, 0,
-                    QTableWidgetItem(yoga_class.scheduled_at.strftime("%H:%M"))
-                )
-
-                # Información de la clase
-                self.classes_table.setItem(
-                    row, 1,
-                    QTableWidgetItem(f"Clase {yoga_class.id}")
-                )
-
-                # Profesor
-                teacher = session.get(User, yoga_class.teacher_id)
-                teacher_name = teacher.name if teacher else "No asignado"
-                self.classes_table.setItem(
-                    row, 2,
-                    QTableWidgetItem(teacher_name)
-                )
-
-                # Precio
-                self.classes_table.setItem(
-                    row, 3,
-                    QTableWidgetItem(f"${yoga_class.price:.2f}")
-                )
-
-                # Disponibles
-                available = yoga_class.max_capacity - yoga_class.current_capacity
-                self.classes_table.setItem(
-                    row, 4,
-                    QTableWidgetItem(str(available))
-                )
-
-        finally:
-            session.close()
-
-    def get_unique_students_count(self, teacher_id: int) -> str:
-        """Obtener número de estudiantes únicos para un profesor."""
-        session = get_session()
-        try:
-            # Obtener todos los estudiantes únicos que han asistido a clases del profesor
-            attendances = session.exec(
-                select(Attendance)
-                .join(YogaClass, Attendance.yogaclass_id == YogaClass.id)
-                .where(YogaClass.teacher_id == teacher_id)
-            ).all()
-
-            unique_students = set(attendance.student_id for attendance in attendances)
-            return str(len(unique_students))
-        finally:
-            session.close()
+        student_id = self.user.id if self.user.role == Role.STUDENT else None
+
+        def show(rows):
+            self.classes_table.setRowCount(len(rows))
+            for row, values in enumerate(rows):
+                for col, value in enumerate(values):
+                    self.classes_table.setItem(row, col, QTableWidgetItem(value))
+
+        # Un clic en otra fecha descarta la consulta anterior
+        self.runner.submit(
+            "calendar", query_classes_for_date, date.toPyDate(), student_id,
+            on_result=show, on_error=self.show_error,
+        )
@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QIcon
 from database.db import authenticate
+from ui.task_runner import LoadingIndicator, TaskRunner
 
 class LoginDialog(QDialog):
     login_successful = pyqtSignal(object)
@@ -12,6 +13,9 @@ class LoginDialog(QDialog):
     def __init__(self):
         super().__init__()
         self.user = None
+        # bcrypt tarda lo suyo: la verificación corre fuera del hilo de la GUI
+        self.runner = TaskRunner(self)
+        self.runner.taskCancelled.connect(lambda key: self.set_busy(False))
         self.init_ui()
 
     def init_ui(self):
@@ -113,6 +117,7 @@ class LoginDialog(QDialog):
         button_layout.setSpacing(10)
 
         login_btn = QPushButton("🚀 Iniciar Sesión")
+        self.login_btn = login_btn
         login_btn.setObjectName("login_btn")
         login_btn.setMinimumHeight(45)
         login_btn.clicked.connect(self.authenticate)
@@ -135,6 +140,9 @@ class LoginDialog(QDialog):
         form_layout.addWidget(password_label)
         form_layout.addWidget(self.password_input)
         form_layout.addWidget(self.remember_check)
+        self.loading_indicator = LoadingIndicator(self.runner)
+        self.loading_indicator.label.setText("⏳ Verificando credenciales...")
+        form_layout.addWidget(self.loading_indicator)
         form_layout.addSpacing(10)
         form_layout.addLayout(button_layout)
 
@@ -227,35 +235,56 @@ class LoginDialog(QDialog):
             return
 
         # Mostrar indicador de carga
-        self.setCursor(Qt.CursorShape.WaitCursor)
-
-        try:
-            self.user = authenticate(email, password)
-
-            if self.user:
-                if not self.user.is_active:
-                    QMessageBox.warning(self, "Cuenta desactivada",
-                                       "Su cuenta ha sido desactivada. Contacte al administrador.")
-                    self.user = None
-                    return
-
-                # Guardar credenciales si se seleccionó "Recordar"
-                if self.remember_check.isChecked():
-                    self.save_credentials()
-
-                self.login_successful.emit(self.user)
-                self.accept()
-            else:
-                QMessageBox.critical(self, "Error de autenticación",
-                                   "Email o contraseña incorrectos. Intente nuevamente.")
-                self.password_input.clear()
-                self.password_input.setFocus()
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al conectar con la base de datos: {str(e)}")
-        finally:
+        self.set_busy(True)
+        self.runner.submit(
+            "login", authenticate, email, password,
+            on_result=self.on_authenticated,
+            on_error=self.on_authentication_error,
+        )
+
+    def set_busy(self, busy: bool):
+        """Bloquear el formulario mientras se verifican las credenciales."""
+        self.login_btn.setEnabled(not busy)
+        self.email_input.setEnabled(not busy)
+        self.password_input.setEnabled(not busy)
+        if busy:
+            self.setCursor(Qt.CursorShape.WaitCursor)
+        else:
             self.setCursor(Qt.CursorShape.ArrowCursor)
 
+    def on_authenticated(self, user):
+        """Resultado de la verificación, ya en el hilo de la GUI."""
+        self.set_busy(False)
+        self.user = user
+
+        if self.user:
+            if not self.user.is_active:
+                QMessageBox.warning(self, "Cuenta desactivada",
+                                   "Su cuenta ha sido desactivada. Contacte al administrador.")
+                self.user = None
+                return
+
+            # Guardar credenciales si se seleccionó "Recordar"
+            if self.remember_check.isChecked():
+                self.save_credentials()
+
+            self.login_successful.emit(self.user)
+            self.accept()
+        else:
+            QMessageBox.critical(self, "Error de autenticación",
+                               "Email o contraseña incorrectos. Intente nuevamente.")
+            self.password_input.clear()
+            self.password_input.setFocus()
+
+    def on_authentication_error(self, error):
+        self.set_busy(False)
+        QMessageBox.critical(self, "Error", f"Error al conectar con la base de datos: {str(error)}")
+
+    def reject(self):
+        # Descartar una verificación en curso al cerrar el diálogo
+        self.runner.cancel()
+        super().reject()
+
     def show_register_dialog(self):
         """Mostrar diálogo de registro."""
         from ui.register_dialog import RegisterDialog
@@ -1,4 +1,6 @@
-from PyQt6.QtCore import Qt
+from importlib import import_module
+
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import (
     QHBoxLayout,
@@ -13,17 +15,54 @@ from PyQt6.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
-from ui.receptionist_payment_dialog import ReceptionistPaymentDialog
 from database.db import Role
-from ui.attendance_widget import AttendanceWidget
-from ui.center_management import CenterManagementWidget
-from ui.class_management import ClassManagementWidget
-from ui.dashboard import DashboardWidget
-from ui.payments_widget import PaymentsWidget
-from ui.reports_widget import ReportsWidget
-from ui.user_management import UserManagementWidget
-from ui.reports_widget import ReportsWidget
-from ui.class_reservation_dialog import ClassReservationDialog
+from database.profiling import profiler
+
+
+def widget_class(path):
+    """Clase de widget a partir de su ruta "paquete.módulo.Clase"."""
+    module, name = path.rsplit(".", 1)
+    return getattr(import_module(module), name)
+
+
+# Inactividad (ms) tras mostrar una pestaña antes de construir la siguiente
+PREFETCH_IDLE_MS = 1500
+
+
+class LazyTab(QWidget):
+    """Marcador de pestaña que construye su widget al mostrarse por primera vez."""
+
+    built = pyqtSignal(QWidget)
+
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.widget = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.loading_label = QLabel("Cargando...")
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.loading_label)
+
+    def is_built(self):
+        return self.widget is not None
+
+    def build(self):
+        if self.widget is not None:
+            return self.widget
+        self.widget = self.factory()
+        self.layout().removeWidget(self.loading_label)
+        self.loading_label.deleteLater()
+        self.layout().addWidget(self.widget)
+        self.built.emit(self.widget)
+        return self.widget
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.widget is None:
+            # Pintar primero el marcador; construir en la siguiente vuelta del bucle
+            QTimer.singleShot(0, self.build)
+
 
 class MainWindow(QMainWindow):
     def __init__(self, user):
@@ -53,6 +92,10 @@ class MainWindow(QMainWindow):
 
         # Área de contenido principal
         self.content_area = QTabWidget()
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(PREFETCH_IDLE_MS)
+        self.prefetch_timer.timeout.connect(self.prefetch_next_tab)
         self.setup_tabs()
         main_layout.addWidget(self.content_area, 4)
 
@@ -81,6 +124,14 @@ class MainWindow(QMainWindow):
         about_action.triggered.connect(self.show_about)
         help_menu.addAction(about_action)
 
+        # Menú Depuración (sólo con YOGA_PROFILE_QUERIES activo)
+        if profiler.enabled:
+            debug_menu = menubar.addMenu("Depuración")
+            profile_action = QAction("Perfil de consultas", self)
+            profile_action.setShortcut("Ctrl+Shift+P")
+            profile_action.triggered.connect(self.show_query_profile)
+            debug_menu.addAction(profile_action)
+
     def create_toolbar(self):
         toolbar = self.addToolBar("Herramientas")
 
@@ -126,35 +177,28 @@ class MainWindow(QMainWindow):
     #     return sidebar
 
     def setup_tabs(self):
-        # Dashboard
-        self.dashboard_widget = DashboardWidget(self.user)
-        self.content_area.addTab(self.dashboard_widget, "📊 Dashboard")
+        # Cada pestaña empieza como un marcador ligero; el módulo y el widget
+        # real (con sus consultas) se cargan la primera vez que se muestra
+        tabs = [("dashboard_widget", "📊 Dashboard", "ui.dashboard.DashboardWidget")]
 
         # Gestión de Usuarios (solo admin/recepcionista)
         if self.user.role in [Role.ADMINISTRATOR, Role.RECEPTIONIST]:
-            self.user_widget = UserManagementWidget(self.user)
-            self.content_area.addTab(self.user_widget, "👥 Usuarios")
+            tabs.append(("user_widget", "👥 Usuarios", "ui.user_management.UserManagementWidget"))
 
         # Gestión de Clases
-        self.class_widget = ClassManagementWidget(self.user)
-        self.content_area.addTab(self.class_widget, "🎯 Clases")
+        tabs.append(("class_widget", "🎯 Clases", "ui.class_management.ClassManagementWidget"))
 
         # Gestión de Centros (solo admin)
         if self.user.role == Role.ADMINISTRATOR:
-            self.center_widget = CenterManagementWidget(self.user)
-            self.content_area.addTab(self.center_widget, "🏢 Centros")
+            tabs.append(("center_widget", "🏢 Centros", "ui.center_management.CenterManagementWidget"))
 
         # Asistencia (solo profesores)
         if self.user.role == Role.TEACHER:
-            self.attendance_widget = AttendanceWidget(self.user)
-            self.content_area.addTab(self.attendance_widget, "📋 Asistencia")
+            tabs.append(("attendance_widget", "📋 Asistencia", "ui.attendance_widget.AttendanceWidget"))
 
         # Reportes (admin/recepcionista)
         if self.user.role in [Role.ADMINISTRATOR, Role.RECEPTIONIST]:
-            self.reports_widget = ReportsWidget(self.user)
-            self.content_area.addTab(self.reports_widget, "📈 Reportes")
-            self.payments_widget = PaymentsWidget(self.user)
-            self.content_area.addTab(self.payments_widget, "💰 Pagos")
+            tabs.append(("reports_widget", "📈 Reportes", "ui.reports_widget.ReportsWidget"))
 
         # if self.user.role == Role.RECEPTIONIST:
         #     receptionist_payment_btn = QPushButton("💳 Pagos Recepcionista")
@@ -165,20 +209,53 @@ class MainWindow(QMainWindow):
             reserve_button = QPushButton("Reservar Clase")
             reserve_button.clicked.connect(self.show_reservation_dialog)
 
-        if self.user.role in [
-            Role.ADMINISTRATOR,
-            Role.RECEPTIONIST,
-            Role.STUDENT,
-            Role.TEACHER,
-        ]:
-            self.payments_widget = PaymentsWidget(self.user)
-            self.content_area.addTab(self.payments_widget, "💰 Pagos")
+        # Pagos (todos los roles)
+        tabs.append(("payments_widget", "💰 Pagos", "ui.payments_widget.PaymentsWidget"))
+
+        for attribute, title, widget_path in tabs:
+            placeholder = LazyTab(lambda path=widget_path: widget_class(path)(self.user))
+            placeholder.built.connect(
+                lambda widget, attribute=attribute: self.tab_built(attribute, widget)
+            )
+            self.content_area.addTab(placeholder, title)
+        self.content_area.currentChanged.connect(self.schedule_prefetch)
+
+    def tab_built(self, attribute, widget):
+        setattr(self, attribute, widget)
+        if self.content_area.currentWidget() is widget.parent():
+            self.schedule_prefetch()
+
+    def schedule_prefetch(self, *_):
+        """Construir la pestaña siguiente cuando la aplicación quede inactiva."""
+        self.prefetch_timer.start()
+
+    def prefetch_next_tab(self):
+        """Construir en segundo plano la pestaña a la derecha de la actual.
+
+        Es la que el usuario suele abrir a continuación; si ya está construida
+        no se hace nada. Sólo se adelanta una pestaña por activación.
+        """
+        current = self.content_area.currentWidget()
+        if current is None or not current.is_built():
+            return
+        following = self.content_area.widget(self.content_area.currentIndex() + 1)
+        if following is not None and not following.is_built():
+            following.build()
 
     def show_reservation_dialog(self):
         """Mostrar diálogo de reserva de clases."""
+        from ui.class_reservation_dialog import ClassReservationDialog
+
         dialog = ClassReservationDialog(self.user)
         dialog.exec()
 
+    def show_query_profile(self):
+        """Mostrar el panel con el perfil de consultas SQL."""
+        from ui.query_profile_panel import QueryProfilePanel
+
+        self.query_profile_panel = QueryProfilePanel(self)
+        self.query_profile_panel.show()
+
     def change_tab(self, index):
         self.content_area.setCurrentIndex(index)
 
@@ -4,7 +4,8 @@ from PyQt6.QtWidgets import (
     QDialogButtonBox, QMessageBox
 )
 from PyQt6.QtCore import Qt
-from database.db import get_session, select, YogaClass, Reserve, Add_Payment
+from database.db import get_session, select, YogaClass, Reserve, Add_Payment, Payment
+from database.loader import BatchLoader
 
 class PaymentDialog(QDialog):
     def __init__(self, user):
@@ -66,20 +67,24 @@ class PaymentDialog(QDialog):
                 )
             ).all()
 
+            class_ids = [r.yogaclass_id for r in reservations]
+            loader = BatchLoader(session)
+            loader.register(YogaClass, class_ids).resolve()
+
+            # Clases ya pagadas, en una sola consulta
+            paid_class_ids = set(session.exec(
+                select(Payment.yogaclass_id).where(
+                    Payment.student_id == self.user.id,
+                    Payment.yogaclass_id.in_(class_ids),
+                    Payment.status == "paid"
+                )
+            ).all()) if class_ids else set()
+
             self.class_combo.clear()
             for reserve in reservations:
-                yoga_class = session.get(YogaClass, reserve.yogaclass_id)
+                yoga_class = loader.get(YogaClass, reserve.yogaclass_id)
                 if yoga_class:
-                    # Verificar si ya se pagó esta clase
-                    existing_payment = session.exec(
-                        select(Payment).where(
-                            Payment.student_id == self.user.id,
-                            Payment.yogaclass_id == yoga_class.id,
-                            Payment.status == "paid"
-                        )
-                    ).first()
-
-                    if not existing_payment:
+                    if yoga_class.id not in paid_class_ids:
                         class_date = yoga_class.scheduled_at.strftime("%Y-%m-%d %H:%M")
                         self.class_combo.addItem(
                             f"Clase {yoga_class.id} - {class_date} - ${yoga_class.price:.2f}",
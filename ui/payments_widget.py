@@ -1,19 +1,106 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QTableWidget, QTableWidgetItem,
-    QHeaderView, QMessageBox, QTabWidget, QDateEdit,
+    QPushButton, QTableView,
+    QMessageBox, QTabWidget, QDateEdit,
     QComboBox, QDialog, QFormLayout, QDialogButtonBox,
     QLineEdit, QDoubleSpinBox, QGroupBox
 )
 from PyQt6.QtCore import QDate
-from PyQt6.QtGui import QColor
 from datetime import datetime
 from database.db import (
     get_session, select, Payment, User, YogaClass, Role,
     get_payments_by_teacher, get_all_payments, update_payment_status,
     get_total_earnings_by_teacher, Add_Payment, Reserve, calculate_teacher_earnings
 )
+from models.view_models import Column, SqlTableModel, attach_table_view
+from services.report_service import ReportService
 from ui.payment_dialog import PaymentDialog
+from ui.task_runner import LoadingIndicator, TaskRunner
+
+STATUS_COLORS = {"paid": "green", "pending": "orange", "refunded": "red"}
+
+
+def _class_info(payment, loader):
+    yoga_class = loader.get(YogaClass, payment.yogaclass_id)
+    return f"Clase {yoga_class.id}" if yoga_class else "N/A"
+
+
+def _student_name(payment, loader):
+    student = loader.get(User, payment.student_id)
+    return student.name if student else "N/A"
+
+
+def _teacher_name(payment, loader):
+    yoga_class = loader.get(YogaClass, payment.yogaclass_id)
+    if yoga_class and yoga_class.teacher_id:
+        teacher = loader.get(User, yoga_class.teacher_id)
+        return teacher.name if teacher else "N/A"
+    return "N/A"
+
+
+def _prefetch_payment_refs(loader, payments):
+    """Clases, alumnos y profesores de una ventana en una consulta por tabla."""
+    classes = loader.load(YogaClass, {p.yogaclass_id for p in payments})
+    loader.register(User, (p.student_id for p in payments))
+    loader.register(User, (c.teacher_id for c in classes.values() if c))
+
+
+def _payments_model(columns, runner):
+    return SqlTableModel(
+        columns, Payment.id,
+        order_by=[(Payment.paid_at, True)],
+        prefetch=_prefetch_payment_refs,
+        runner=runner,
+    )
+
+
+def _admin_payment_stats(start_date, end_date, status):
+    """(ingresos, ingresos del mes, pagos pendientes) agregados en SQL."""
+    by_status = ReportService.aggregate(
+        "payment", ("payments", "revenue"), ("status",),
+        start_date=start_date, end_date=end_date, status=status
+    )
+    total_revenue = sum(row.revenue for row in by_status)
+    pending_count = sum(row.payments for row in by_status if row.status == "pending")
+
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    monthly = ReportService.aggregate(
+        "payment", ("revenue",),
+        start_date=max(start_date, month_start), end_date=end_date, status=status
+    )
+    return total_revenue, monthly[0].revenue, pending_count
+
+
+STUDENT_PAYMENT_COLUMNS = [
+    Column("ID", lambda p, _: str(p.id), sort=Payment.id),
+    Column("Clase", _class_info),
+    Column("Fecha", lambda p, _: p.paid_at.strftime("%Y-%m-%d %H:%M"), sort=Payment.paid_at),
+    Column("Monto", lambda p, _: f"${p.amount:.2f}", sort=Payment.amount),
+    Column("Método", lambda p, _: p.payment_method, sort=Payment.payment_method),
+    Column("Estado", lambda p, _: p.status, sort=Payment.status,
+           color=lambda p: STATUS_COLORS.get(p.status)),
+]
+
+TEACHER_EARNING_COLUMNS = [
+    Column("Fecha", lambda p, _: p.paid_at.strftime("%Y-%m-%d"), sort=Payment.paid_at),
+    Column("Clase", _class_info),
+    Column("Alumno", _student_name),
+    Column("Monto", lambda p, _: f"${p.amount:.2f}", sort=Payment.amount),
+    Column("Estado", lambda p, _: p.status, sort=Payment.status,
+           color=lambda p: "green" if p.status == "paid" else None),
+]
+
+ADMIN_PAYMENT_COLUMNS = [
+    Column("ID", lambda p, _: str(p.id), sort=Payment.id),
+    Column("Alumno", _student_name),
+    Column("Profesor", _teacher_name),
+    Column("Clase", _class_info),
+    Column("Fecha", lambda p, _: p.paid_at.strftime("%Y-%m-%d"), sort=Payment.paid_at),
+    Column("Monto", lambda p, _: f"${p.amount:.2f}", sort=Payment.amount),
+    Column("Método", lambda p, _: p.payment_method, sort=Payment.payment_method),
+    Column("Estado", lambda p, _: p.status, sort=Payment.status,
+           color=lambda p: STATUS_COLORS.get(p.status)),
+]
 
 class PaymentsWidget(QWidget):
     def __init__(self, user):
@@ -23,6 +110,7 @@ class PaymentsWidget(QWidget):
 
     def init_ui(self):
         layout = QVBoxLayout()
+        self.runner = TaskRunner(self)
 
         # Pestañas diferentes según el rol
         self.tabs = QTabWidget()
@@ -37,9 +125,13 @@ class PaymentsWidget(QWidget):
             self.tabs.addTab(self.create_admin_payments_tab(), "Gestión de Pagos")
             self.load_admin_payments()
 
+        layout.addWidget(LoadingIndicator(self.runner))
         layout.addWidget(self.tabs)
         self.setLayout(layout)
 
+    def show_load_error(self, error, what="pagos"):
+        QMessageBox.critical(self, "Error", f"Error al cargar {what}: {str(error)}")
+
     def create_student_payments_tab(self):
         widget = QWidget()
         layout = QVBoxLayout()
@@ -57,12 +149,9 @@ class PaymentsWidget(QWidget):
         button_layout.addStretch()
 
         # Tabla de pagos del estudiante
-        self.student_payments_table = QTableWidget()
-        self.student_payments_table.setColumnCount(6)
-        self.student_payments_table.setHorizontalHeaderLabels([
-            "ID", "Clase", "Fecha", "Monto", "Método", "Estado"
-        ])
-        self.student_payments_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.student_payments_model = _payments_model(STUDENT_PAYMENT_COLUMNS, self.runner)
+        self.student_payments_model.loadFailed.connect(self.show_load_error)
+        self.student_payments_table = attach_table_view(QTableView(), self.student_payments_model)
 
         layout.addLayout(button_layout)
         layout.addWidget(self.student_payments_table)
@@ -100,12 +189,11 @@ class PaymentsWidget(QWidget):
         filter_layout.addWidget(filter_btn)
 
         # Tabla de ganancias
-        self.teacher_earnings_table = QTableWidget()
-        self.teacher_earnings_table.setColumnCount(5)
-        self.teacher_earnings_table.setHorizontalHeaderLabels([
-            "Fecha", "Clase", "Alumno", "Monto", "Estado"
-        ])
-        self.teacher_earnings_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.teacher_earnings_model = _payments_model(TEACHER_EARNING_COLUMNS, self.runner)
+        self.teacher_earnings_model.loadFailed.connect(
+            lambda e: self.show_load_error(e, "ganancias")
+        )
+        self.teacher_earnings_table = attach_table_view(QTableView(), self.teacher_earnings_model)
 
         layout.addLayout(stats_layout)
         layout.addLayout(filter_layout)
@@ -158,12 +246,9 @@ class PaymentsWidget(QWidget):
         stats_layout.addStretch()
 
         # Tabla de pagos
-        self.admin_payments_table = QTableWidget()
-        self.admin_payments_table.setColumnCount(8)
-        self.admin_payments_table.setHorizontalHeaderLabels([
-            "ID", "Alumno", "Profesor", "Clase", "Fecha", "Monto", "Método", "Estado"
-        ])
-        self.admin_payments_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.admin_payments_model = _payments_model(ADMIN_PAYMENT_COLUMNS, self.runner)
+        self.admin_payments_model.loadFailed.connect(self.show_load_error)
+        self.admin_payments_table = attach_table_view(QTableView(), self.admin_payments_model)
 
         layout.addLayout(filter_layout)
         layout.addLayout(stats_layout)
@@ -173,145 +258,67 @@ class PaymentsWidget(QWidget):
         return widget
 
     def load_student_payments(self):
-        session = get_session()
         try:
-            payments = session.exec(
+            self.student_payments_model.set_query(
                 select(Payment).where(Payment.student_id == self.current_user.id)
-                .order_by(Payment.paid_at.desc())
-            ).all()
-
-            self.student_payments_table.setRowCount(len(payments))
-            for row, payment in enumerate(payments):
-                self.student_payments_table.setItem(row, 0, QTableWidgetItem(str(payment.id)))
-
-                # Obtener información de la clase
-                yoga_class = session.get(YogaClass, payment.yogaclass_id)
-                class_info = f"Clase {yoga_class.id}" if yoga_class else "N/A"
-                self.student_payments_table.setItem(row, 1, QTableWidgetItem(class_info))
-
-                self.student_payments_table.setItem(row, 2, QTableWidgetItem(payment.paid_at.strftime("%Y-%m-%d %H:%M")))
-                self.student_payments_table.setItem(row, 3, QTableWidgetItem(f"${payment.amount:.2f}"))
-                self.student_payments_table.setItem(row, 4, QTableWidgetItem(payment.payment_method))
-
-                # Estado con colores
-                status_item = QTableWidgetItem(payment.status)
-                if payment.status == "paid":
-                    status_item.setForeground(QColor("green"))
-                elif payment.status == "pending":
-                    status_item.setForeground(QColor("orange"))
-                elif payment.status == "refunded":
-                    status_item.setForeground(QColor("red"))
-                self.student_payments_table.setItem(row, 5, status_item)
+            )
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al cargar pagos: {str(e)}")
-        finally:
-            session.close()
 
     def load_teacher_earnings(self):
         start_date = datetime.combine(self.teacher_start_date.date().toPyDate(), datetime.min.time())
         end_date = datetime.combine(self.teacher_end_date.date().toPyDate(), datetime.max.time())
 
-        session = get_session()
         try:
             # Calcular ganancias totales
-            total_earnings = get_total_earnings_by_teacher(self.current_user.id)
-            self.earnings_label.setText(f"💰 Ganancias Totales: ${total_earnings:.2f}")
-
-            # Obtener pagos
-            payments = get_payments_by_teacher(self.current_user.id, start_date, end_date)
-
-            self.teacher_earnings_table.setRowCount(len(payments))
-            for row, payment in enumerate(payments):
-                self.teacher_earnings_table.setItem(row, 0, QTableWidgetItem(payment.paid_at.strftime("%Y-%m-%d")))
-
-                yoga_class = session.get(YogaClass, payment.yogaclass_id)
-                class_info = f"Clase {yoga_class.id}" if yoga_class else "N/A"
-                self.teacher_earnings_table.setItem(row, 1, QTableWidgetItem(class_info))
-
-                student = session.get(User, payment.student_id)
-                student_name = student.name if student else "N/A"
-                self.teacher_earnings_table.setItem(row, 2, QTableWidgetItem(student_name))
-
-                self.teacher_earnings_table.setItem(row, 3, QTableWidgetItem(f"${payment.amount:.2f}"))
-
-                # Estado
-                status_item = QTableWidgetItem(payment.status)
-                if payment.status == "paid":
-                    status_item.setForeground(QColor("green"))
-                self.teacher_earnings_table.setItem(row, 4, status_item)
+            self.runner.submit(
+                "earnings", get_total_earnings_by_teacher, self.current_user.id,
+                on_result=lambda total: self.earnings_label.setText(
+                    f"💰 Ganancias Totales: ${total:.2f}"
+                ),
+                on_error=lambda e: self.show_load_error(e, "ganancias"),
+            )
+
+            # Pagos de las clases del profesor en el período
+            self.teacher_earnings_model.set_query(
+                select(Payment).join(YogaClass).where(
+                    YogaClass.teacher_id == self.current_user.id,
+                    Payment.paid_at >= start_date,
+                    Payment.paid_at <= end_date
+                )
+            )
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al cargar ganancias: {str(e)}")
-        finally:
-            session.close()
 
     def load_admin_payments(self):
         start_date = datetime.combine(self.admin_start_date.date().toPyDate(), datetime.min.time())
         end_date = datetime.combine(self.admin_end_date.date().toPyDate(), datetime.max.time())
         status_filter = self.status_combo.currentText()
+        status = None if status_filter == "Todos" else status_filter.lower()
 
-        session = get_session()
         try:
-            payments = get_all_payments(start_date, end_date)
-
-            # Filtrar por estado
-            if status_filter != "Todos":
-                payments = [p for p in payments if p.status == status_filter.lower()]
-
-            self.admin_payments_table.setRowCount(len(payments))
-
-            total_revenue = 0
-            monthly_revenue = 0
-            pending_count = 0
-
-            current_month = datetime.now().month
-
-            for row, payment in enumerate(payments):
-                self.admin_payments_table.setItem(row, 0, QTableWidgetItem(str(payment.id)))
-
-                student = session.get(User, payment.student_id)
-                student_name = student.name if student else "N/A"
-                self.admin_payments_table.setItem(row, 1, QTableWidgetItem(student_name))
-
-                yoga_class = session.get(YogaClass, payment.yogaclass_id)
-                teacher_name = "N/A"
-                if yoga_class and yoga_class.teacher_id:
-                    teacher = session.get(User, yoga_class.teacher_id)
-                    teacher_name = teacher.name if teacher else "N/A"
-                self.admin_payments_table.setItem(row, 2, QTableWidgetItem(teacher_name))
-
-                class_info = f"Clase {yoga_class.id}" if yoga_class else "N/A"
-                self.admin_payments_table.setItem(row, 3, QTableWidgetItem(class_info))
-
-                self.admin_payments_table.setItem(row, 4, QTableWidgetItem(payment.paid_at.strftime("%Y-%m-%d")))
-                self.admin_payments_table.setItem(row, 5, QTableWidgetItem(f"${payment.amount:.2f}"))
-                self.admin_payments_table.setItem(row, 6, QTableWidgetItem(payment.payment_method))
-
-                # Estado con acciones
-                status_item = QTableWidgetItem(payment.status)
-                if payment.status == "paid":
-                    status_item.setForeground(QColor("green"))
-                elif payment.status == "pending":
-                    status_item.setForeground(QColor("orange"))
-                    pending_count += 1
-                elif payment.status == "refunded":
-                    status_item.setForeground(QColor("red"))
-
-                self.admin_payments_table.setItem(row, 7, status_item)
-
-                # Calcular estadísticas
-                total_revenue += payment.amount
-                if payment.paid_at.month == current_month:
-                    monthly_revenue += payment.amount
-
-            # Actualizar etiquetas de estadísticas
-            self.total_revenue_label.setText(f"Ingresos Totales: ${total_revenue:.2f}")
-            self.monthly_revenue_label.setText(f"Ingresos del Mes: ${monthly_revenue:.2f}")
-            self.pending_payments_label.setText(f"Pagos Pendientes: {pending_count}")
+            query = select(Payment).where(
+                Payment.paid_at >= start_date,
+                Payment.paid_at <= end_date
+            )
+            if status:
+                query = query.where(Payment.status == status)
+            self.admin_payments_model.set_query(query)
+
+            # Estadísticas agregadas en SQL, sin recorrer los pagos
+            self.runner.submit(
+                "admin_stats", _admin_payment_stats, start_date, end_date, status,
+                on_result=self.show_admin_stats, on_error=self.show_load_error,
+            )
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al cargar pagos: {str(e)}")
-        finally:
-            session.close()
+
+    def show_admin_stats(self, stats):
+        total_revenue, monthly_revenue, pending_count = stats
+        self.total_revenue_label.setText(f"Ingresos Totales: ${total_revenue:.2f}")
+        self.monthly_revenue_label.setText(f"Ingresos del Mes: ${monthly_revenue:.2f}")
+        self.pending_payments_label.setText(f"Pagos Pendientes: {pending_count}")
 
     def show_payment_dialog(self):
         """Mostrar diálogo de pago."""
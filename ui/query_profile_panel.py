@@ -0,0 +1,105 @@
+"""
+Panel de depuración con el perfil de consultas SQL (database.profiling).
+
+Sólo se ofrece cuando la variable YOGA_PROFILE_QUERIES está activa.
+"""
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import (
+    QDialog, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QMessageBox,
+    QPushButton, QTreeWidget, QTreeWidgetItem, QVBoxLayout,
+)
+
+from database.profiling import N_PLUS_ONE_THRESHOLD, profiler
+
+HEADERS = ["Acción / Consulta", "Llamadas", "Total ms", "p95 ms", "Máx. por invocación", "Helper"]
+
+
+class QueryProfilePanel(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("🐞 Perfil de consultas")
+        self.resize(1100, 600)
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(HEADERS)
+        self.tree.setAlternatingRowColors(True)
+        header = self.tree.header()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for column in range(1, len(HEADERS)):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.tree)
+
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("🔄 Actualizar")
+        refresh_btn.clicked.connect(self.refresh)
+        reset_btn = QPushButton("🧹 Reiniciar")
+        reset_btn.clicked.connect(self.reset)
+        export_btn = QPushButton("📥 Exportar JSON")
+        export_btn.clicked.connect(self.export_json)
+        buttons.addWidget(refresh_btn)
+        buttons.addWidget(reset_btn)
+        buttons.addStretch()
+        buttons.addWidget(export_btn)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+
+    def refresh(self):
+        self.tree.clear()
+        report = profiler.report()
+        flagged = 0
+        for entry in report:
+            action = QTreeWidgetItem([
+                entry["action"], str(entry["count"]), f"{entry['total_ms']:.1f}", "", "", "",
+            ])
+            for query in entry["queries"]:
+                item = QTreeWidgetItem([
+                    query["shape"], str(query["count"]), f"{query['total_ms']:.1f}",
+                    f"{query['p95_ms']:.2f}", str(query["max_per_invocation"]),
+                    query["helper"] or "",
+                ])
+                item.setToolTip(0, query["shape"])
+                if query["n_plus_one"]:
+                    flagged += 1
+                    item.setText(0, f"⚠️ N+1 · {query['shape']}")
+                    for column in range(len(HEADERS)):
+                        item.setForeground(column, QColor("red"))
+                action.addChild(item)
+            if entry["n_plus_one"]:
+                action.setForeground(0, QColor("red"))
+            self.tree.addTopLevelItem(action)
+        for column in range(1, 5):
+            for index in range(self.tree.topLevelItemCount()):
+                self.tree.topLevelItem(index).setTextAlignment(column, Qt.AlignmentFlag.AlignRight)
+
+        statements = sum(entry["count"] for entry in report)
+        self.summary_label.setText(
+            f"{statements} consultas en {len(report)} acciones desde "
+            f"{profiler.started_at:%H:%M:%S} · {flagged} patrones N+1 "
+            f"(≥{N_PLUS_ONE_THRESHOLD} repeticiones por invocación)"
+        )
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
+
+    def export_json(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar perfil", "query_profile.json", "JSON Files (*.json)"
+        )
+        if not file_path:
+            return
+        try:
+            profiler.dump(file_path)
+            QMessageBox.information(self, "Éxito", f"Perfil exportado a:\n{file_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error al exportar: {str(e)}")
@@ -10,8 +10,9 @@ from PyQt6.QtGui import QFont, QColor
 from datetime import datetime, timedelta
 from database.db import (
     get_session, select, YogaClass, Reserve, Add_Payment,
-    Payment, User, Role, get_users_by_role, get_available_classes_for_date
+    Payment, User, Role, get_user_refs, get_available_classes_for_date
 )
+from database.loader import BatchLoader
 
 class ReceptionistPaymentDialog(QDialog):
     def __init__(self, user):
@@ -168,19 +169,14 @@ class ReceptionistPaymentDialog(QDialog):
 
     def load_students(self):
         """Cargar todos los estudiantes en el combo box."""
-        session = get_session()
-        try:
-            students = get_users_by_role(Role.STUDENT)
-            self.student_combo.clear()
-            self.student_combo.addItem("-- Seleccionar Estudiante --", None)
-
-            for student in students:
-                self.student_combo.addItem(
-                    f"{student.name} ({student.email})",
-                    student.id
-                )
-        finally:
-            session.close()
+        self.student_combo.clear()
+        self.student_combo.addItem("-- Seleccionar Estudiante --", None)
+
+        for student in get_user_refs(Role.STUDENT):
+            self.student_combo.addItem(
+                f"{student.name} ({student.email})",
+                student.id
+            )
 
     def load_student_reservations(self):
         """Cargar reservas sin pagar del estudiante seleccionado."""
@@ -201,22 +197,26 @@ class ReceptionistPaymentDialog(QDialog):
                 )
             ).all()
 
+            class_ids = [r.yogaclass_id for r in reservations]
+            loader = BatchLoader(session)
+            loader.register(YogaClass, class_ids).resolve()
+
+            # Clases ya pagadas, en una sola consulta
+            paid_class_ids = set(session.exec(
+                select(Payment.yogaclass_id).where(
+                    Payment.student_id == student_id,
+                    Payment.yogaclass_id.in_(class_ids),
+                    Payment.status == "paid"
+                )
+            ).all()) if class_ids else set()
+
             self.class_combo.clear()
             self.class_combo.addItem("-- Seleccionar Clase --", None)
 
             for reserve in reservations:
-                yoga_class = session.get(YogaClass, reserve.yogaclass_id)
+                yoga_class = loader.get(YogaClass, reserve.yogaclass_id)
                 if yoga_class:
-                    # Verificar si ya tiene pago
-                    existing_payment = session.exec(
-                        select(Payment).where(
-                            Payment.student_id == student_id,
-                            Payment.yogaclass_id == yoga_class.id,
-                            Payment.status == "paid"
-                        )
-                    ).first()
-
-                    if not existing_payment:
+                    if yoga_class.id not in paid_class_ids:
                         class_date = yoga_class.scheduled_at.strftime("%Y-%m-%d %H:%M")
                         self.class_combo.addItem(
                             f"Clase #{yoga_class.id} - {class_date} - ${yoga_class.price:.2f}",
@@ -246,6 +246,9 @@ class ReceptionistPaymentDialog(QDialog):
                 ).order_by(Payment.paid_at.desc())
             ).all()
 
+            loader = BatchLoader(session)
+            loader.register(YogaClass, (p.yogaclass_id for p in payments)).resolve()
+
             self.payments_table.setRowCount(len(payments))
 
             for row, payment in enumerate(payments):
@@ -256,7 +259,7 @@ class ReceptionistPaymentDialog(QDialog):
                 )
 
                 # Clase
-                yoga_class = session.get(YogaClass, payment.yogaclass_id)
+                yoga_class = loader.get(YogaClass, payment.yogaclass_id)
                 class_info = f"Clase #{yoga_class.id}" if yoga_class else "N/A"
                 self.payments_table.setItem(row, 1, QTableWidgetItem(class_info))
 
@@ -1,29 +1,357 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QComboBox, QDateEdit, QTableWidget,
-    QTableWidgetItem, QHeaderView, QMessageBox, QGroupBox,
-    QTextEdit, QTabWidget, QGridLayout, QProgressBar,
-    QFileDialog, QCheckBox, QApplication
+    QTableWidgetItem, QHeaderView, QMessageBox, QGroupBox, QTableView,
+    QTabWidget, QGridLayout, QFileDialog,
 )
-from PyQt6.QtCore import QDate, Qt, QTimer
+from PyQt6.QtCore import QDate, Qt
 from PyQt6.QtGui import QColor, QFont
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import partial
 import csv
-import json
-import os
 from database.db import (
     get_session, select, Payment, User, YogaClass, Role,
-    Center, Attendance, Reserve, get_all_payments,
-    get_attendance_by_class, get_classes_by_date, get_users_by_role,
-    get_payments_by_teacher, get_total_earnings_by_teacher,
-    get_student_statistics, get_teacher_statistics,
-    get_all_centers, get_classes_by_teacher
+    Attendance, get_users_by_role, get_user_by_id,
+    ClassSummary, get_center_refs, get_user_refs,
 )
+from database.exporter import export_data
+from database.loader import BatchLoader
+from models.view_models import Column, SqlTableModel, attach_table_view
+from services.pdf_report import render_financial_pdf
+from services.report_service import (
+    DASHBOARD_HORIZONS, ReportService, executive_dashboard,
+)
+from ui.task_runner import LoadingIndicator, TaskRunner
+
+PAYMENT_STATUS_COLORS = {"paid": "green", "pending": "orange", "refunded": "red"}
+PAYMENT_STATUS_LABELS = {"paid": "✅ Pagado", "pending": "⏳ Pendiente", "refunded": "↩️ Reembolsado"}
+ATTENDANCE_STATUS_COLORS = {"present": "green", "absent": "red", "late": "orange"}
+ATTENDANCE_STATUS_LABELS = {"present": "✅ Presente", "absent": "❌ Ausente", "late": "⏰ Tarde"}
+RIGHT_ALIGN = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+
+def _rate_color(rate, good, fair):
+    """Verde, naranja o rojo según el porcentaje."""
+    if rate >= good:
+        return "green"
+    if rate >= fair:
+        return "orange"
+    return "red"
+
+
+def _student_name(row, loader):
+    student = loader.get(User, row.student_id)
+    return student.name if student else "N/A"
+
+
+def _class_label(row, loader):
+    yoga_class = loader.get(YogaClass, row.yogaclass_id)
+    return f"Clase #{yoga_class.id}" if yoga_class else "N/A"
+
+
+def _class_teacher_name(row, loader):
+    yoga_class = loader.get(YogaClass, row.yogaclass_id)
+    teacher = loader.get(User, yoga_class.teacher_id) if yoga_class else None
+    return teacher.name if teacher else "N/A"
+
+
+def _prefetch_students(loader, rows):
+    loader.register(User, (r.student_id for r in rows))
+
+
+def _prefetch_classes_and_people(loader, rows):
+    classes = loader.load(YogaClass, {r.yogaclass_id for r in rows})
+    loader.register(User, (r.student_id for r in rows))
+    loader.register(User, (c.teacher_id for c in classes.values() if c))
+
+
+PAYMENT_SUMMARY_COLUMNS = [
+    Column("Fecha", lambda p, _: p.paid_at.strftime("%Y-%m-%d %H:%M"), sort=Payment.paid_at),
+    Column("ID Pago", lambda p, _: str(p.id), sort=Payment.id),
+    Column("Estudiante", _student_name),
+    Column("Monto", lambda p, _: f"${p.amount:.2f}", sort=Payment.amount, align=RIGHT_ALIGN),
+    Column("Método", lambda p, _: p.payment_method, sort=Payment.payment_method),
+    Column("Estado", lambda p, _: PAYMENT_STATUS_LABELS.get(p.status, p.status),
+           sort=Payment.status, color=lambda p: PAYMENT_STATUS_COLORS.get(p.status)),
+]
+
+PAYMENT_DETAIL_COLUMNS = [
+    Column("Fecha", lambda p, _: p.paid_at.strftime("%Y-%m-%d %H:%M"), sort=Payment.paid_at),
+    Column("ID", lambda p, _: str(p.id), sort=Payment.id),
+    Column("Estudiante", _student_name),
+    Column("Clase", _class_label),
+    Column("Profesor", _class_teacher_name),
+    Column("Monto", lambda p, _: f"${p.amount:.2f}", sort=Payment.amount, align=RIGHT_ALIGN),
+    Column("Método", lambda p, _: p.payment_method, sort=Payment.payment_method),
+    Column("Estado", lambda p, _: p.status, sort=Payment.status,
+           color=lambda p: PAYMENT_STATUS_COLORS.get(p.status)),
+]
+
+ATTENDANCE_DETAIL_COLUMNS = [
+    Column("Fecha", lambda a, _: a.attended_at.strftime("%Y-%m-%d") if a.attended_at else "N/A",
+           sort=Attendance.attended_at),
+    Column("Hora", lambda a, _: a.attended_at.strftime("%H:%M") if a.attended_at else "N/A"),
+    Column("Estudiante", _student_name),
+    Column("Clase", _class_label),
+    Column("Estado", lambda a, _: ATTENDANCE_STATUS_LABELS.get(a.status, a.status),
+           sort=Attendance.status, color=lambda a: ATTENDANCE_STATUS_COLORS.get(a.status)),
+    Column("Observaciones", lambda a, _: ""),
+]
+
+USER_LIST_COLUMNS = [
+    Column("ID", lambda u, _: str(u.id), sort=User.id),
+    Column("Nombre", lambda u, _: u.name, sort=User.name),
+    Column("Email", lambda u, _: u.email, sort=User.email),
+    Column("Rol", lambda u, _: u.role.value, sort=User.role),
+    Column("Fecha Registro", lambda u, _: u.created_at.strftime("%Y-%m-%d"), sort=User.created_at),
+    Column("Estado", lambda u, _: "✅ Activo" if u.is_active else "❌ Inactivo",
+           color=lambda u: "green" if u.is_active else "red"),
+]
+
+# <------------------- Consultas en segundo plano ------------------>
+# Se ejecutan en el pool de hilos (ui.task_runner): abren su propia sesión y
+# devuelven datos simples; la tabla se rellena después en el hilo de la GUI.
+
+def _month_range(month):
+    """Inicio y fin (exclusivo) del mes `month` del año en curso."""
+    year = datetime.now().year
+    start_date = datetime(year, month, 1)
+    if month == 12:
+        end_date = datetime(year + 1, 1, 1)
+    else:
+        end_date = datetime(year, month + 1, 1)
+    return start_date, end_date
+
+
+def _class_rows(session, classes):
+    """(fecha, id, profesor, inscritos, capacidad) de cada clase."""
+    loader = BatchLoader(session)
+    loader.register(User, (c.teacher_id for c in classes)).resolve()
+    rows = []
+    for yoga_class in classes:
+        teacher = loader.get(User, yoga_class.teacher_id)
+        rows.append((
+            yoga_class.scheduled_at, yoga_class.id,
+            teacher.name if teacher else "N/A",
+            yoga_class.current_capacity, yoga_class.max_capacity,
+        ))
+    return rows
+
+
+def query_reference_data():
+    """Centros y profesores para los combos: ([(id, nombre)], [(id, nombre)])."""
+    centers = [(center.id, center.name) for center in get_center_refs()]
+    teachers = [(teacher.id, teacher.name) for teacher in get_user_refs(Role.TEACHER)]
+    return centers, teachers
+
+
+def query_financial_summary(start_date, end_date, center_id, status):
+    """Estadísticas del resumen financiero, calculadas con consultas agregadas."""
+    filters = dict(start_date=start_date, end_date=end_date, center_id=center_id, status=status)
+
+    by_status = ReportService.aggregate("revenue", ("payments", "revenue"), ("status",), **filters)
+    payment_count = sum(row.payments for row in by_status)
+    total_revenue = sum(row.revenue for row in by_status)
+    status_counts = {row.status: row.payments for row in by_status}
+
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    monthly_revenue = ReportService.aggregate(
+        "revenue", ("revenue",), **dict(filters, start_date=max(start_date, month_start))
+    )[0].revenue
+
+    # Encontrar top estudiante (por alumno no hay resumen: se agrega en SQL)
+    top_student = None
+    if status in (None, "paid"):
+        student_totals = ReportService.aggregate(
+            "payment", ("revenue",), ("student",), **dict(filters, status="paid")
+        )
+        if student_totals:
+            top = max(student_totals, key=lambda row: row.revenue)
+            student = get_user_by_id(top.student)
+            top_student = student.name if student else None
+
+    return {
+        "total_revenue": total_revenue,
+        "monthly_revenue": monthly_revenue,
+        "avg_payment": total_revenue / payment_count if payment_count else 0,
+        "pending_count": status_counts.get("pending", 0),
+        "refunded_count": status_counts.get("refunded", 0),
+        "top_student": top_student,
+    }
+
+
+def query_revenue_by_center(start_date, end_date, status_filter):
+    """[(centro, ingresos)] de los pagos del período, desde el resumen diario."""
+    status = None if status_filter == "Todos" else status_filter
+    totals_by_center = {
+        row.center: row.revenue
+        for row in ReportService.aggregate(
+            "revenue", ("revenue",), ("center",),
+            start_date=start_date, end_date=end_date, status=status
+        )
+    }
+    return [(center.name, totals_by_center.get(center.id, 0)) for center in get_center_refs()]
+
+
+def query_revenue_by_payment_method(start_date, end_date, center_id, status_filter):
+    """[(método, ingresos)] de los pagos del período, desde el resumen diario."""
+    status = None if status_filter == "Todos" else status_filter
+    return [
+        (row.method, row.revenue)
+        for row in ReportService.aggregate(
+            "revenue", ("revenue",), ("method",),
+            start_date=start_date, end_date=end_date, center_id=center_id, status=status
+        )
+    ]
+
+
+def query_attendance_by_class(start_date, end_date, center_id, teacher_id):
+    """[(fecha, id, profesor, inscritos, asistentes)] de las clases del período."""
+    session = get_session()
+    try:
+        query = select(YogaClass).where(
+            YogaClass.scheduled_at >= start_date,
+            YogaClass.scheduled_at <= end_date
+        )
+
+        if center_id:
+            query = query.where(YogaClass.center_id == center_id)
+        if teacher_id:
+            query = query.where(YogaClass.teacher_id == teacher_id)
+
+        classes = session.exec(query.order_by(YogaClass.scheduled_at.asc())).all()
+        class_ids = [c.id for c in classes]
+
+        # Asistentes por clase desde el resumen por clase
+        present_by_class = dict(session.exec(
+            select(ClassSummary.yogaclass_id, ClassSummary.present)
+            .where(ClassSummary.yogaclass_id.in_(class_ids))
+        ).all()) if class_ids else {}
+
+        return [
+            (scheduled_at, class_id, teacher_name, booked, present_by_class.get(class_id, 0))
+            for scheduled_at, class_id, teacher_name, booked, _ in _class_rows(session, classes)
+        ]
+    finally:
+        session.close()
+
+
+def query_attendance_status_counts(start_date, end_date, center_id, teacher_id):
+    """{estado: registros} de la asistencia marcada en el período.
+
+    Misma base que el listado de Detalle de Asistencia (fecha del registro),
+    así el total coincide con sus filas.
+    """
+    rows = ReportService.aggregate(
+        "attendance", ("attendances",), ("status",),
+        start_date=start_date, end_date=end_date,
+        center_id=center_id or None, teacher_id=teacher_id or None,
+    )
+    return {row.status: row.attendances for row in rows}
+
+
+def query_month_classes(month, center_id, teacher_id, order_by, limit=None):
+    """Filas de _class_rows para las clases del mes, en el orden pedido."""
+    session = get_session()
+    try:
+        start_date, end_date = _month_range(month)
+        query = select(YogaClass).where(
+            YogaClass.scheduled_at >= start_date,
+            YogaClass.scheduled_at < end_date
+        )
+
+        if center_id:
+            query = query.where(YogaClass.center_id == center_id)
+        if teacher_id:
+            query = query.where(YogaClass.teacher_id == teacher_id)
+
+        query = query.order_by(order_by)
+        if limit:
+            query = query.limit(limit)
+        return _class_rows(session, session.exec(query).all())
+    finally:
+        session.close()
+
+
+def _report_teachers(teacher_id):
+    """Profesores del reporte: uno concreto o todos, aunque no tengan clases."""
+    if teacher_id:
+        teacher = get_user_by_id(teacher_id)
+        return [teacher] if teacher else []
+    return get_users_by_role(Role.TEACHER)
+
+
+def _by_teacher(rows):
+    return {row.teacher: row for row in rows}
+
+
+def query_teacher_performance(teacher_id, start_date, end_date):
+    """[(profesor, clases, estudiantes, tasa de asistencia, ingresos)].
+
+    Una consulta agrupada por profesor para cada medida, sea cual sea el
+    número de profesores.
+    """
+    teachers = _report_teachers(teacher_id)
+    period = dict(start_date=start_date, end_date=end_date, teacher_id=teacher_id)
+    classes = _by_teacher(ReportService.aggregate(
+        "class", ("classes", "present"), ("teacher",), **period
+    ))
+    students = _by_teacher(ReportService.aggregate(
+        "reserve", ("students",), ("teacher",), **period
+    ))
+    earnings = _by_teacher(ReportService.aggregate(
+        "payment", ("teacher_earnings",), ("teacher",), **period
+    ))
+
+    rows = []
+    for teacher in teachers:
+        total_classes = classes[teacher.id].classes if teacher.id in classes else 0
+        total_attendance = classes[teacher.id].present if teacher.id in classes else 0
+        # Asumiendo 10 estudiantes por clase
+        attendance_rate = (total_attendance / (total_classes * 10)) * 100 if total_classes > 0 else 0
+        rows.append((
+            teacher.name, total_classes,
+            students[teacher.id].students if teacher.id in students else 0,
+            attendance_rate,
+            earnings[teacher.id].teacher_earnings if teacher.id in earnings else 0.0,
+        ))
+    return rows
+
+
+def query_teacher_earnings(teacher_id, start_date, end_date):
+    """[(profesor, clases, pagos, ganancias del período, por clase)]."""
+    teachers = _report_teachers(teacher_id)
+    period = dict(start_date=start_date, end_date=end_date, teacher_id=teacher_id)
+    classes = _by_teacher(ReportService.aggregate(
+        "class", ("classes",), ("teacher",), **period
+    ))
+    payments = _by_teacher(ReportService.aggregate(
+        "payment", ("payments", "teacher_earnings"), ("teacher",), **period
+    ))
+
+    rows = []
+    for teacher in teachers:
+        total_classes = classes[teacher.id].classes if teacher.id in classes else 0
+        paid = payments.get(teacher.id)
+        period_earnings = paid.teacher_earnings if paid else 0.0
+        avg_per_class = period_earnings / total_classes if total_classes else 0
+        rows.append((
+            teacher.name, total_classes, paid.payments if paid else 0,
+            period_earnings, avg_per_class,
+        ))
+    return rows
+
+
+def query_executive_dashboard(months=6, force=False):
+    """KPIs, ingresos de los últimos `months` meses y clases más populares."""
+    return executive_dashboard.get(months, force=force)
+
 
 class ReportsWidget(QWidget):
     def __init__(self, user):
         super().__init__()
         self.current_user = user
+        self.runner = TaskRunner(self)
         self.init_ui()
         self.load_initial_data()
 
@@ -37,6 +365,9 @@ class ReportsWidget(QWidget):
         title.setStyleSheet("color: #2c3e50; padding: 10px;")
         layout.addWidget(title)
 
+        # Estado de carga de las consultas en segundo plano
+        layout.addWidget(LoadingIndicator(self.runner))
+
         # Pestañas para diferentes tipos de reportes
         self.tabs = QTabWidget()
 
@@ -181,6 +512,11 @@ class ReportsWidget(QWidget):
         self.financial_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         layout.addWidget(self.financial_table)
 
+        # Listados de pagos: carga perezosa desde la base de datos
+        self.financial_view = QTableView()
+        self.financial_view.hide()
+        layout.addWidget(self.financial_view)
+
         # Botones de exportación
         export_layout = QHBoxLayout()
 
@@ -294,6 +630,10 @@ class ReportsWidget(QWidget):
         self.attendance_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         layout.addWidget(self.attendance_table)
 
+        self.attendance_view = QTableView()
+        self.attendance_view.hide()
+        layout.addWidget(self.attendance_view)
+
         widget.setLayout(layout)
         return widget
 
@@ -414,8 +754,12 @@ class ReportsWidget(QWidget):
         layout.addWidget(filter_group)
 
         # Tabla de usuarios
-        self.users_table = QTableWidget()
-        self.users_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.users_model = SqlTableModel(
+            USER_LIST_COLUMNS, User.id, order_by=[(User.created_at, True)],
+            runner=self.runner,
+        )
+        self.users_model.loadFailed.connect(self.show_report_error)
+        self.users_table = attach_table_view(QTableView(), self.users_model)
         layout.addWidget(self.users_table)
 
         widget.setLayout(layout)
@@ -532,9 +876,22 @@ class ReportsWidget(QWidget):
 
         layout.addLayout(charts_layout)
 
-        # Botón de actualización
+        # Horizonte de la serie de ingresos
+        horizon_layout = QHBoxLayout()
+        horizon_layout.addWidget(QLabel("Horizonte:"))
+        self.horizon_combo = QComboBox()
+        for months in DASHBOARD_HORIZONS:
+            self.horizon_combo.addItem(f"{months} meses", months)
+        self.horizon_combo.currentIndexChanged.connect(
+            lambda: self.update_executive_dashboard()
+        )
+        horizon_layout.addWidget(self.horizon_combo)
+        horizon_layout.addStretch()
+        layout.addLayout(horizon_layout)
+
+        # Botón de actualización (ignora la caché)
         update_btn = QPushButton("🔄 Actualizar Dashboard")
-        update_btn.clicked.connect(self.update_executive_dashboard)
+        update_btn.clicked.connect(lambda: self.update_executive_dashboard(force=True))
         update_btn.setStyleSheet("""
             QPushButton {
                 background-color: #2c3e50;
@@ -584,33 +941,46 @@ class ReportsWidget(QWidget):
 
     def load_initial_data(self):
         """Cargar datos iniciales en los combos."""
-        session = get_session()
-        try:
-            # Centros
-            centers = get_all_centers()
-            for combo in [self.fin_center_combo, self.att_center_combo,
-                         self.class_center_combo]:
-                combo.clear()
-                combo.addItem("Todos los centros", None)
-                for center in centers:
-                    combo.addItem(center.name, center.id)
-
-            # Profesores
-            teachers = get_users_by_role(Role.TEACHER)
-            for combo in [self.att_teacher_combo, self.class_teacher_combo,
-                         self.teacher_combo]:
-                combo.clear()
-                combo.addItem("Todos los profesores", None)
-                for teacher in teachers:
-                    combo.addItem(teacher.name, teacher.id)
-
-        finally:
-            session.close()
+        self.runner.submit(
+            "combos", query_reference_data,
+            on_result=self.fill_reference_combos, on_error=self.show_report_error,
+        )
 
         # Cargar datos iniciales del dashboard
         if self.current_user.role == Role.ADMINISTRATOR:
             self.update_executive_dashboard()
 
+    def fill_reference_combos(self, data):
+        centers, teachers = data
+
+        # Centros
+        for combo in [self.fin_center_combo, self.att_center_combo,
+                     self.class_center_combo]:
+            combo.clear()
+            combo.addItem("Todos los centros", None)
+            for center_id, name in centers:
+                combo.addItem(name, center_id)
+
+        # Profesores
+        for combo in [self.att_teacher_combo, self.class_teacher_combo,
+                     self.teacher_combo]:
+            combo.clear()
+            combo.addItem("Todos los profesores", None)
+            for teacher_id, name in teachers:
+                combo.addItem(name, teacher_id)
+
+    def show_report_error(self, error):
+        QMessageBox.critical(self, "Error", f"Error al generar reporte: {str(error)}")
+
+    def fill_table(self, table, headers, rows):
+        """Rellenar una tabla con filas de QTableWidgetItem ya construidas."""
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setRowCount(len(rows))
+        for row, items in enumerate(rows):
+            for col, item in enumerate(items):
+                table.setItem(row, col, item)
+
     # ===========================================================================
     # FUNCIONES DE REPORTES FINANCIEROS
     # ===========================================================================
@@ -636,227 +1006,134 @@ class ReportsWidget(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al generar reporte: {str(e)}")
 
+    def show_listing(self, table, view, model, query):
+        """Mostrar un listado perezoso en lugar de la tabla de resultados."""
+        attach_table_view(view, model)
+        model.loadFailed.connect(self.show_report_error)
+        model.set_query(query)
+        table.hide()
+        view.show()
+
+    def show_table(self, table, view):
+        """Volver a la tabla de resultados agregados."""
+        view.hide()
+        table.show()
+
+    def payments_query(self, start_date, end_date, center_id, status_filter):
+        """Consulta de pagos con los filtros del reporte financiero."""
+        query = select(Payment).where(
+            Payment.paid_at >= start_date,
+            Payment.paid_at <= end_date
+        )
+        if status_filter != "Todos":
+            query = query.where(Payment.status == status_filter)
+        if center_id:
+            query = query.join(YogaClass).where(YogaClass.center_id == center_id)
+        return query
+
     def generate_financial_summary(self, start_date, end_date, center_id, status_filter):
         """Generar resumen financiero."""
-        session = get_session()
-        try:
-            # Obtener todos los pagos en el período
-            payments = get_all_payments(start_date, end_date)
-
-            # Aplicar filtros
-            filtered_payments = []
-            for payment in payments:
-                if status_filter != "Todos" and payment.status != status_filter:
-                    continue
-
-                if center_id:
-                    yoga_class = session.get(YogaClass, payment.yogaclass_id)
-                    if yoga_class and yoga_class.center_id != center_id:
-                        continue
-
-                filtered_payments.append(payment)
-
-            # Calcular estadísticas
-            total_revenue = sum(p.amount for p in filtered_payments)
-            monthly_revenue = sum(p.amount for p in filtered_payments
-                                if p.paid_at.month == datetime.now().month and
-                                p.paid_at.year == datetime.now().year)
-            avg_payment = total_revenue / len(filtered_payments) if filtered_payments else 0
-
-            pending_count = len([p for p in filtered_payments if p.status == "pending"])
-            refunded_count = len([p for p in filtered_payments if p.status == "refunded"])
-
-            # Encontrar top estudiante
-            student_totals = {}
-            for payment in filtered_payments:
-                if payment.status == "paid":
-                    student_totals[payment.student_id] = student_totals.get(payment.student_id, 0) + payment.amount
+        status = None if status_filter == "Todos" else status_filter
+        self.runner.submit(
+            "financial", query_financial_summary, start_date, end_date, center_id, status,
+            on_result=self.show_financial_stats, on_error=self.show_report_error,
+        )
 
-            top_student_id = max(student_totals, key=student_totals.get) if student_totals else None
-            top_student = session.get(User, top_student_id) if top_student_id else None
+        model = SqlTableModel(
+            PAYMENT_SUMMARY_COLUMNS, Payment.id,
+            order_by=[(Payment.paid_at, True)], prefetch=_prefetch_students,
+            runner=self.runner,
+        )
+        self.show_listing(
+            self.financial_table, self.financial_view, model,
+            self.payments_query(start_date, end_date, center_id, status_filter)
+        )
 
-            # Actualizar estadísticas
-            self.total_revenue_label.setText(f"💰 Ingresos Totales:\n${total_revenue:,.2f}")
-            self.monthly_revenue_label.setText(f"📅 Ingresos del Mes:\n${monthly_revenue:,.2f}")
-            self.avg_payment_label.setText(f"📊 Pago Promedio:\n${avg_payment:,.2f}")
-            self.pending_payments_label.setText(f"⏳ Pagos Pendientes:\n{pending_count}")
-            self.refunded_payments_label.setText(f"↩️ Pagos Reembolsados:\n{refunded_count}")
-            self.top_student_label.setText(f"🏆 Top Estudiante:\n{top_student.name if top_student else 'N/A'}")
-
-            # Configurar tabla
-            self.financial_table.setColumnCount(6)
-            self.financial_table.setHorizontalHeaderLabels([
-                "Fecha", "ID Pago", "Estudiante", "Monto", "Método", "Estado"
-            ])
-
-            self.financial_table.setRowCount(len(filtered_payments))
-            for row, payment in enumerate(filtered_payments):
-                student = session.get(User, payment.student_id)
-
-                self.financial_table.setItem(row, 0,
-                    QTableWidgetItem(payment.paid_at.strftime("%Y-%m-%d %H:%M")))
-                self.financial_table.setItem(row, 1,
-                    QTableWidgetItem(str(payment.id)))
-                self.financial_table.setItem(row, 2,
-                    QTableWidgetItem(student.name if student else "N/A"))
-
-                amount_item = QTableWidgetItem(f"${payment.amount:.2f}")
-                amount_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.financial_table.setItem(row, 3, amount_item)
-
-                self.financial_table.setItem(row, 4,
-                    QTableWidgetItem(payment.payment_method))
-
-                status_item = QTableWidgetItem(payment.status)
-                if payment.status == "paid":
-                    status_item.setForeground(QColor("green"))
-                    status_item.setText("✅ Pagado")
-                elif payment.status == "pending":
-                    status_item.setForeground(QColor("orange"))
-                    status_item.setText("⏳ Pendiente")
-                elif payment.status == "refunded":
-                    status_item.setForeground(QColor("red"))
-                    status_item.setText("↩️ Reembolsado")
-                self.financial_table.setItem(row, 5, status_item)
-
-        finally:
-            session.close()
+    def show_financial_stats(self, stats):
+        """Actualizar estadísticas."""
+        self.total_revenue_label.setText(f"💰 Ingresos Totales:\n${stats['total_revenue']:,.2f}")
+        self.monthly_revenue_label.setText(f"📅 Ingresos del Mes:\n${stats['monthly_revenue']:,.2f}")
+        self.avg_payment_label.setText(f"📊 Pago Promedio:\n${stats['avg_payment']:,.2f}")
+        self.pending_payments_label.setText(f"⏳ Pagos Pendientes:\n{stats['pending_count']}")
+        self.refunded_payments_label.setText(f"↩️ Pagos Reembolsados:\n{stats['refunded_count']}")
+        self.top_student_label.setText(f"🏆 Top Estudiante:\n{stats['top_student'] or 'N/A'}")
 
     def generate_payment_details(self, start_date, end_date, center_id, status_filter):
         """Generar detalles de pagos."""
-        session = get_session()
-        try:
-            payments = get_all_payments(start_date, end_date)
-
-            # Aplicar filtros
-            filtered_payments = []
-            for payment in payments:
-                if status_filter != "Todos" and payment.status != status_filter:
-                    continue
-
-                if center_id:
-                    yoga_class = session.get(YogaClass, payment.yogaclass_id)
-                    if yoga_class and yoga_class.center_id != center_id:
-                        continue
-
-                filtered_payments.append(payment)
-
-            # Configurar tabla con más detalles
-            self.financial_table.setColumnCount(8)
-            self.financial_table.setHorizontalHeaderLabels([
-                "Fecha", "ID", "Estudiante", "Clase", "Profesor", "Monto", "Método", "Estado"
-            ])
-
-            self.financial_table.setRowCount(len(filtered_payments))
-            for row, payment in enumerate(filtered_payments):
-                student = session.get(User, payment.student_id)
-                yoga_class = session.get(YogaClass, payment.yogaclass_id)
-                teacher = session.get(User, yoga_class.teacher_id) if yoga_class else None
-
-                self.financial_table.setItem(row, 0,
-                    QTableWidgetItem(payment.paid_at.strftime("%Y-%m-%d %H:%M")))
-                self.financial_table.setItem(row, 1,
-                    QTableWidgetItem(str(payment.id)))
-                self.financial_table.setItem(row, 2,
-                    QTableWidgetItem(student.name if student else "N/A"))
-                self.financial_table.setItem(row, 3,
-                    QTableWidgetItem(f"Clase #{yoga_class.id}" if yoga_class else "N/A"))
-                self.financial_table.setItem(row, 4,
-                    QTableWidgetItem(teacher.name if teacher else "N/A"))
-
-                amount_item = QTableWidgetItem(f"${payment.amount:.2f}")
-                amount_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.financial_table.setItem(row, 5, amount_item)
-
-                self.financial_table.setItem(row, 6,
-                    QTableWidgetItem(payment.payment_method))
-
-                status_item = QTableWidgetItem(payment.status)
-                if payment.status == "paid":
-                    status_item.setForeground(QColor("green"))
-                elif payment.status == "pending":
-                    status_item.setForeground(QColor("orange"))
-                elif payment.status == "refunded":
-                    status_item.setForeground(QColor("red"))
-                self.financial_table.setItem(row, 7, status_item)
-
-        finally:
-            session.close()
+        model = SqlTableModel(
+            PAYMENT_DETAIL_COLUMNS, Payment.id,
+            order_by=[(Payment.paid_at, True)], prefetch=_prefetch_classes_and_people,
+            runner=self.runner,
+        )
+        self.show_listing(
+            self.financial_table, self.financial_view, model,
+            self.payments_query(start_date, end_date, center_id, status_filter)
+        )
 
     def generate_revenue_by_center(self, start_date, end_date, status_filter):
         """Generar ingresos por centro."""
-        session = get_session()
-        try:
-            centers = get_all_centers()
-            center_revenue = {}
-
-            for center in centers:
-                payments = get_all_payments(start_date, end_date)
-                center_total = 0
-
-                for payment in payments:
-                    if status_filter != "Todos" and payment.status != status_filter:
-                        continue
-
-                    yoga_class = session.get(YogaClass, payment.yogaclass_id)
-                    if yoga_class and yoga_class.center_id == center.id:
-                        center_total += payment.amount
-
-                center_revenue[center.name] = center_total
-
-            # Configurar tabla
-            self.financial_table.setColumnCount(2)
-            self.financial_table.setHorizontalHeaderLabels(["Centro", "Ingresos"])
-
-            self.financial_table.setRowCount(len(center_revenue))
-
-            for row, (center_name, revenue) in enumerate(center_revenue.items()):
-                self.financial_table.setItem(row, 0, QTableWidgetItem(center_name))
-
-                revenue_item = QTableWidgetItem(f"${revenue:,.2f}")
-                revenue_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.financial_table.setItem(row, 1, revenue_item)
-
-        finally:
-            session.close()
+        self.show_table(self.financial_table, self.financial_view)
+        self.runner.submit(
+            "financial", query_revenue_by_center, start_date, end_date, status_filter,
+            on_result=lambda rows: self.show_revenue(["Centro", "Ingresos"], rows),
+            on_error=self.show_report_error,
+        )
 
     def generate_revenue_by_payment_method(self, start_date, end_date, center_id, status_filter):
         """Generar ingresos por método de pago."""
-        session = get_session()
-        try:
-            payments = get_all_payments(start_date, end_date)
-            method_revenue = {}
-
-            for payment in payments:
-                if status_filter != "Todos" and payment.status != status_filter:
-                    continue
-
-                if center_id:
-                    yoga_class = session.get(YogaClass, payment.yogaclass_id)
-                    if yoga_class and yoga_class.center_id != center_id:
-                        continue
-
-                method_revenue[payment.payment_method] = method_revenue.get(payment.payment_method, 0) + payment.amount
-
-            # Configurar tabla
-            self.financial_table.setColumnCount(2)
-            self.financial_table.setHorizontalHeaderLabels(["Método de Pago", "Ingresos"])
+        self.show_table(self.financial_table, self.financial_view)
+        self.runner.submit(
+            "financial", query_revenue_by_payment_method,
+            start_date, end_date, center_id, status_filter,
+            on_result=lambda rows: self.show_revenue(["Método de Pago", "Ingresos"], rows),
+            on_error=self.show_report_error,
+        )
 
-            self.financial_table.setRowCount(len(method_revenue))
+    def show_revenue(self, headers, rows):
+        """Tabla de dos columnas: concepto e ingresos."""
+        items = []
+        for name, revenue in rows:
+            revenue_item = QTableWidgetItem(f"${revenue:,.2f}")
+            revenue_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            items.append([QTableWidgetItem(name), revenue_item])
+        self.fill_table(self.financial_table, headers, items)
 
-            for row, (method, revenue) in enumerate(method_revenue.items()):
-                self.financial_table.setItem(row, 0, QTableWidgetItem(method))
+    def export_financial_csv(self):
+        """Exportar reporte financiero a CSV o JSON Lines."""
+        report_type = self.fin_report_type.currentText()
+        if report_type in ("Ingresos por Centro", "Ingresos por Método de Pago"):
+            # Agregados ya calculados: una fila por centro o método
+            self.export_table_csv(self.financial_table)
+            return
 
-                revenue_item = QTableWidgetItem(f"${revenue:,.2f}")
-                revenue_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.financial_table.setItem(row, 1, revenue_item)
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar pagos", "",
+            "CSV Files (*.csv);;JSON Lines (*.jsonl)"
+        )
+        if not file_path:
+            return
 
-        finally:
-            session.close()
+        # Los pagos se leen de la base de datos por bloques, no de la tabla
+        status_filter = self.fin_status_combo.currentText()
+        export = partial(
+            export_data, "payments", file_path,
+            start_date=datetime.combine(self.fin_start_date.date().toPyDate(), datetime.min.time()),
+            end_date=datetime.combine(self.fin_end_date.date().toPyDate(), datetime.max.time()),
+            center_id=self.fin_center_combo.currentData(),
+            status=None if status_filter == "Todos" else status_filter,
+        )
+        self.runner.submit(
+            "export_csv", export,
+            on_result=lambda report: QMessageBox.information(
+                self, "Éxito", f"{report.rows:,} pagos exportados a:\n{report.path}"
+            ),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Error al exportar: {str(e)}"),
+            progress=True,
+        )
 
-    def export_financial_csv(self):
-        """Exportar reporte financiero a CSV."""
-        if self.financial_table.rowCount() == 0:
+    def export_table_csv(self, table):
+        """Exportar a CSV las filas de una tabla de resultados agregados."""
+        if table.rowCount() == 0:
             QMessageBox.warning(self, "Advertencia", "No hay datos para exportar")
             return
 
@@ -868,20 +1145,15 @@ class ReportsWidget(QWidget):
             try:
                 with open(file_path, 'w', newline='', encoding='utf-8') as file:
                     writer = csv.writer(file)
-
-                    # Escribir encabezados
-                    headers = []
-                    for col in range(self.financial_table.columnCount()):
-                        headers.append(self.financial_table.horizontalHeaderItem(col).text())
-                    writer.writerow(headers)
-
-                    # Escribir datos
-                    for row in range(self.financial_table.rowCount()):
-                        row_data = []
-                        for col in range(self.financial_table.columnCount()):
-                            item = self.financial_table.item(row, col)
-                            row_data.append(item.text() if item else "")
-                        writer.writerow(row_data)
+                    writer.writerow([
+                        table.horizontalHeaderItem(col).text()
+                        for col in range(table.columnCount())
+                    ])
+                    for row in range(table.rowCount()):
+                        writer.writerow([
+                            item.text() if (item := table.item(row, col)) else ""
+                            for col in range(table.columnCount())
+                        ])
 
                 QMessageBox.information(self, "Éxito", f"Reporte exportado a:\n{file_path}")
 
@@ -889,12 +1161,29 @@ class ReportsWidget(QWidget):
                 QMessageBox.critical(self, "Error", f"Error al exportar: {str(e)}")
 
     def export_financial_pdf(self):
-        """Exportar reporte financiero a PDF (simulado)."""
-        QMessageBox.information(
-            self,
-            "Exportar a PDF",
-            "La exportación a PDF está en desarrollo.\n"
-            "Por ahora, use la exportación a CSV."
+        """Exportar los pagos del período a PDF, una sección por centro."""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Generar PDF", "", "PDF Files (*.pdf)"
+        )
+        if not file_path:
+            return
+
+        status_filter = self.fin_status_combo.currentText()
+        render = partial(
+            render_financial_pdf, file_path,
+            start_date=datetime.combine(self.fin_start_date.date().toPyDate(), datetime.min.time()),
+            end_date=datetime.combine(self.fin_end_date.date().toPyDate(), datetime.max.time()),
+            center_id=self.fin_center_combo.currentData(),
+            status=None if status_filter == "Todos" else status_filter,
+        )
+        self.runner.submit(
+            "export_pdf", render,
+            on_result=lambda report: QMessageBox.information(
+                self, "Éxito",
+                f"PDF generado ({report.pages} páginas, {report.rows:,} pagos):\n{report.path}"
+            ),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Error al generar PDF: {str(e)}"),
+            progress=True,
         )
 
     # ===========================================================================
@@ -920,166 +1209,91 @@ class ReportsWidget(QWidget):
 
     def generate_attendance_by_class(self, start_date, end_date, center_id, teacher_id):
         """Generar resumen de asistencia por clase."""
-        session = get_session()
-        try:
-            # Obtener clases en el período
-            query = select(YogaClass).where(
-                YogaClass.scheduled_at >= start_date,
-                YogaClass.scheduled_at <= end_date
-            )
-
-            if center_id:
-                query = query.where(YogaClass.center_id == center_id)
-            if teacher_id:
-                query = query.where(YogaClass.teacher_id == teacher_id)
-
-            classes = session.exec(query.order_by(YogaClass.scheduled_at.asc())).all()
-
-            # Configurar tabla
-            self.attendance_table.setColumnCount(7)
-            self.attendance_table.setHorizontalHeaderLabels([
-                "Fecha", "Hora", "Clase", "Profesor", "Inscritos", "Asistentes", "Tasa"
-            ])
-
-            self.attendance_table.setRowCount(len(classes))
+        self.show_table(self.attendance_table, self.attendance_view)
+        # Los filtros se leen ahora: el combo puede cambiar antes de que llegue el resultado
+        center_name = 'Todos' if not center_id else self.att_center_combo.currentText()
+        teacher_name = 'Todos' if not teacher_id else self.att_teacher_combo.currentText()
 
+        def show(classes):
+            items = []
             total_inscritos = 0
             total_asistentes = 0
 
-            for row, yoga_class in enumerate(classes):
-                # Fecha y hora
-                self.attendance_table.setItem(row, 0,
-                    QTableWidgetItem(yoga_class.scheduled_at.strftime("%Y-%m-%d")))
-                self.attendance_table.setItem(row, 1,
-                    QTableWidgetItem(yoga_class.scheduled_at.strftime("%H:%M")))
-                self.attendance_table.setItem(row, 2,
-                    QTableWidgetItem(f"Clase #{yoga_class.id}"))
-
-                # Profesor
-                teacher = session.get(User, yoga_class.teacher_id)
-                self.attendance_table.setItem(row, 3,
-                    QTableWidgetItem(teacher.name if teacher else "N/A"))
-
-                # Inscritos
-                inscritos = yoga_class.current_capacity
-                self.attendance_table.setItem(row, 4, QTableWidgetItem(str(inscritos)))
+            for scheduled_at, class_id, teacher, inscritos, asistentes in classes:
                 total_inscritos += inscritos
-
-                # Asistentes
-                attendances = session.exec(
-                    select(Attendance).where(
-                        Attendance.yogaclass_id == yoga_class.id,
-                        Attendance.status == "present"
-                    )
-                ).all()
-                asistentes = len(attendances)
-                self.attendance_table.setItem(row, 5, QTableWidgetItem(str(asistentes)))
                 total_asistentes += asistentes
 
                 # Tasa de asistencia
                 tasa = (asistentes / inscritos * 100) if inscritos > 0 else 0
                 tasa_item = QTableWidgetItem(f"{tasa:.1f}%")
-                if tasa >= 80:
-                    tasa_item.setForeground(QColor("green"))
-                elif tasa >= 50:
-                    tasa_item.setForeground(QColor("orange"))
-                else:
-                    tasa_item.setForeground(QColor("red"))
-                self.attendance_table.setItem(row, 6, tasa_item)
+                tasa_item.setForeground(QColor(_rate_color(tasa, 80, 50)))
+
+                items.append([
+                    QTableWidgetItem(scheduled_at.strftime("%Y-%m-%d")),
+                    QTableWidgetItem(scheduled_at.strftime("%H:%M")),
+                    QTableWidgetItem(f"Clase #{class_id}"),
+                    QTableWidgetItem(teacher),
+                    QTableWidgetItem(str(inscritos)),
+                    QTableWidgetItem(str(asistentes)),
+                    tasa_item,
+                ])
+
+            self.fill_table(self.attendance_table, [
+                "Fecha", "Hora", "Clase", "Profesor", "Inscritos", "Asistentes", "Tasa"
+            ], items)
 
             # Actualizar estadísticas
             tasa_total = (total_asistentes / total_inscritos * 100) if total_inscritos > 0 else 0
             self.att_stats_label.setText(
                 f"📊 Resumen de Asistencia\n"
                 f"📅 Período: {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}\n"
-                f"🏢 Centro: {'Todos' if not center_id else self.att_center_combo.currentText()}\n"
-                f"👨‍🏫 Profesor: {'Todos' if not teacher_id else self.att_teacher_combo.currentText()}\n"
+                f"🏢 Centro: {center_name}\n"
+                f"👨‍🏫 Profesor: {teacher_name}\n"
                 f"🎯 Total Clases: {len(classes)}\n"
                 f"👥 Total Inscritos: {total_inscritos}\n"
                 f"✅ Total Asistentes: {total_asistentes}\n"
                 f"📊 Tasa de Asistencia: {tasa_total:.1f}%"
             )
 
-        finally:
-            session.close()
+        self.runner.submit(
+            "attendance", query_attendance_by_class, start_date, end_date, center_id, teacher_id,
+            on_result=show, on_error=self.show_report_error,
+        )
 
     def generate_attendance_details(self, start_date, end_date, center_id, teacher_id):
         """Generar detalle de asistencia."""
-        session = get_session()
-        try:
-            # Obtener todas las asistencias en el período
-            query = select(Attendance).where(
-                Attendance.attended_at >= start_date,
-                Attendance.attended_at <= end_date
-            )
-
-            attendances = session.exec(query.order_by(Attendance.attended_at.desc())).all()
-
-            # Configurar tabla
-            self.attendance_table.setColumnCount(6)
-            self.attendance_table.setHorizontalHeaderLabels([
-                "Fecha", "Hora", "Estudiante", "Clase", "Estado", "Observaciones"
-            ])
-
-            filtered_attendances = []
-            for attendance in attendances:
-                yoga_class = session.get(YogaClass, attendance.yogaclass_id)
-                if not yoga_class:
-                    continue
-
-                if center_id and yoga_class.center_id != center_id:
-                    continue
-
-                if teacher_id and yoga_class.teacher_id != teacher_id:
-                    continue
-
-                filtered_attendances.append(attendance)
-
-            self.attendance_table.setRowCount(len(filtered_attendances))
-
-            for row, attendance in enumerate(filtered_attendances):
-                yoga_class = session.get(YogaClass, attendance.yogaclass_id)
-                student = session.get(User, attendance.student_id)
-
-                self.attendance_table.setItem(row, 0,
-                    QTableWidgetItem(attendance.attended_at.strftime("%Y-%m-%d") if attendance.attended_at else "N/A"))
-                self.attendance_table.setItem(row, 1,
-                    QTableWidgetItem(attendance.attended_at.strftime("%H:%M") if attendance.attended_at else "N/A"))
-                self.attendance_table.setItem(row, 2,
-                    QTableWidgetItem(student.name if student else "N/A"))
-                self.attendance_table.setItem(row, 3,
-                    QTableWidgetItem(f"Clase #{yoga_class.id}" if yoga_class else "N/A"))
-
-                status_item = QTableWidgetItem(attendance.status)
-                if attendance.status == "present":
-                    status_item.setForeground(QColor("green"))
-                    status_item.setText("✅ Presente")
-                elif attendance.status == "absent":
-                    status_item.setForeground(QColor("red"))
-                    status_item.setText("❌ Ausente")
-                elif attendance.status == "late":
-                    status_item.setForeground(QColor("orange"))
-                    status_item.setText("⏰ Tarde")
-                self.attendance_table.setItem(row, 4, status_item)
-
-                self.attendance_table.setItem(row, 5, QTableWidgetItem(""))
-
-            # Actualizar estadísticas
-            presentes = len([a for a in filtered_attendances if a.status == "present"])
-            ausentes = len([a for a in filtered_attendances if a.status == "absent"])
-            tardes = len([a for a in filtered_attendances if a.status == "late"])
+        query = select(Attendance).join(YogaClass).where(
+            Attendance.attended_at >= start_date,
+            Attendance.attended_at <= end_date
+        )
+        if center_id:
+            query = query.where(YogaClass.center_id == center_id)
+        if teacher_id:
+            query = query.where(YogaClass.teacher_id == teacher_id)
+
+        model = SqlTableModel(
+            ATTENDANCE_DETAIL_COLUMNS, Attendance.id,
+            order_by=[(Attendance.attended_at, True)], prefetch=_prefetch_classes_and_people,
+            runner=self.runner,
+        )
+        self.show_listing(self.attendance_table, self.attendance_view, model, query)
 
+        # Actualizar estadísticas
+        def show(status_counts):
             self.att_stats_label.setText(
                 f"📋 Detalle de Asistencia\n"
                 f"📅 Período: {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}\n"
-                f"🎯 Total Registros: {len(filtered_attendances)}\n"
-                f"✅ Presentes: {presentes}\n"
-                f"❌ Ausentes: {ausentes}\n"
-                f"⏰ Tardes: {tardes}"
+                f"🎯 Total Registros: {sum(status_counts.values())}\n"
+                f"✅ Presentes: {status_counts.get('present', 0)}\n"
+                f"❌ Ausentes: {status_counts.get('absent', 0)}\n"
+                f"⏰ Tardes: {status_counts.get('late', 0)}"
             )
 
-        finally:
-            session.close()
+        self.runner.submit(
+            "attendance", query_attendance_status_counts,
+            start_date, end_date, center_id, teacher_id,
+            on_result=show, on_error=self.show_report_error,
+        )
 
     # ===========================================================================
     # FUNCIONES DE REPORTES DE CLASES
@@ -1103,131 +1317,61 @@ class ReportsWidget(QWidget):
 
     def generate_class_calendar(self, month, center_id, teacher_id):
         """Generar calendario de clases."""
-        session = get_session()
-        try:
-            # Obtener clases del mes
-            year = datetime.now().year
-            start_date = datetime(year, month, 1)
-            if month == 12:
-                end_date = datetime(year + 1, 1, 1)
-            else:
-                end_date = datetime(year, month + 1, 1)
-
-            query = select(YogaClass).where(
-                YogaClass.scheduled_at >= start_date,
-                YogaClass.scheduled_at < end_date
-            )
-
-            if center_id:
-                query = query.where(YogaClass.center_id == center_id)
-            if teacher_id:
-                query = query.where(YogaClass.teacher_id == teacher_id)
-
-            classes = session.exec(query.order_by(YogaClass.scheduled_at.asc())).all()
-
-            # Configurar tabla
-            self.classes_table.setColumnCount(6)
-            self.classes_table.setHorizontalHeaderLabels([
-                "Fecha", "Hora", "Clase", "Profesor", "Capacidad", "Ocupación"
-            ])
-
-            self.classes_table.setRowCount(len(classes))
-
-            total_capacity = 0
-            total_booked = 0
-
-            for row, yoga_class in enumerate(classes):
-                teacher = session.get(User, yoga_class.teacher_id)
-
-                self.classes_table.setItem(row, 0,
-                    QTableWidgetItem(yoga_class.scheduled_at.strftime("%Y-%m-%d")))
-                self.classes_table.setItem(row, 1,
-                    QTableWidgetItem(yoga_class.scheduled_at.strftime("%H:%M")))
-                self.classes_table.setItem(row, 2,
-                    QTableWidgetItem(f"Clase #{yoga_class.id}"))
-                self.classes_table.setItem(row, 3,
-                    QTableWidgetItem(teacher.name if teacher else "N/A"))
-
-                capacity_item = QTableWidgetItem(f"{yoga_class.current_capacity}/{yoga_class.max_capacity}")
-                self.classes_table.setItem(row, 4, capacity_item)
-
-                total_capacity += yoga_class.max_capacity
-                total_booked += yoga_class.current_capacity
-
+        def show(classes):
+            items = []
+            for scheduled_at, class_id, teacher, booked, capacity in classes:
                 # Ocupación
-                ocupacion = (yoga_class.current_capacity / yoga_class.max_capacity * 100) if yoga_class.max_capacity > 0 else 0
+                ocupacion = (booked / capacity * 100) if capacity > 0 else 0
                 ocupacion_item = QTableWidgetItem(f"{ocupacion:.1f}%")
-                if ocupacion >= 80:
-                    ocupacion_item.setForeground(QColor("green"))
-                elif ocupacion >= 50:
-                    ocupacion_item.setForeground(QColor("orange"))
-                else:
-                    ocupacion_item.setForeground(QColor("red"))
-                self.classes_table.setItem(row, 5, ocupacion_item)
+                ocupacion_item.setForeground(QColor(_rate_color(ocupacion, 80, 50)))
+
+                items.append([
+                    QTableWidgetItem(scheduled_at.strftime("%Y-%m-%d")),
+                    QTableWidgetItem(scheduled_at.strftime("%H:%M")),
+                    QTableWidgetItem(f"Clase #{class_id}"),
+                    QTableWidgetItem(teacher),
+                    QTableWidgetItem(f"{booked}/{capacity}"),
+                    ocupacion_item,
+                ])
+
+            self.fill_table(self.classes_table, [
+                "Fecha", "Hora", "Clase", "Profesor", "Capacidad", "Ocupación"
+            ], items)
 
-        finally:
-            session.close()
+        self.runner.submit(
+            "classes", query_month_classes,
+            month, center_id, teacher_id, YogaClass.scheduled_at.asc(),
+            on_result=show, on_error=self.show_report_error,
+        )
 
     def generate_popular_classes(self, month, center_id, teacher_id):
         """Generar clases más populares."""
-        session = get_session()
-        try:
-            # Obtener clases del mes
-            year = datetime.now().year
-            start_date = datetime(year, month, 1)
-            if month == 12:
-                end_date = datetime(year + 1, 1, 1)
-            else:
-                end_date = datetime(year, month + 1, 1)
-
-            query = select(YogaClass).where(
-                YogaClass.scheduled_at >= start_date,
-                YogaClass.scheduled_at < end_date
-            )
-
-            if center_id:
-                query = query.where(YogaClass.center_id == center_id)
-            if teacher_id:
-                query = query.where(YogaClass.teacher_id == teacher_id)
-
-            classes = session.exec(query.order_by(YogaClass.current_capacity.desc())).all()
+        def show(top_classes):
+            items = []
+            for scheduled_at, class_id, teacher, booked, capacity in top_classes:
+                # Ocupación
+                ocupacion = (booked / capacity * 100) if capacity > 0 else 0
+                ocupacion_item = QTableWidgetItem(f"{ocupacion:.1f}%")
+                ocupacion_item.setForeground(QColor(_rate_color(ocupacion, 80, 50)))
 
-            # Tomar solo las 10 más populares
-            top_classes = classes[:10]
+                items.append([
+                    QTableWidgetItem(f"Clase #{class_id}"),
+                    QTableWidgetItem(scheduled_at.strftime("%Y-%m-%d %H:%M")),
+                    QTableWidgetItem(teacher),
+                    QTableWidgetItem(f"{booked}/{capacity}"),
+                    ocupacion_item,
+                ])
 
-            # Configurar tabla
-            self.classes_table.setColumnCount(5)
-            self.classes_table.setHorizontalHeaderLabels([
+            self.fill_table(self.classes_table, [
                 "Clase", "Fecha", "Profesor", "Inscritos", "Ocupación"
-            ])
-
-            self.classes_table.setRowCount(len(top_classes))
+            ], items)
 
-            for row, yoga_class in enumerate(top_classes):
-                teacher = session.get(User, yoga_class.teacher_id)
-
-                self.classes_table.setItem(row, 0,
-                    QTableWidgetItem(f"Clase #{yoga_class.id}"))
-                self.classes_table.setItem(row, 1,
-                    QTableWidgetItem(yoga_class.scheduled_at.strftime("%Y-%m-%d %H:%M")))
-                self.classes_table.setItem(row, 2,
-                    QTableWidgetItem(teacher.name if teacher else "N/A"))
-                self.classes_table.setItem(row, 3,
-                    QTableWidgetItem(f"{yoga_class.current_capacity}/{yoga_class.max_capacity}"))
-
-                # Ocupación
-                ocupacion = (yoga_class.current_capacity / yoga_class.max_capacity * 100) if yoga_class.max_capacity > 0 else 0
-                ocupacion_item = QTableWidgetItem(f"{ocupacion:.1f}%")
-                if ocupacion >= 80:
-                    ocupacion_item.setForeground(QColor("green"))
-                elif ocupacion >= 50:
-                    ocupacion_item.setForeground(QColor("orange"))
-                else:
-                    ocupacion_item.setForeground(QColor("red"))
-                self.classes_table.setItem(row, 4, ocupacion_item)
-
-        finally:
-            session.close()
+        # Tomar solo las 10 más populares
+        self.runner.submit(
+            "classes", query_month_classes,
+            month, center_id, teacher_id, YogaClass.current_capacity.desc(), 10,
+            on_result=show, on_error=self.show_report_error,
+        )
 
     # ===========================================================================
     # FUNCIONES DE REPORTES DE USUARIOS
@@ -1249,43 +1393,18 @@ class ReportsWidget(QWidget):
 
     def generate_user_list(self, role_filter, start_date, status_filter):
         """Generar listado de usuarios."""
-        session = get_session()
-        try:
-            query = select(User).where(User.created_at >= start_date)
-
-            if role_filter != "Todos":
-                query = query.where(User.role == role_filter)
-
-            users = session.exec(query.order_by(User.created_at.desc())).all()
-
-            # Aplicar filtro de estado
-            if status_filter == "Activos":
-                users = [u for u in users if u.is_active]
-            elif status_filter == "Inactivos":
-                users = [u for u in users if not u.is_active]
+        query = select(User).where(User.created_at >= start_date)
 
-            # Configurar tabla
-            self.users_table.setColumnCount(6)
-            self.users_table.setHorizontalHeaderLabels([
-                "ID", "Nombre", "Email", "Rol", "Fecha Registro", "Estado"
-            ])
+        if role_filter != "Todos":
+            query = query.where(User.role == role_filter)
 
-            self.users_table.setRowCount(len(users))
+        # Aplicar filtro de estado
+        if status_filter == "Activos":
+            query = query.where(User.is_active == True)
+        elif status_filter == "Inactivos":
+            query = query.where(User.is_active == False)
 
-            for row, user in enumerate(users):
-                self.users_table.setItem(row, 0, QTableWidgetItem(str(user.id)))
-                self.users_table.setItem(row, 1, QTableWidgetItem(user.name))
-                self.users_table.setItem(row, 2, QTableWidgetItem(user.email))
-                self.users_table.setItem(row, 3, QTableWidgetItem(user.role.value))
-                self.users_table.setItem(row, 4,
-                    QTableWidgetItem(user.created_at.strftime("%Y-%m-%d")))
-
-                status_item = QTableWidgetItem("✅ Activo" if user.is_active else "❌ Inactivo")
-                status_item.setForeground(QColor("green") if user.is_active else QColor("red"))
-                self.users_table.setItem(row, 5, status_item)
-
-        finally:
-            session.close()
+        self.users_model.set_query(query)
 
     # ===========================================================================
     # FUNCIONES DE REPORTES DE PROFESORES
@@ -1309,238 +1428,97 @@ class ReportsWidget(QWidget):
 
     def generate_teacher_performance(self, teacher_id, start_date, end_date):
         """Generar rendimiento de profesores."""
-        session = get_session()
-        try:
-            # Obtener todos los profesores o uno específico
-            if teacher_id:
-                teachers = [session.get(User, teacher_id)]
-            else:
-                teachers = get_users_by_role(Role.TEACHER)
-
-            # Configurar tabla
-            self.teachers_table.setColumnCount(6)
-            self.teachers_table.setHorizontalHeaderLabels([
-                "Profesor", "Clases", "Estudiantes", "Asistencia", "Ingresos", "Rating"
-            ])
-
-            self.teachers_table.setRowCount(len(teachers))
-
-            for row, teacher in enumerate(teachers):
-                if not teacher:
-                    continue
-
-                # Clases impartidas
-                classes = get_classes_by_teacher(teacher.id, None)
-                classes_in_period = [c for c in classes if start_date <= c.scheduled_at <= end_date]
-
-                # Estudiantes únicos
-                student_ids = set()
-                for yoga_class in classes_in_period:
-                    reservations = session.exec(
-                        select(Reserve).where(Reserve.yogaclass_id == yoga_class.id)
-                    ).all()
-                    for reservation in reservations:
-                        student_ids.add(reservation.student_id)
-
-                # Asistencia promedio
-                total_attendance = 0
-                total_classes = 0
-                for yoga_class in classes_in_period:
-                    attendances = session.exec(
-                        select(Attendance).where(
-                            Attendance.yogaclass_id == yoga_class.id,
-                            Attendance.status == "present"
-                        )
-                    ).all()
-                    total_attendance += len(attendances)
-                    total_classes += 1
-
-                attendance_rate = (total_attendance / (total_classes * 10)) * 100 if total_classes > 0 else 0  # Asumiendo 10 estudiantes por clase
-
-                # Ingresos
-                earnings = get_total_earnings_by_teacher(teacher.id)
-
-                self.teachers_table.setItem(row, 0, QTableWidgetItem(teacher.name))
-                self.teachers_table.setItem(row, 1, QTableWidgetItem(str(len(classes_in_period))))
-                self.teachers_table.setItem(row, 2, QTableWidgetItem(str(len(student_ids))))
-
+        def show(teachers):
+            items = []
+            for name, classes, students, attendance_rate, earnings in teachers:
                 attendance_item = QTableWidgetItem(f"{attendance_rate:.1f}%")
-                if attendance_rate >= 80:
-                    attendance_item.setForeground(QColor("green"))
-                elif attendance_rate >= 60:
-                    attendance_item.setForeground(QColor("orange"))
-                else:
-                    attendance_item.setForeground(QColor("red"))
-                self.teachers_table.setItem(row, 3, attendance_item)
+                attendance_item.setForeground(QColor(_rate_color(attendance_rate, 80, 60)))
 
                 earnings_item = QTableWidgetItem(f"${earnings:,.2f}")
                 earnings_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.teachers_table.setItem(row, 4, earnings_item)
 
                 # Rating (simulado)
                 rating = min(5.0, attendance_rate / 20)  # Convertir porcentaje a rating 1-5
                 rating_item = QTableWidgetItem("⭐" * int(rating) + "☆" * (5 - int(rating)))
-                self.teachers_table.setItem(row, 5, rating_item)
 
-        finally:
-            session.close()
+                items.append([
+                    QTableWidgetItem(name),
+                    QTableWidgetItem(str(classes)),
+                    QTableWidgetItem(str(students)),
+                    attendance_item,
+                    earnings_item,
+                    rating_item,
+                ])
 
-    def generate_teacher_earnings(self, teacher_id, start_date, end_date):
-        """Generar ganancias detalladas de profesores."""
-        session = get_session()
-        try:
-            # Obtener todos los profesores o uno específico
-            if teacher_id:
-                teachers = [session.get(User, teacher_id)]
-            else:
-                teachers = get_users_by_role(Role.TEACHER)
-
-            # Configurar tabla
-            self.teachers_table.setColumnCount(5)
-            self.teachers_table.setHorizontalHeaderLabels([
-                "Profesor", "Clases", "Pagos", "Total", "Por Clase"
-            ])
-
-            self.teachers_table.setRowCount(len(teachers))
-
-            for row, teacher in enumerate(teachers):
-                if not teacher:
-                    continue
-
-                # Clases impartidas en el período
-                classes = get_classes_by_teacher(teacher.id, None)
-                classes_in_period = [c for c in classes if start_date <= c.scheduled_at <= end_date]
-
-                # Pagos recibidos
-                payments = get_payments_by_teacher(teacher.id, start_date, end_date)
-                total_earnings = get_total_earnings_by_teacher(teacher.id)
-
-                # Calcular ganancias del período
-                period_earnings = 0
-                for payment in payments:
-                    yoga_class = session.get(YogaClass, payment.yogaclass_id)
-                    if yoga_class:
-                        teacher_share = payment.amount * (yoga_class.teacher_share_percentage / 100)
-                        period_earnings += teacher_share
-
-                avg_per_class = period_earnings / len(classes_in_period) if classes_in_period else 0
+            self.fill_table(self.teachers_table, [
+                "Profesor", "Clases", "Estudiantes", "Asistencia", "Ingresos", "Rating"
+            ], items)
 
-                self.teachers_table.setItem(row, 0, QTableWidgetItem(teacher.name))
-                self.teachers_table.setItem(row, 1, QTableWidgetItem(str(len(classes_in_period))))
-                self.teachers_table.setItem(row, 2, QTableWidgetItem(str(len(payments))))
+        self.runner.submit(
+            "teachers", query_teacher_performance, teacher_id, start_date, end_date,
+            on_result=show, on_error=self.show_report_error,
+        )
 
+    def generate_teacher_earnings(self, teacher_id, start_date, end_date):
+        """Generar ganancias detalladas de profesores."""
+        def show(teachers):
+            items = []
+            for name, classes, payments, period_earnings, avg_per_class in teachers:
                 earnings_item = QTableWidgetItem(f"${period_earnings:,.2f}")
                 earnings_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.teachers_table.setItem(row, 3, earnings_item)
 
                 avg_item = QTableWidgetItem(f"${avg_per_class:,.2f}")
                 avg_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.teachers_table.setItem(row, 4, avg_item)
 
-        finally:
-            session.close()
+                items.append([
+                    QTableWidgetItem(name),
+                    QTableWidgetItem(str(classes)),
+                    QTableWidgetItem(str(payments)),
+                    earnings_item,
+                    avg_item,
+                ])
+
+            self.fill_table(self.teachers_table, [
+                "Profesor", "Clases", "Pagos", "Total", "Por Clase"
+            ], items)
+
+        self.runner.submit(
+            "teachers", query_teacher_earnings, teacher_id, start_date, end_date,
+            on_result=show, on_error=self.show_report_error,
+        )
 
     # ===========================================================================
     # FUNCIONES DEL DASHBOARD EJECUTIVO
     # ===========================================================================
 
-    def update_executive_dashboard(self):
+    def update_executive_dashboard(self, force=False):
         """Actualizar dashboard ejecutivo."""
-        session = get_session()
-        try:
-            # Ingresos totales
-            payments = get_all_payments()
-            total_revenue = sum(p.amount for p in payments)
-            self.kpi_total_revenue.layout().itemAt(0).widget().setText(f"${total_revenue:,.2f}")
-
-            # Usuarios activos
-            users = session.exec(select(User).where(User.is_active == True)).all()
-            self.kpi_total_users.layout().itemAt(0).widget().setText(str(len(users)))
-
-            # Clases este mes
-            today = datetime.now()
-            first_day = datetime(today.year, today.month, 1)
-            if today.month == 12:
-                last_day = datetime(today.year + 1, 1, 1)
-            else:
-                last_day = datetime(today.year, today.month + 1, 1)
-
-            classes_this_month = session.exec(
-                select(YogaClass).where(
-                    YogaClass.scheduled_at >= first_day,
-                    YogaClass.scheduled_at < last_day
-                )
-            ).all()
-            self.kpi_total_classes.layout().itemAt(0).widget().setText(str(len(classes_this_month)))
-
-            # Tasa de ocupación
-            total_capacity = sum(c.max_capacity for c in classes_this_month)
-            total_booked = sum(c.current_capacity for c in classes_this_month)
-            occupancy_rate = (total_booked / total_capacity * 100) if total_capacity > 0 else 0
-            self.kpi_occupancy_rate.layout().itemAt(0).widget().setText(f"{occupancy_rate:.1f}%")
-
-            # Asistencia promedio
-            attendances = session.exec(
-                select(Attendance).where(
-                    Attendance.attended_at >= first_day,
-                    Attendance.status == "present"
-                )
-            ).all()
-            total_classes_with_attendance = len(set(a.yogaclass_id for a in attendances))
-            avg_attendance = (len(attendances) / (total_classes_with_attendance * 10) * 100) if total_classes_with_attendance > 0 else 0  # Asumiendo 10 estudiantes por clase
-            self.kpi_avg_attendance.layout().itemAt(0).widget().setText(f"{avg_attendance:.1f}%")
-
-            # Nuevos estudiantes este mes
-            new_students = session.exec(
-                select(User).where(
-                    User.role == Role.STUDENT,
-                    User.created_at >= first_day
-                )
-            ).all()
-            self.kpi_new_students.layout().itemAt(0).widget().setText(str(len(new_students)))
-
-            # Ingresos mensuales (últimos 6 meses)
-            self.revenue_table.setRowCount(6)
-            for i in range(6):
-                month = today.month - i
-                year = today.year
-                if month <= 0:
-                    month += 12
-                    year -= 1
-
-                month_start = datetime(year, month, 1)
-                if month == 12:
-                    month_end = datetime(year + 1, 1, 1)
-                else:
-                    month_end = datetime(year, month + 1, 1)
-
-                month_payments = get_all_payments(month_start, month_end)
-                month_revenue = sum(p.amount for p in month_payments)
-
-                month_names = ["Ene", "Feb", "Mar", "Abr", "May", "Jun",
-                              "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
-
-                self.revenue_table.setItem(i, 0, QTableWidgetItem(f"{month_names[month-1]} {year}"))
-                self.revenue_table.setItem(i, 1, QTableWidgetItem(f"${month_revenue:,.2f}"))
-
-            # Clases más populares
-            all_classes = session.exec(
-                select(YogaClass).where(
-                    YogaClass.scheduled_at >= first_day
-                ).order_by(YogaClass.current_capacity.desc())
-            ).all()
-
-            top_classes = all_classes[:5]
-            self.classes_popularity_table.setRowCount(len(top_classes))
-
-            for i, yoga_class in enumerate(top_classes):
-                teacher = session.get(User, yoga_class.teacher_id)
-                occupancy = (yoga_class.current_capacity / yoga_class.max_capacity * 100) if yoga_class.max_capacity > 0 else 0
-
-                self.classes_popularity_table.setItem(i, 0,
-                    QTableWidgetItem(f"Clase #{yoga_class.id} ({teacher.name[:10] if teacher else 'N/A'})"))
-                self.classes_popularity_table.setItem(i, 1,
-                    QTableWidgetItem(f"{occupancy:.1f}%"))
-
-        finally:
-            session.close()
+        self.runner.submit(
+            "dashboard", query_executive_dashboard, self.horizon_combo.currentData(), force,
+            on_result=self.show_executive_dashboard, on_error=self.show_report_error,
+        )
+
+    def show_executive_dashboard(self, data):
+        self.kpi_total_revenue.layout().itemAt(0).widget().setText(f"${data['total_revenue']:,.2f}")
+        self.kpi_total_users.layout().itemAt(0).widget().setText(str(data["active_users"]))
+        self.kpi_total_classes.layout().itemAt(0).widget().setText(str(data["classes_this_month"]))
+        self.kpi_occupancy_rate.layout().itemAt(0).widget().setText(f"{data['occupancy_rate']:.1f}%")
+        self.kpi_avg_attendance.layout().itemAt(0).widget().setText(f"{data['avg_attendance']:.1f}%")
+        self.kpi_new_students.layout().itemAt(0).widget().setText(str(data["new_students"]))
+
+        # Ingresos mensuales (horizonte elegido)
+        self.revenue_table.setRowCount(len(data["monthly_revenue"]))
+        for i, (label, month_revenue) in enumerate(data["monthly_revenue"]):
+            self.revenue_table.setItem(i, 0, QTableWidgetItem(label))
+            self.revenue_table.setItem(i, 1, QTableWidgetItem(f"${month_revenue:,.2f}"))
+
+        # Clases más populares
+        self.classes_popularity_table.setRowCount(len(data["top_classes"]))
+        for i, (_, class_id, teacher, booked, capacity) in enumerate(data["top_classes"]):
+            occupancy = (booked / capacity * 100) if capacity > 0 else 0
+
+            self.classes_popularity_table.setItem(i, 0,
+                QTableWidgetItem(f"Clase #{class_id} ({teacher[:10]})"))
+            self.classes_popularity_table.setItem(i, 1,
+                QTableWidgetItem(f"{occupancy:.1f}%"))
+
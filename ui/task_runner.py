@@ -0,0 +1,213 @@
+"""
+Background execution of database work for the widgets.
+
+``TaskRunner.submit`` runs a callable on the global QThreadPool and delivers
+its result (or error) back on the GUI thread. Tasks are grouped by key, one
+per table or panel: submitting a new task under a key cancels the previous
+one and any late result of the old task is dropped, so a slow query can never
+overwrite the answer to newer filters. Cancellation interrupts the running
+SQLite statement through database.cancellation.
+
+Callables run in a worker thread, so they must only touch the database and
+plain Python data: open their own session, return tuples/dicts, and leave
+every widget update to the ``on_result`` callback. Long jobs can report how
+far they got: submitted with ``progress=True``, the callable receives a
+``progress(done, total)`` keyword argument whose calls reach the GUI thread
+as ``progressChanged``.
+"""
+import itertools
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from PyQt6.QtWidgets import QHBoxLayout, QLabel, QProgressBar, QPushButton, QWidget
+
+from database.cancellation import CancelToken, cancellable
+from database.profiling import profile_action
+
+
+def _task_name(fn) -> str:
+    """Readable name of a task callable, for the query profiler."""
+    fn = getattr(fn, "func", fn)  # functools.partial
+    owner = getattr(fn, "__self__", None)
+    if owner is not None:
+        return f"{type(owner).__qualname__}.{fn.__name__}"
+    return f"{getattr(fn, '__module__', '?')}.{getattr(fn, '__qualname__', repr(fn))}"
+
+
+class TaskSignals(QObject):
+    """Signals of one task: (key, generation, payload)."""
+    finished = pyqtSignal(str, int, object)
+    failed = pyqtSignal(str, int, object)
+    cancelled = pyqtSignal(str, int)
+    progressed = pyqtSignal(str, int, int, int)
+
+
+class _Task(QRunnable):
+    def __init__(self, key, generation, token, fn, args, kwargs):
+        super().__init__()
+        self.key = key
+        self.generation = generation
+        self.token = token
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+
+    def report_progress(self, done, total):
+        self.signals.progressed.emit(self.key, self.generation, done, total)
+
+    def run(self):
+        try:
+            with cancellable(self.token), profile_action(_task_name(self.fn)):
+                result = self.fn(*self.args, **self.kwargs)
+        except Exception as error:
+            # An interrupted statement surfaces as an OperationalError
+            if self.token.cancelled:
+                self.signals.cancelled.emit(self.key, self.generation)
+            else:
+                self.signals.failed.emit(self.key, self.generation, error)
+            return
+        if self.token.cancelled:
+            self.signals.cancelled.emit(self.key, self.generation)
+        else:
+            self.signals.finished.emit(self.key, self.generation, result)
+
+
+class TaskRunner(QObject):
+    """Run callables off the GUI thread, one live task per key."""
+
+    # True while at least one task of this runner is pending
+    busyChanged = pyqtSignal(bool)
+    # Key whose task was cancelled by the user or by a newer submit
+    taskCancelled = pyqtSignal(str)
+    # (key, done, total) reported by a task submitted with progress=True
+    progressChanged = pyqtSignal(str, int, int)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._generations = itertools.count(1)
+        # key -> (generation, token, task, on_result, on_error)
+        self._pending = {}
+
+    def submit(self, key, fn, *args, on_result, on_error=None, progress=False):
+        """Run fn(*args) in the pool; call on_result(value) on the GUI thread.
+
+        A previous task under `key` is cancelled and its result discarded.
+        Errors go to on_error(exception), if given. With `progress`, fn is
+        also passed ``progress=callable(done, total)``, relayed to the GUI
+        thread as progressChanged(key, done, total).
+        """
+        was_busy = self.is_busy()
+        self._cancel_pending(key)
+
+        generation = next(self._generations)
+        token = CancelToken()
+        task = _Task(key, generation, token, fn, args, {})
+        if progress:
+            task.kwargs["progress"] = task.report_progress
+            task.signals.progressed.connect(self._on_progressed)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        task.signals.cancelled.connect(self._on_cancelled)
+        self._pending[key] = (generation, token, task, on_result, on_error)
+        self.pool.start(task)
+
+        if not was_busy:
+            self.busyChanged.emit(True)
+        return generation
+
+    def cancel(self, key=None):
+        """Cancel the task under `key`, or every pending task."""
+        was_busy = self.is_busy()
+        keys = list(self._pending) if key is None else [key]
+        for name in keys:
+            if self._cancel_pending(name):
+                self.taskCancelled.emit(name)
+        if was_busy and not self.is_busy():
+            self.busyChanged.emit(False)
+
+    def is_busy(self, key=None) -> bool:
+        return bool(self._pending) if key is None else key in self._pending
+
+    def _cancel_pending(self, key) -> bool:
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return False
+        entry[1].cancel()
+        return True
+
+    def _take(self, key, generation):
+        """Pop the pending entry for a finished task; None if it is stale."""
+        entry = self._pending.get(key)
+        if entry is None or entry[0] != generation:
+            return None
+        del self._pending[key]
+        if not self._pending:
+            self.busyChanged.emit(False)
+        return entry
+
+    @pyqtSlot(str, int, object)
+    def _on_finished(self, key, generation, result):
+        entry = self._take(key, generation)
+        if entry is not None:
+            entry[3](result)
+
+    @pyqtSlot(str, int, object)
+    def _on_failed(self, key, generation, error):
+        entry = self._take(key, generation)
+        if entry is not None and entry[4] is not None:
+            entry[4](error)
+
+    @pyqtSlot(str, int, int, int)
+    def _on_progressed(self, key, generation, done, total):
+        entry = self._pending.get(key)
+        if entry is not None and entry[0] == generation:
+            self.progressChanged.emit(key, done, total)
+
+    @pyqtSlot(str, int)
+    def _on_cancelled(self, key, generation):
+        if self._take(key, generation) is not None:
+            self.taskCancelled.emit(key)
+
+
+class LoadingIndicator(QWidget):
+    """Busy bar with a cancel button, shown while a TaskRunner is busy.
+
+    The bar is indeterminate unless a task reports progress.
+    """
+
+    def __init__(self, runner: TaskRunner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.label = QLabel("⏳ Cargando...")
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 0)  # indeterminado
+        self.progress.setMaximumHeight(12)
+        self.progress.setTextVisible(False)
+
+        self.cancel_btn = QPushButton("✖ Cancelar")
+        self.cancel_btn.clicked.connect(lambda: self.runner.cancel())
+
+        layout.addWidget(self.label)
+        layout.addWidget(self.progress, 1)
+        layout.addWidget(self.cancel_btn)
+        self.setLayout(layout)
+        self.hide()
+
+        runner.busyChanged.connect(self.set_busy)
+        runner.progressChanged.connect(self.show_progress)
+
+    def set_busy(self, busy):
+        if busy:
+            self.label.setText("⏳ Cargando...")
+            self.progress.setRange(0, 0)
+        self.setVisible(busy)
+
+    def show_progress(self, key, done, total):
+        self.progress.setRange(0, max(total, 1))
+        self.progress.setValue(done)
+        self.label.setText(f"⏳ {done:,} / {total:,}")
@@ -1,5 +1,4 @@
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (  # Agregar QDialog y QCheckBox
     QCheckBox,
     QComboBox,
@@ -12,8 +11,7 @@ from PyQt6.QtWidgets import (  # Agregar QDialog y QCheckBox
     QLineEdit,
     QMessageBox,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
@@ -23,12 +21,37 @@ from database.db import (
     User,
     delete_user,
     get_session,
-    search_users,
+    search_users_query,
     select,
     update_role,
     update_user,
 )
+from models.view_models import UserFilterProxyModel, UserListModel, UserRecord
 from services.services import UserService
+from ui.action_delegate import ActionDelegate
+from ui.task_runner import LoadingIndicator, TaskRunner
+
+ACTIONS_COLUMN = 6
+# Usuarios que se cargan en memoria; con más, la búsqueda consulta la base de datos
+USER_LIST_LIMIT = 5000
+# Pausa de escritura (ms) antes de lanzar la consulta de búsqueda
+SEARCH_DEBOUNCE_MS = 300
+
+
+def query_users(text=None, limit=USER_LIST_LIMIT):
+    """([UserRecord], completa) de los usuarios, o de los que coinciden con `text`.
+
+    `completa` es False si había más de `limit` usuarios y la lista está recortada.
+    """
+    query = search_users_query(text) if text else select(User)
+    session = get_session()
+    try:
+        users = session.exec(
+            query.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1)
+        ).all()
+        return [UserRecord.from_user(user) for user in users[:limit]], len(users) <= limit
+    finally:
+        session.close()
 
 
 class UserManagementWidget(QWidget):
@@ -36,19 +59,28 @@ class UserManagementWidget(QWidget):
         super().__init__()
         self.current_user = user
         self.user_service = UserService()
+        # True si todos los usuarios están en memoria y se filtra sin consultar
+        self.list_complete = True
         self.init_ui()
         self.load_users()
 
     def init_ui(self):
         layout = QVBoxLayout()
+        self.runner = TaskRunner(self)
 
         # Barra de herramientas
         toolbar = QHBoxLayout()
 
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Buscar por nombre o email...")
+        self.search_input.setPlaceholderText("Buscar por nombre, email o teléfono...")
         self.search_input.textChanged.connect(self.filter_users)
 
+        # La consulta a la base de datos espera a que se deje de escribir
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.load_users)
+
         add_btn = QPushButton("➕ Nuevo Usuario")
         add_btn.clicked.connect(self.show_add_user_dialog)
 
@@ -61,73 +93,105 @@ class UserManagementWidget(QWidget):
         toolbar.addWidget(refresh_btn)
         toolbar.addStretch()
 
-        # Tabla de usuarios
-        self.users_table = QTableWidget()
-        self.users_table.setColumnCount(7)
-        self.users_table.setHorizontalHeaderLabels([
-            "ID", "Nombre", "Email", "Teléfono", "Rol", "Estado", "Acciones"
-        ])
+        # Filtros por rol y estado, aplicados en memoria
+        chips = QHBoxLayout()
+        chips.addWidget(QLabel("Rol:"))
+        self.role_chips = {}
+        for role in Role:
+            chip = self.make_chip(role.value)
+            chip.toggled.connect(self.apply_role_filter)
+            self.role_chips[role.value] = chip
+            chips.addWidget(chip)
+        chips.addSpacing(20)
+        chips.addWidget(QLabel("Estado:"))
+        self.active_chip = self.make_chip("Activos")
+        self.inactive_chip = self.make_chip("Inactivos")
+        for chip in (self.active_chip, self.inactive_chip):
+            chip.toggled.connect(self.apply_status_filter)
+            chips.addWidget(chip)
+        chips.addStretch()
+        self.count_label = QLabel()
+        chips.addWidget(self.count_label)
+
+        # Tabla de usuarios: lista en memoria con filtro y orden en el cliente
+        self.users_model = UserListModel()
+        self.users_proxy = UserFilterProxyModel(self)
+        self.users_proxy.setSourceModel(self.users_model)
+        self.users_table = QTableView()
+        self.users_table.setModel(self.users_proxy)
+        self.users_table.setSortingEnabled(True)
         self.users_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Orden inicial: los más recientes primero, como los devuelve la consulta
+        self.users_table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        # Botones de acción pintados por el delegado: ningún widget por fila
+        self.actions_delegate = ActionDelegate(self.users_table, ACTIONS_COLUMN)
+        self.actions_delegate.triggered.connect(self.user_action)
+        for signal in (self.users_proxy.rowsInserted, self.users_proxy.rowsRemoved,
+                       self.users_proxy.modelReset):
+            signal.connect(self.update_count)
 
         layout.addLayout(toolbar)
+        layout.addLayout(chips)
+        layout.addWidget(LoadingIndicator(self.runner))
         layout.addWidget(self.users_table)
         self.setLayout(layout)
 
-    def load_users(self):
-        session = get_session()
-        try:
-            users = session.exec(select(User)).all()
-            self.display_users(users)
-        finally:
-            session.close()
-
-    def display_users(self, users):
-        self.users_table.setRowCount(len(users))
-
-        for row, user in enumerate(users):
-            self.users_table.setItem(row, 0, QTableWidgetItem(str(user.id)))
-            self.users_table.setItem(row, 1, QTableWidgetItem(user.name))
-            self.users_table.setItem(row, 2, QTableWidgetItem(user.email))
-            self.users_table.setItem(row, 3, QTableWidgetItem(user.phone or ""))
-            self.users_table.setItem(row, 4, QTableWidgetItem(user.role.value))
-
-            # Estado
-            status_item = QTableWidgetItem("Activo" if user.is_active else "Inactivo")
-            if user.is_active:
-                status_item.setForeground(QColor("green"))
-            else:
-                status_item.setForeground(QColor("red"))
-            self.users_table.setItem(row, 5, status_item)
-
-            # Botones de acción
-            action_widget = QWidget()
-            action_layout = QHBoxLayout()
-            action_layout.setContentsMargins(0, 0, 0, 0)
+    def make_chip(self, text):
+        chip = QPushButton(text)
+        chip.setCheckable(True)
+        chip.setChecked(True)
+        return chip
 
-            edit_btn = QPushButton("✏️")
-            edit_btn.setFixedSize(30, 30)
-            edit_btn.clicked.connect(lambda checked, uid=user.id: self.edit_user(uid))
+    def load_users(self):
+        """Recargar la lista; si no cabe entera en memoria, sólo las coincidencias."""
+        self.search_timer.stop()
+        text = "" if self.list_complete else self.search_input.text().strip()
+        self.runner.submit(
+            "users", query_users, text,
+            on_result=lambda result: self.display_users(text, *result),
+            on_error=lambda e: QMessageBox.critical(
+                self, "Error", f"Error al cargar usuarios: {str(e)}"
+            ),
+        )
 
-            delete_btn = QPushButton("🗑️")
-            delete_btn.setFixedSize(30, 30)
-            delete_btn.clicked.connect(lambda checked, uid=user.id: self.delete_user(uid))
+    def display_users(self, text, records, complete):
+        # Sólo la lista sin filtrar dice si caben todos los usuarios
+        if not text:
+            self.list_complete = complete
+        self.users_model.set_records(records)
+        if not self.list_complete and not text and self.search_input.text().strip():
+            self.load_users()
 
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(delete_btn)
-            action_widget.setLayout(action_layout)
+    def user_action(self, name, index):
+        user_id = index.data(Qt.ItemDataRole.UserRole)
+        if user_id is None:
+            return
+        if name == "edit":
+            self.edit_user(user_id)
+        elif name == "delete":
+            self.delete_user(user_id)
 
-            self.users_table.setCellWidget(row, 6, action_widget)
+    def update_count(self):
+        total = len(self.users_model.records)
+        suffix = "" if self.list_complete else f" (primeros {USER_LIST_LIMIT})"
+        self.count_label.setText(f"{self.users_proxy.rowCount()} de {total} usuarios{suffix}")
 
     def filter_users(self, text):
-        if text.strip():
-            session = get_session()
-            try:
-                users = search_users(text)
-                self.display_users(users)
-            finally:
-                session.close()
-        else:
-            self.load_users()
+        # Filtrar lo que ya está en memoria en cada pulsación
+        self.users_proxy.set_text(text)
+        if not self.list_complete:
+            self.search_timer.start()
+
+    def apply_role_filter(self):
+        roles = [role for role, chip in self.role_chips.items() if chip.isChecked()]
+        self.users_proxy.set_roles(None if len(roles) == len(self.role_chips) else roles)
+
+    def apply_status_filter(self):
+        statuses = [
+            is_active for is_active, chip in ((True, self.active_chip), (False, self.inactive_chip))
+            if chip.isChecked()
+        ]
+        self.users_proxy.set_statuses(None if len(statuses) == 2 else statuses)
 
     def show_add_user_dialog(self):
         dialog = AddUserDialog(self)